@@ -1,3 +1,8 @@
+import asyncio
+import functools
+import os
+import subprocess
+import sys
 from datetime import datetime, timedelta
 from textwrap import dedent
 
@@ -8,13 +13,32 @@ load_dotenv()  # Load environment variables from .env file
 import gradio as gr
 import pandas as pd
 import plotly.express as px
-from geopy.exc import GeocoderServiceError, GeocoderTimedOut, GeocoderUnavailable
-from geopy.geocoders import Nominatim
-
+import plotly.graph_objects as go
+
+from src.nwa_hydro.cache import DEFAULT_TTL_SECONDS, cache_key, get_cache, get_or_compute
+from src.nwa_hydro.codec import decode_series, encode_series
+from src.nwa_hydro.health import MONITOR
+from src.nwa_hydro.jobs import Job, JobQueueFullError, get_job_queue
+from src.nwa_hydro.memo import MEMO, ChainResult
+from src.nwa_hydro.metrics import CACHE_HITS, start_metrics_server
+from src.nwa_hydro.snapshots import SnapshotRefresher, latest_available_date, parse_sites
+from src.nwa_hydro.tools.climatology import lookup_anomaly
+from src.nwa_hydro.tools.export import EXPORT_FORMATS, export_sites
 from src.nwa_hydro.tools.fusion import fetch_climate_data, fetch_climate_range
-from src.nwa_hydro.tools.intelligence import generate_agronomist_insight
+from src.nwa_hydro.tools.grid import (
+    NICARAGUA_BBOX,
+    EToRaster,
+    GridSpec,
+    build_eto_raster,
+    raster_cells_geojson,
+)
+from src.nwa_hydro.tools.intelligence import (
+    InsightUpdate,
+    generate_agronomist_insight,
+    stream_agronomist_insight,
+)
 from src.nwa_hydro.tools.science import calculate_hargreaves_eto
-from src.nwa_hydro.schemas import EToResult
+from src.nwa_hydro.schemas import AgronomistInsight, ClimateAnomaly, ClimateData, EToResult
 
 
 DEFAULT_LAT = 12.9256
@@ -22,13 +46,46 @@ DEFAULT_LON = -85.9189
 DEFAULT_LABEL = "Matagalpa (Coffee High - 1400m)"
 SCENARIO_A_LABEL = "☕ Scenario A: High-Altitude Coffee (Matagalpa)"
 SCENARIO_B_LABEL = "🌫️ Scenario B: Dry Corridor (El Crucero)"
+NATIONAL_GRID_RESOLUTION = 0.25  # degrees (~28 km), ~350 cells over Nicaragua
+EXPORT_HISTORY_DAYS = 90  # days of history in the dashboard download
+JOB_PREVIEW_ROWS = 50  # result rows shown for a finished background job
+JOB_KIND_CHOICES = [
+    ("Site history (selected location)", "site_history"),
+    ("National ETo grid (daily min/mean/max)", "region_eto"),
+]
+
+# Scale-out: queue concurrency per event chain, and independent worker processes
+# sharing results through NWA_HYDRO_CACHE_URL (disk, sqlite or redis).
+WORKERS = int(os.getenv("NWA_HYDRO_WORKERS", "1"))
+QUEUE_DEFAULT_CONCURRENCY = int(os.getenv("NWA_HYDRO_QUEUE_CONCURRENCY", "1"))
+QUEUE_MAX_SIZE = int(os.getenv("NWA_HYDRO_QUEUE_MAX_SIZE", "0")) or None
+EVENT_CONCURRENCY = {
+    "analyze": int(os.getenv("NWA_HYDRO_ANALYZE_CONCURRENCY", "8")),
+    "insight": int(os.getenv("NWA_HYDRO_INSIGHT_CONCURRENCY", "4")),
+    "national_map": int(os.getenv("NWA_HYDRO_NATIONAL_MAP_CONCURRENCY", "1")),
+    "export": int(os.getenv("NWA_HYDRO_EXPORT_CONCURRENCY", "2")),
+}
 SCENARIO_PRESETS = {
     SCENARIO_A_LABEL: {"lat": DEFAULT_LAT, "lon": DEFAULT_LON, "zoom": 10, "label": SCENARIO_A_LABEL},
     SCENARIO_B_LABEL: {"lat": 11.9903, "lon": -86.3087, "zoom": 10, "label": SCENARIO_B_LABEL},
 }
+# Sites whose dashboards are precomputed in the background (presets + NWA_HYDRO_HOT_SITES).
+SNAPSHOT_SITES = {
+    label: (preset["lat"], preset["lon"]) for label, preset in SCENARIO_PRESETS.items()
+} | parse_sites(os.getenv("NWA_HYDRO_HOT_SITES", ""))
+LIVE_STATUS = "🔄 Live analysis"
+# Fill the insight cards progressively from Gemini's stream (0 waits for the full answer).
+STREAM_INSIGHTS = os.getenv("NWA_HYDRO_STREAM_INSIGHTS", "1") != "0"
+
+
+@functools.cache
+def _geocoder():
+    """Created on the first search so geopy stays off the startup path."""
+    from geopy.geocoders import Nominatim
+
+    # Nominatim requires a user_agent; keep timeout tight to avoid blocking UI
+    return Nominatim(user_agent="nwa-hydro-hackathon", timeout=5)
 
-# Nominatim requires a user_agent; keep timeout tight to avoid blocking UI
-_GEOCODER = Nominatim(user_agent="nwa-hydro-hackathon", timeout=5)
 
 OCEAN_STYLE = """
 <style>
@@ -47,7 +104,7 @@ OCEAN_STYLE = """
   --risk-low: #22c55e;
 }
 body {background: var(--ocean-bg); color: var(--ocean-text);}
-.kpi-row {display: grid; grid-template-columns: repeat(3, 1fr); gap: 12px; margin-bottom: 10px;}
+.kpi-row {display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; margin-bottom: 10px;}
 .kpi-card {background: linear-gradient(145deg, #111a2e, #0e182b); padding: 12px 14px; border-radius: 12px; display: flex; align-items: center; gap: 10px; box-shadow: 0 6px 20px rgba(0,0,0,0.35); min-height: 70px;}
 .kpi-icon {font-size: 20px; filter: drop-shadow(0 2px 6px rgba(0,0,0,0.35));}
 .kpi-label {text-transform: uppercase; letter-spacing: 0.6px; font-size: 10px; color: var(--ocean-muted); margin-bottom: 2px;}
@@ -128,14 +185,77 @@ def _safe_float(value, default=0.0) -> float:
         return float(default)
 
 
+# --- Shared cache: scaled-out workers reuse each other's fetches and insights ---
+
+async def cached_climate_range(lat: float, lon: float, start: str, end: str) -> list[ClimateData]:
+    return await get_or_compute(
+        cache_key("climate_series", lat, lon, start, end),
+        lambda: fetch_climate_range(lat, lon, start, end),
+        list[ClimateData],
+        store=bool,  # An empty list means the API failed; retry next time.
+        encode=encode_series,
+        decode=decode_series,
+    )
+
+
+async def cached_climate_data(lat: float, lon: float, date_str: str) -> ClimateData:
+    return await get_or_compute(
+        cache_key("climate", lat, lon, date_str),
+        lambda: fetch_climate_data(lat, lon, date_str),
+        ClimateData,
+        store=lambda climate: climate.source != "CSV",
+    )
+
+
+def _is_generated_insight(insight: AgronomistInsight) -> bool:
+    """Gemini and rule answers are cached; fallbacks (no key, timeout, API error) are not."""
+    return not insight.fallback
+
+
+def _insight_key(lat: float, lon: float, eto_result: EToResult) -> str:
+    return cache_key("insight", lat, lon, eto_result.date, round(eto_result.eto, 2))
+
+
+async def cached_insight(lat: float, lon: float, eto_result: EToResult) -> AgronomistInsight:
+    return await get_or_compute(
+        _insight_key(lat, lon, eto_result),
+        lambda: generate_agronomist_insight(eto_result),
+        AgronomistInsight,
+        store=_is_generated_insight,
+    )
+
+
+async def streamed_insight(lat: float, lon: float, eto_result: EToResult):
+    """
+    Stream a Gemini insight, or serve the cached one at once. A stream cannot be
+    shared, so unlike cached_insight it does not wait on another worker's lock.
+    """
+    cache = get_cache()
+    key = _insight_key(lat, lon, eto_result)
+    raw = await asyncio.to_thread(cache.get, key)
+    if raw is not None:
+        CACHE_HITS.inc(cache="insight")
+        insight = AgronomistInsight.model_validate_json(raw)
+        yield InsightUpdate(insight.summary, insight.advice, insight)
+        return
+    async for update in stream_agronomist_insight(eto_result):
+        if update.insight is not None and _is_generated_insight(update.insight):
+            await asyncio.to_thread(
+                cache.set, key, update.insight.model_dump_json().encode(), DEFAULT_TTL_SECONDS
+            )
+        yield update
+
+
 def get_location_from_text(query: str) -> tuple[float, float, str] | None:
     """Geocode a text query; returns (lat, lon, label) or None if not found."""
     if not query or not query.strip():
         gr.Warning("Type a place to search (e.g., 'El Crucero').")
         return None
+    from geopy.exc import GeocoderServiceError, GeocoderTimedOut, GeocoderUnavailable
+
     bbox_bias = [(-88, 10), (-82, 15)]  # Soft bias toward Nicaragua/Central America
     try:
-        location = _GEOCODER.geocode(
+        location = _geocoder().geocode(
             query.strip(),
             exactly_one=True,
             addressdetails=False,
@@ -164,8 +284,17 @@ def get_location_from_text(query: str) -> tuple[float, float, str] | None:
     )
 
 
-def update_map(lat: float, lon: float, label: str | None = None, zoom: float | None = None):
-    """Render a simple map with the selected point using open-street-map tiles (Maplibre)."""
+def update_map(
+    lat: float,
+    lon: float,
+    label: str | None = None,
+    zoom: float | None = None,
+    raster: EToRaster | None = None,
+):
+    """
+    Render a simple map with the selected point using open-street-map tiles (Maplibre).
+    When an ETo raster is given, it is drawn as a heatmap layer beneath the point.
+    """
     lat = _safe_float(lat, DEFAULT_LAT)
     lon = _safe_float(lon, DEFAULT_LON)
     if label is None:
@@ -191,6 +320,22 @@ def update_map(lat: float, lon: float, label: str | None = None, zoom: float | N
         customdata=df[["lat", "lon"]],
         hovertemplate="<b>%{hovertext}</b><br>Lat: %{lat:.4f}<br>Lon: %{lon:.4f}<extra></extra>",
     )
+    if raster is not None:
+        geojson, cell_ids, values = raster_cells_geojson(raster)
+        fig.add_trace(
+            go.Choroplethmap(
+                geojson=geojson,
+                locations=cell_ids,
+                z=values,
+                colorscale="YlOrRd",
+                marker_opacity=0.55,
+                marker_line_width=0,
+                colorbar=dict(title="ETo<br>mm/day", thickness=10),
+                hovertemplate="ETo: %{z:.2f} mm/day<extra></extra>",
+            )
+        )
+        # Keep the selected point drawn above the heatmap.
+        fig.data = fig.data[::-1]
     fig.update_layout(
         margin=dict(l=0, r=0, t=0, b=0),
         clickmode="event+select",
@@ -270,9 +415,86 @@ def set_preset_location(preset_key: str):
     return lat, lon, update_map(lat, lon, label, zoom=zoom), label
 
 
-async def analyze_hydro(lat: float, lon: float, date_str: str, location_label: str | None = None):
+async def handle_national_map(date_str: str, lat: float, lon: float, label: str | None):
+    """Compute the national ETo raster for the date and overlay it on the map."""
+    title = label or "Selected Location"
+    try:
+        spec = GridSpec.from_bbox(NICARAGUA_BBOX, NATIONAL_GRID_RESOLUTION)
+        raster = await build_eto_raster(spec, date_str)
+    except Exception as exc:  # noqa: BLE001
+        gr.Warning(f"National ETo map unavailable right now ({exc}).")
+        return update_map(lat, lon, title, zoom=9)
+    return update_map(lat, lon, title, zoom=6, raster=raster)
+
+
+async def handle_export(lat: float, lon: float, date_str: str, label: str | None, fmt: str):
+    """Export the site's daily climate and ETo up to the selected date for download."""
+    try:
+        end = datetime.strptime(date_str, "%Y-%m-%d")
+        start = (end - timedelta(days=EXPORT_HISTORY_DAYS - 1)).strftime("%Y-%m-%d")
+        site = label or f"{lat:.4f},{lon:.4f}"
+        summary = await export_sites({site: (lat, lon)}, start, date_str, fmt=fmt)
+    except ValueError as exc:
+        gr.Warning(f"Export unavailable ({exc}).")
+        return None
+    if not summary.rows:
+        gr.Warning("No climate data to export for this site and date.")
+        return None
+    return summary.path
+
+
+def _job_status_md(job: Job) -> str:
+    if job.status == "failed":
+        return f"**Job `{job.id}` failed:** {job.error}"
+    if job.status == "done":
+        return f"**Job `{job.id}` done:** {job.rows} rows."
+    return f"**Job `{job.id}` {job.status}** ({job.progress:.0%}). Refresh to check again."
+
+
+async def handle_job_submit(kind: str, start_date: str, date_str: str, lat: float, lon: float):
+    """Queue a long-running analysis ending on the selected date; returns its ID and status."""
+    params = {"start_date": start_date.strip(), "end_date": date_str, "method": "hargreaves"}
+    if kind == "region_eto":
+        bbox_keys = ("min_lat", "min_lon", "max_lat", "max_lon")
+        params |= dict(zip(bbox_keys, NICARAGUA_BBOX, strict=True))
+        params["resolution"] = NATIONAL_GRID_RESOLUTION
+    else:
+        params |= {"lat": lat, "lon": lon}
+    queue = get_job_queue()
+    try:
+        job = queue.submit(kind, params, priority="interactive")
+    except (ValueError, JobQueueFullError) as exc:
+        gr.Warning(f"Could not submit job ({exc}).")
+        return "", ""
+    queue.start()
+    return job.id, _job_status_md(job)
+
+
+async def handle_job_refresh(job_id: str):
+    """Status of a background job and, once done, a preview of its first rows."""
+    queue = get_job_queue()
+    job = queue.get(job_id.strip())
+    if job is None:
+        gr.Warning("Unknown job ID.")
+        return "", None
+    page = await asyncio.to_thread(queue.results, job.id, 0, JOB_PREVIEW_ROWS)
+    return _job_status_md(job), pd.DataFrame(page.rows) if page.rows else None
+
+
+def _session(request: gr.Request | None) -> str | None:
+    return getattr(request, "session_hash", None)
+
+
+async def analyze_hydro(
+    lat: float,
+    lon: float,
+    date_str: str,
+    location_label: str | None = None,
+    session: str | None = None,
+):
     """
-    Returns: dashboard_md, mean_temp, precip, humidity, df_plot, eto_json, md_output.
+    Returns: dashboard_md, mean_temp, precip, humidity, df_plot, eto_json, md_output, anomaly.
+    With a session, the native results are also kept in MEMO for the rest of the chain.
     """
     location_title = location_label or DEFAULT_LABEL
     try:
@@ -280,7 +502,7 @@ async def analyze_hydro(lat: float, lon: float, date_str: str, location_label: s
         start_date_str = (target_date - timedelta(days=6)).strftime("%Y-%m-%d")
         # Try fetching range first (single call)
         try:
-            range_results = await fetch_climate_range(lat, lon, start_date_str, date_str)
+            range_results = await cached_climate_range(lat, lon, start_date_str, date_str)
         except Exception:
             range_results = []
 
@@ -291,7 +513,7 @@ async def analyze_hydro(lat: float, lon: float, date_str: str, location_label: s
         else:
             # Fallback: single-day fetch
             try:
-                day_climate = await fetch_climate_data(lat, lon, date_str)
+                day_climate = await cached_climate_data(lat, lon, date_str)
             except Exception:
                 day_climate = None
 
@@ -302,6 +524,10 @@ async def analyze_hydro(lat: float, lon: float, date_str: str, location_label: s
 
         # ETo + AI insight
         eto_result = calculate_hargreaves_eto(day_climate) if day_climate else None
+        # Local climatology baseline: no extra network call.
+        anomaly = lookup_anomaly(eto_result) if eto_result else None
+        chain = ChainResult(day_climate, range_results, eto_result, anomaly)
+        MEMO.put(session, lat, lon, date_str, chain)
 
         # Chart rows from range results (or empty)
         rows: list[dict[str, float | str]] = []
@@ -331,18 +557,20 @@ async def analyze_hydro(lat: float, lon: float, date_str: str, location_label: s
         )
 
         dashboard_md = f"### 📍 ANALYSIS TARGET: {location_title}"
-        return dashboard_md, mean_temp, precip, humidity, df_plot, eto_json, placeholder_md
+        return dashboard_md, mean_temp, precip, humidity, df_plot, eto_json, placeholder_md, anomaly
 
     except Exception as e:  # noqa: BLE001
         empty_df = pd.DataFrame(columns=["Date", "ETo", "Precipitation"])
         dashboard_md = f"### 📍 ANALYSIS TARGET: {location_title}"
-        return dashboard_md, 0.0, 0.0, 0.0, empty_df, None, f"Error: {str(e)}"
+        return dashboard_md, 0.0, 0.0, 0.0, empty_df, None, f"Error: {str(e)}", None
 
 
-def render_kpis(mean_temp: float, precip: float, humidity: float):
-    def card(label: str, value: float, unit: str, icon: str, extra_class: str = "") -> str:
+def render_kpis(mean_temp: float, precip: float, humidity: float, anomaly=None):
+    def card(label: str, value: float | str, unit: str, icon: str, extra_class: str = "") -> str:
         if value is None:
             display = "--"
+        elif isinstance(value, str):
+            display = value
         else:
             display = f"{value:.1f}{unit}"
         return f"""
@@ -358,7 +586,13 @@ def render_kpis(mean_temp: float, precip: float, humidity: float):
     temp_card = card("Mean Temp", mean_temp, "°C", "🌡️", "kpi-temp")
     precip_card = card("Precipitation", precip, " mm", "🌧️", "kpi-precip")
     humidity_card = card("Avg. Humidity", humidity, "%", "💧", "kpi-humidity")
-    return temp_card, precip_card, humidity_card
+    anomaly_display = None
+    if anomaly is not None and anomaly.eto_anomaly is not None:
+        anomaly_display = f"{anomaly.eto_anomaly:+.1f} mm"
+        if anomaly.eto_percentile is not None:
+            anomaly_display += f" <span class='kpi-label'>p{anomaly.eto_percentile:.0f}</span>"
+    anomaly_card = card("ETo vs. Normal", anomaly_display, "", "📊", "kpi-anomaly")
+    return temp_card, precip_card, humidity_card, anomaly_card
 
 
 def render_chart(df_plot: pd.DataFrame | None):
@@ -428,6 +662,13 @@ def render_chart(df_plot: pd.DataFrame | None):
     return bar_fig
 
 
+async def start_background_tasks():
+    """Start probes, snapshot refreshes and job workers on Gradio's event loop (idempotent)."""
+    MONITOR.start()
+    SNAPSHOTS.start()
+    get_job_queue().start()
+
+
 def show_loading():
     return gr.update(value="⏳ Loading Gemini insight...", visible=True)
 
@@ -436,33 +677,13 @@ def hide_loading():
     return gr.update(value="", visible=False)
 
 
-async def generate_insight_only(lat: float, lon: float, date_str: str, eto_json: str | None):
-    """Generate insight separately to avoid blocking chart rendering."""
-    try:
-        eto_result = None
-        if eto_json:
-            try:
-                eto_result = EToResult.model_validate_json(eto_json)
-            except Exception:
-                eto_result = None
-
-        if eto_result is None:
-            # Fallback: recompute quickly
-            climate = await fetch_climate_data(lat, lon, date_str)
-            eto_result = calculate_hargreaves_eto(climate)
+def render_insight(summary: str, advice: str, risk_raw: str, eto_value: float) -> str:
+    risk_class = "risk-low"
+    if "High" in risk_raw: risk_class = "risk-high"
+    elif "Medium" in risk_raw: risk_class = "risk-med"
+    eto_val = f"{eto_value:.2f}"
 
-        insight = await generate_agronomist_insight(eto_result)
-        
-        risk_raw = getattr(insight, "risk_level", "Unknown")
-        risk_class = "risk-low"
-        if "High" in risk_raw: risk_class = "risk-high"
-        elif "Medium" in risk_raw: risk_class = "risk-med"
-        
-        summary = getattr(insight, "summary", "Data unavailable")
-        advice = getattr(insight, "advice", "No advice available")
-        eto_val = f"{getattr(insight, 'eto_value', 0.0):.2f}"
-
-        html_output = f"""
+    return f"""
         <div class="insight-grid">
             <div style="display:flex; flex-direction:column; gap:10px;">
                 <div class="insight-card">
@@ -486,13 +707,142 @@ async def generate_insight_only(lat: float, lon: float, date_str: str, eto_json:
             </div>
         </div>
         """
-        return html_output
+
+
+def render_insight_model(insight: AgronomistInsight) -> str:
+    return render_insight(
+        getattr(insight, "summary", "Data unavailable"),
+        getattr(insight, "advice", "No advice available"),
+        getattr(insight, "risk_level", "Unknown"),
+        getattr(insight, "eto_value", 0.0),
+    )
+
+
+async def generate_insight_only(
+    lat: float, lon: float, date_str: str, eto_json: str | None, request: gr.Request | None = None
+):
+    """
+    Generate insight separately to avoid blocking chart rendering. With
+    NWA_HYDRO_STREAM_INSIGHTS the cards fill in while Gemini is still writing.
+    """
+    try:
+        # Same chain: reuse what the analyze step computed, without parsing or fetching.
+        chain = MEMO.get(_session(request), lat, lon, date_str)
+        eto_result = chain.eto if chain else None
+        if eto_result is None and eto_json:
+            try:
+                eto_result = EToResult.model_validate_json(eto_json)
+            except Exception:
+                eto_result = None
+
+        if eto_result is None:
+            # Fallback: recompute quickly
+            climate = chain.climate if chain and chain.climate else None
+            climate = climate or await cached_climate_data(lat, lon, date_str)
+            eto_result = calculate_hargreaves_eto(climate)
+
+        if not STREAM_INSIGHTS:
+            yield render_insight_model(await cached_insight(lat, lon, eto_result))
+            return
+        async for update in streamed_insight(lat, lon, eto_result):
+            if update.insight is not None:
+                yield render_insight_model(update.insight)
+            else:
+                yield render_insight(
+                    update.summary or "…", update.advice or "…", "…", eto_result.eto
+                )
 
     except Exception as exc:  # noqa: BLE001
-        return f"<div class='insight-card'>Error generating insight: {exc}</div>"
+        yield f"<div class='insight-card'>Error generating insight: {exc}</div>"
+
+
+async def final_insight_html(
+    lat: float, lon: float, date_str: str, eto_json: str | None, request: gr.Request | None = None
+) -> str:
+    """The insight cards once generation has finished, for callers that cannot stream."""
+    html = ""
+    async for update in generate_insight_only(lat, lon, date_str, eto_json, request):
+        html = update
+    return html
+
+# --- Precomputed snapshots: instant page loads and scenario clicks ---
+
+async def compute_snapshot(lat: float, lon: float, date_str: str, label: str) -> dict:
+    """Run the full dashboard chain once; the refresher stores the result for every visitor."""
+    dashboard_md, mean_temp, precip, humidity, df_plot, eto_json, _, anomaly = await analyze_hydro(
+        lat, lon, date_str, label
+    )
+    if eto_json is None:
+        raise ValueError("analysis produced no ETo result")
+    return {
+        "dashboard_md": dashboard_md,
+        "mean_temp": mean_temp,
+        "precip": precip,
+        "humidity": humidity,
+        "rows": df_plot.to_dict("records"),
+        "eto_json": eto_json,
+        "anomaly": anomaly.model_dump() if anomaly is not None else None,
+        "insight_html": await final_insight_html(lat, lon, date_str, eto_json),
+    }
+
+
+SNAPSHOTS = SnapshotRefresher(SNAPSHOT_SITES, compute_snapshot)
+
+
+async def analyze_dashboard(
+    lat: float,
+    lon: float,
+    date_str: str,
+    location_label: str | None = None,
+    request: gr.Request | None = None,
+):
+    """analyze_hydro outputs plus a status line, served from a snapshot when one matches."""
+    snapshot = await asyncio.to_thread(SNAPSHOTS.get, lat, lon, date_str)
+    if snapshot is None:
+        results = await analyze_hydro(lat, lon, date_str, location_label, _session(request))
+        return (*results, LIVE_STATUS)
+    data = snapshot.payload
+    rows = data["rows"]
+    df_plot = pd.DataFrame(rows) if rows else pd.DataFrame(columns=["Date", "ETo", "Precipitation"])
+    anomaly = ClimateAnomaly.model_validate(data["anomaly"]) if data["anomaly"] else None
+    return (
+        data["dashboard_md"], data["mean_temp"], data["precip"], data["humidity"], df_plot,
+        data["eto_json"], data["insight_html"], anomaly, SNAPSHOTS.status(snapshot),
+    )
+
+
+async def analyze_live(
+    lat: float,
+    lon: float,
+    date_str: str,
+    location_label: str | None = None,
+    request: gr.Request | None = None,
+):
+    """Explicit 'Analyze' clicks always recompute."""
+    results = await analyze_hydro(lat, lon, date_str, location_label, _session(request))
+    return (*results, LIVE_STATUS)
+
+
+async def dashboard_insight(
+    lat: float, lon: float, date_str: str, eto_json: str | None, request: gr.Request | None = None
+):
+    snapshot = await asyncio.to_thread(SNAPSHOTS.get, lat, lon, date_str)
+    if snapshot is not None and snapshot.payload["eto_json"] == eto_json:
+        yield snapshot.payload["insight_html"]
+        return
+    async for html in generate_insight_only(lat, lon, date_str, eto_json, request):
+        yield html
+
+
+def drop_session_results(request: gr.Request):
+    """Free the closed session's chain results."""
+    MEMO.drop(_session(request))
+
 
 # Initial skeleton cards must be defined before UI construction
-_SKELETON_MEAN, _SKELETON_PRECIP, _SKELETON_HUMIDITY = render_kpis(None, None, None)
+_SKELETON_MEAN, _SKELETON_PRECIP, _SKELETON_HUMIDITY, _SKELETON_ANOMALY = render_kpis(
+    None, None, None
+)
 
 # Gradio UI
 with gr.Blocks(title="NWA Hydro-Compute") as demo:
@@ -509,6 +859,7 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
     )
 
     mean_state = gr.State()
+    anomaly_state = gr.State()
     precip_state = gr.State()
     humidity_state = gr.State()
     df_state = gr.State()
@@ -531,6 +882,7 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
                 with gr.Row():
                     scenario_a_btn = gr.Button(SCENARIO_A_LABEL, variant="secondary")
                     scenario_b_btn = gr.Button(SCENARIO_B_LABEL, variant="secondary")
+                national_map_btn = gr.Button("🗺️ National ETo Map (Nicaragua)", variant="secondary")
                 map_plot = gr.Plot(
                     label="📌 Selected Location",
                     value=update_map(DEFAULT_LAT, DEFAULT_LON, DEFAULT_LABEL, zoom=10),
@@ -540,7 +892,8 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
                     lon_input = gr.Number(label="Longitude", value=DEFAULT_LON)
                 date_input = gr.Textbox(
                     label="Date (YYYY-MM-DD)",
-                    value=datetime.now().strftime("%Y-%m-%d"),
+                    # Evaluated per page load, and the same day the snapshots are built for.
+                    value=latest_available_date,
                     placeholder="YYYY-MM-DD",
                     info="Format: YYYY-MM-DD",
                 )
@@ -551,13 +904,38 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
             
             # Dynamic Title Component
             dashboard_title = gr.Markdown(f"### 📍 ANALYSIS TARGET: {DEFAULT_LABEL}")
+            snapshot_status = gr.Markdown("", elem_id="snapshot-status")
 
             with gr.Row(elem_classes="kpi-row"):
                 mean_card = gr.Markdown(_SKELETON_MEAN)
                 precip_card = gr.Markdown(_SKELETON_PRECIP)
                 humidity_card = gr.Markdown(_SKELETON_HUMIDITY)
+                anomaly_card = gr.Markdown(_SKELETON_ANOMALY)
             loading_msg = gr.Markdown(visible=False)
             plot_output = gr.Plot(label="Water Balance Chart")
+            with gr.Row():
+                export_format = gr.Dropdown(
+                    choices=list(EXPORT_FORMATS),
+                    value="csv",
+                    label=f"Export last {EXPORT_HISTORY_DAYS} days",
+                    scale=1,
+                )
+                export_btn = gr.Button("⬇️ Export Climate + ETo", variant="secondary", scale=1)
+                export_file = gr.File(label="Download", interactive=False, scale=2)
+            with gr.Accordion("🗂️ Long-running analyses", open=False):
+                with gr.Row():
+                    job_kind = gr.Dropdown(
+                        choices=JOB_KIND_CHOICES, value="site_history", label="Analysis", scale=2
+                    )
+                    job_start = gr.Textbox(
+                        label="From (YYYY-MM-DD), up to the selected date", scale=1
+                    )
+                    job_submit_btn = gr.Button("▶️ Submit Job", variant="secondary", scale=1)
+                with gr.Row():
+                    job_id = gr.Textbox(label="Job ID", scale=2)
+                    job_refresh_btn = gr.Button("🔄 Refresh Status", variant="secondary", scale=1)
+                job_status = gr.Markdown("")
+                job_rows = gr.Dataframe(label=f"First {JOB_PREVIEW_ROWS} rows", interactive=False)
             
             gr.Markdown("### 🌿 Agronomist Insight")
             output_html = gr.HTML(
@@ -591,6 +969,33 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
             pass
 
     # Event wiring
+    def then_dashboard(event, analyze_fn, insight_fn):
+        """Chain analysis -> KPIs -> chart -> insight onto an event."""
+        return event.then(
+            analyze_fn,
+            inputs=[lat_input, lon_input, date_input, current_location_state],
+            outputs=[
+                dashboard_title, mean_state, precip_state, humidity_state, df_state,
+                eto_state, output_html, anomaly_state, snapshot_status,
+            ],
+            concurrency_limit=EVENT_CONCURRENCY["analyze"],
+            concurrency_id="analyze",
+        ).then(
+            render_kpis,
+            inputs=[mean_state, precip_state, humidity_state, anomaly_state],
+            outputs=[mean_card, precip_card, humidity_card, anomaly_card],
+        ).then(
+            render_chart,
+            inputs=df_state,
+            outputs=plot_output,
+        ).then(
+            insight_fn,
+            inputs=[lat_input, lon_input, date_input, eto_state],
+            outputs=output_html,
+            concurrency_limit=EVENT_CONCURRENCY["insight"],
+            concurrency_id="insight",
+        )
+
     search_btn.click(
         handle_search_location,
         inputs=[search_box, lat_input, lon_input, current_location_state],
@@ -601,14 +1006,43 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
         inputs=[search_box, lat_input, lon_input, current_location_state],
         outputs=[lat_input, lon_input, map_plot, current_location_state],
     )
-    scenario_a_btn.click(
-        lambda: set_preset_location("matagalpa"),
-        outputs=[lat_input, lon_input, map_plot, current_location_state],
+    # Presets are precomputed, so a scenario click shows its full dashboard at once.
+    then_dashboard(
+        scenario_a_btn.click(
+            lambda: set_preset_location("matagalpa"),
+            outputs=[lat_input, lon_input, map_plot, current_location_state],
+        ),
+        analyze_dashboard,
+        dashboard_insight,
     )
-    scenario_b_btn.click(
-        lambda: set_preset_location("crucero"),
-        outputs=[lat_input, lon_input, map_plot, current_location_state],
+    then_dashboard(
+        scenario_b_btn.click(
+            lambda: set_preset_location("crucero"),
+            outputs=[lat_input, lon_input, map_plot, current_location_state],
+        ),
+        analyze_dashboard,
+        dashboard_insight,
+    )
+    national_map_btn.click(
+        handle_national_map,
+        inputs=[date_input, lat_input, lon_input, current_location_state],
+        outputs=map_plot,
+        concurrency_limit=EVENT_CONCURRENCY["national_map"],
+        concurrency_id="national_map",
+    )
+    export_btn.click(
+        handle_export,
+        inputs=[lat_input, lon_input, date_input, current_location_state, export_format],
+        outputs=export_file,
+        concurrency_limit=EVENT_CONCURRENCY["export"],
+        concurrency_id="export",
     )
+    job_submit_btn.click(
+        handle_job_submit,
+        inputs=[job_kind, job_start, date_input, lat_input, lon_input],
+        outputs=[job_id, job_status],
+    )
+    job_refresh_btn.click(handle_job_refresh, inputs=job_id, outputs=[job_status, job_rows])
     lat_input.change(
         update_map,
         inputs=[lat_input, lon_input],
@@ -622,54 +1056,62 @@ with gr.Blocks(title="NWA Hydro-Compute") as demo:
         show_progress=False,
     )
 
-    btn.click(
-        show_loading,
-        outputs=loading_msg,
-        queue=False,
-    ).then(
-        analyze_hydro,
-        inputs=[lat_input, lon_input, date_input, current_location_state],
-        outputs=[dashboard_title, mean_state, precip_state, humidity_state, df_state, eto_state, output_html],
-    ).then(
-        render_kpis,
-        inputs=[mean_state, precip_state, humidity_state],
-        outputs=[mean_card, precip_card, humidity_card],
-    ).then(
-        render_chart,
-        inputs=df_state,
-        outputs=plot_output,
-    ).then(
+    then_dashboard(
+        btn.click(
+            show_loading,
+            outputs=loading_msg,
+            queue=False,
+        ),
+        analyze_live,
         generate_insight_only,
-        inputs=[lat_input, lon_input, date_input, eto_state],
-        outputs=output_html,
     ).then(
         hide_loading,
         outputs=loading_msg,
         queue=False,
     )
 
-    # Auto-load demo with defaults on page load
-    demo.load(
-        update_map,
-        inputs=[lat_input, lon_input],
-        outputs=map_plot,
-    ).then(
-        analyze_hydro,
-        inputs=[lat_input, lon_input, date_input, current_location_state],
-        outputs=[dashboard_title, mean_state, precip_state, humidity_state, df_state, eto_state, output_html],
-    ).then(
-        render_kpis,
-        inputs=[mean_state, precip_state, humidity_state],
-        outputs=[mean_card, precip_card, humidity_card],
-    ).then(
-        render_chart,
-        inputs=df_state,
-        outputs=plot_output,
-    ).then(
-        generate_insight_only,
-        inputs=[lat_input, lon_input, date_input, eto_state],
-        outputs=output_html,
+    demo.load(start_background_tasks, queue=False)
+    demo.unload(drop_session_results)
+
+    # Auto-load demo with defaults on page load, from the snapshot when available
+    then_dashboard(
+        demo.load(
+            update_map,
+            inputs=[lat_input, lon_input],
+            outputs=map_plot,
+        ),
+        analyze_dashboard,
+        dashboard_insight,
     )
 
+demo.queue(default_concurrency_limit=QUEUE_DEFAULT_CONCURRENCY, max_size=QUEUE_MAX_SIZE)
+
+
+def launch_workers(workers: int, base_port: int) -> None:
+    """
+    Run `workers` app processes on consecutive ports. Gradio keeps queue and session
+    state per process, so route clients with sticky sessions (e.g. nginx ip_hash).
+    """
+    if get_cache().name == "memory":
+        print("Warning: NWA_HYDRO_CACHE_URL is unset; workers will not share cached results.")
+    processes = []
+    for index in range(workers):
+        env = {**os.environ, "NWA_HYDRO_WORKERS": "1", "GRADIO_SERVER_PORT": str(base_port + index)}
+        if os.getenv("NWA_HYDRO_METRICS_PORT"):
+            env["NWA_HYDRO_METRICS_PORT"] = str(int(os.environ["NWA_HYDRO_METRICS_PORT"]) + index)
+        processes.append(subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env))
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
 if __name__ == "__main__":
-    demo.launch(share=False, inbrowser=True)
+    if WORKERS > 1:
+        launch_workers(WORKERS, int(os.getenv("GRADIO_SERVER_PORT", "7860")))
+    else:
+        if os.getenv("NWA_HYDRO_METRICS_PORT"):
+            start_metrics_server(int(os.environ["NWA_HYDRO_METRICS_PORT"]))
+        demo.launch(share=False, inbrowser=not os.getenv("GRADIO_SERVER_PORT"))
@@ -0,0 +1,144 @@
+"""
+Benchmark climate-series encodings: bytes per site-year and decode throughput.
+
+Compares the pydantic JSON stored in the result cache today, CSV, and the
+binary codec (nwa_hydro.codec) quantized to int16 or kept as float32, with and
+without zlib. Decode throughput counts records per second, both into
+ClimateData objects and, for the codec, straight into ClimateArrays.
+
+Usage:
+    python benchmarks/codec.py [--sites 200] [--years 1] [--repeats 5] [--json out.json]
+"""
+import argparse
+import csv
+import io
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from nwa_hydro.codec import decode_arrays, decode_series, encode_series
+from nwa_hydro.schemas import ClimateData
+
+SEED = 2024
+_SERIES = TypeAdapter(list[ClimateData])
+_CSV_FIELDS = list(ClimateData.model_fields)
+
+
+def synthetic_sites(sites: int, days: int) -> list[list[ClimateData]]:
+    """Nicaragua-like daily series at Open-Meteo's published precision."""
+    rng = np.random.default_rng(SEED)
+    start = date(2023, 1, 1)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    season = np.sin(np.arange(days) / 365.25 * 2 * np.pi)
+    series = []
+    for _ in range(sites):
+        lat, lon = rng.uniform(11.0, 15.0), rng.uniform(-87.5, -83.5)
+        elevation = float(rng.integers(0, 1500))
+        tmin = np.round(18 + 2 * season + rng.normal(0, 1, days), 1)
+        tmax = np.round(tmin + rng.uniform(6, 12, days), 1)
+        rain = np.round(np.maximum(rng.gamma(0.6, 8.0, days) - 2.0, 0.0), 1)
+        humidity = np.round(rng.uniform(55, 95, days))
+        wind = np.round(rng.uniform(0.5, 4.0, days), 2)
+        solar = np.round(rng.uniform(12, 26, days), 2)
+        series.append([
+            ClimateData(
+                date=dates[i], lat=round(lat, 4), lon=round(lon, 4), source="API (Range)",
+                tmin=tmin[i], tmax=tmax[i], tmean=round((tmin[i] + tmax[i]) / 2, 1),
+                precipitation=rain[i], humidity=humidity[i], wind_speed=wind[i],
+                solar_radiation=solar[i], elevation=elevation,
+            )
+            for i in range(days)
+        ])
+    return series
+
+
+def to_csv(records: list[ClimateData]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_CSV_FIELDS)
+    writer.writeheader()
+    writer.writerows(record.model_dump() for record in records)
+    return buffer.getvalue().encode()
+
+
+def from_csv(blob: bytes) -> list[ClimateData]:
+    return [
+        ClimateData(**{key: value or None for key, value in row.items()})
+        for row in csv.DictReader(io.StringIO(blob.decode()))
+    ]
+
+
+ENCODINGS: dict[str, tuple[Callable[[list[ClimateData]], bytes], Callable[[bytes], object]]] = {
+    "json": (_SERIES.dump_json, _SERIES.validate_json),
+    "csv": (to_csv, from_csv),
+    "codec_int16_zlib": (encode_series, decode_series),
+    "codec_int16": (lambda r: encode_series(r, compress=False), decode_series),
+    "codec_float32_zlib": (lambda r: encode_series(r, quantize=False), decode_series),
+    "codec_int16_zlib_arrays": (encode_series, decode_arrays),
+}
+
+
+def measure(
+    series: list[list[ClimateData]], encode: Callable, decode: Callable, repeats: int
+) -> dict[str, float]:
+    blobs = [encode(records) for records in series]
+    records = sum(len(r) for r in series)
+    timings = []
+    for _ in range(repeats):
+        began = time.perf_counter()
+        for blob in blobs:
+            decode(blob)
+        timings.append(time.perf_counter() - began)
+    best = min(timings)
+    return {
+        "bytes_total": sum(len(blob) for blob in blobs),
+        "decode_seconds": best,
+        "decode_records_per_s": records / best if best else float("inf"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    days = 365 * args.years
+    series = synthetic_sites(args.sites, days)
+    site_years = args.sites * args.years
+    results = {}
+    for name, (encode, decode) in ENCODINGS.items():
+        result = measure(series, encode, decode, args.repeats)
+        result["bytes_per_site_year"] = result["bytes_total"] / site_years
+        results[name] = result
+        print(
+            f"{name:<24} {result['bytes_per_site_year']:10.0f} B/site-year  "
+            f"{result['decode_records_per_s']:12.0f} records/s",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "codec",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "encodings": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.json:
+        args.json.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
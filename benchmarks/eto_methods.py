@@ -0,0 +1,139 @@
+"""
+Benchmark the registered ETo kernels: throughput (records/s) and accuracy.
+
+Accuracy is measured against FAO-56 worked examples (benchmarks/data/fao56_reference.csv).
+The humidity column is the mean RH equivalent to the example's actual vapour pressure.
+
+Usage:
+    python benchmarks/eto_methods.py [--records 100000] [--repeats 5] [--json out.json]
+"""
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools.science import (
+    ETO_METHODS,
+    ClimateArrays,
+    calculate_eto_series,
+    calculate_hargreaves_eto,
+    compute_eto_array,
+)
+
+REFERENCE_PATH = Path(__file__).parent / "data" / "fao56_reference.csv"
+SEED = 2024
+
+
+def load_reference() -> tuple[list[ClimateData], np.ndarray]:
+    records, expected = [], []
+    with REFERENCE_PATH.open(newline="") as handle:
+        for row in csv.DictReader(handle):
+            records.append(
+                ClimateData(
+                    date=row["date"],
+                    lat=float(row["lat"]),
+                    elevation=float(row["elevation"]),
+                    tmin=float(row["tmin"]),
+                    tmax=float(row["tmax"]),
+                    tmean=float(row["tmean"]),
+                    humidity=float(row["humidity"]),
+                    wind_speed=float(row["wind_speed"]),
+                    solar_radiation=float(row["solar_radiation"]),
+                    source=row["case"],
+                )
+            )
+            expected.append(float(row["eto_reference"]))
+    return records, np.array(expected)
+
+
+def synthetic_arrays(size: int) -> ClimateArrays:
+    """Deterministic Nicaragua-like climate batch (lat 11-15 N, lowland to highland)."""
+    rng = np.random.default_rng(SEED)
+    tmin = rng.uniform(14.0, 24.0, size)
+    tmax = tmin + rng.uniform(4.0, 14.0, size)
+    return ClimateArrays(
+        tmin=tmin,
+        tmax=tmax,
+        tmean=(tmin + tmax) / 2.0,
+        lat=rng.uniform(11.0, 15.0, size),
+        doy=rng.integers(1, 366, size).astype(np.float64),
+        humidity=rng.uniform(50.0, 95.0, size),
+        wind_speed=rng.uniform(0.5, 5.0, size),
+        solar_radiation=rng.uniform(12.0, 26.0, size),
+        elevation=rng.uniform(0.0, 1500.0, size),
+    )
+
+
+def measure_throughput(arrays: ClimateArrays, method: str, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        compute_eto_array(arrays, method)
+        best = min(best, time.perf_counter() - start)
+    return len(arrays) / best
+
+
+def measure_scalar_baseline(records: list[ClimateData], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for record in records:
+            calculate_hargreaves_eto(record)
+        best = min(best, time.perf_counter() - start)
+    return len(records) / best
+
+
+def run(records_count: int, repeats: int) -> dict:
+    reference, expected = load_reference()
+    arrays = synthetic_arrays(records_count)
+    results: dict[str, dict] = {}
+    for key, method in ETO_METHODS.items():
+        estimates = np.array([r.eto for r in calculate_eto_series(reference, key)])
+        errors = estimates - expected
+        results[key] = {
+            "label": method.label,
+            "records_per_second": measure_throughput(arrays, key, repeats),
+            "mae_mm_day": float(np.mean(np.abs(errors))),
+            "bias_mm_day": float(np.mean(errors)),
+            "reference_cases": len(expected),
+        }
+
+    scalar_sample = [
+        ClimateData(date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.0, source="bench")
+    ] * min(records_count, 10_000)
+    return {
+        "records": records_count,
+        "repeats": repeats,
+        "methods": results,
+        "scalar_hargreaves_records_per_second": measure_scalar_baseline(scalar_sample, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", type=Path, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    report = run(args.records, args.repeats)
+    print(f"{'method':<18}{'records/s':>16}{'MAE':>10}{'bias':>10}")
+    for key, row in report["methods"].items():
+        print(
+            f"{key:<18}{row['records_per_second']:>16,.0f}"
+            f"{row['mae_mm_day']:>10.3f}{row['bias_mm_day']:>10.3f}"
+        )
+    print(f"{'scalar loop':<18}{report['scalar_hargreaves_records_per_second']:>16,.0f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
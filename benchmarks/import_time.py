@@ -0,0 +1,77 @@
+"""
+Cold-start import cost of a module, measured with `python -X importtime`.
+
+Each sample runs in a fresh interpreter. Reports the median total and the
+heaviest top-level packages, so a dependency creeping back onto the startup
+path shows up in CI history.
+
+Usage:
+    python benchmarks/import_time.py [--module nwa_hydro.server] [--samples 5] [--json out.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Cumulative microseconds per imported module (first occurrence wins)."""
+    cumulative: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|", 2)
+        if not total.strip().isdigit():
+            continue  # header row
+        cumulative.setdefault(name.strip(), int(total))
+    return cumulative
+
+
+def sample(module: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def top_level_cost(modules: dict[str, int]) -> dict[str, int]:
+    """Cumulative cost per top-level package, counted where it was first imported."""
+    costs: dict[str, int] = {}
+    for name, micros in modules.items():
+        top = name.split(".")[0]
+        costs[top] = max(costs.get(top, 0), micros)
+    return costs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold-start import time.")
+    parser.add_argument("--module", default="nwa_hydro.server")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    sample(args.module)  # Warm the filesystem and bytecode caches.
+    runs = [sample(args.module) for _ in range(args.samples)]
+    totals_ms = [run[args.module] / 1000 for run in runs]
+    packages = top_level_cost(runs[totals_ms.index(statistics.median_low(totals_ms))])
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]
+    report = {
+        "benchmark": "import_time",
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "samples_ms": totals_ms,
+        "median_ms": statistics.median(totals_ms),
+        "top_packages_ms": {name: micros / 1000 for name, micros in heaviest},
+    }
+    text = json.dumps(report, indent=2)
+    if args.json:
+        args.json.write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Load test for the FastMCP server over its stdio and SSE transports.
+
+Spawns the real server (benchmarks/mcp_server_target.py) against a local mock
+Open-Meteo and a fake Gemini, then drives a mixed workload of climate, ETo and
+advice tool calls while ramping concurrency. Each stage is closed-loop: N workers
+call back-to-back for a fixed time. stdio multiplexes every worker over the one
+session a stdio server supports; SSE gives each worker its own client session,
+like separate MCP clients.
+
+Reports per-stage throughput, latency percentiles, queueing delay (latency over
+the single-worker baseline of the same tool) and error rates, plus the
+saturation point: the last stage that still raised throughput by --min-gain.
+
+Usage:
+    python benchmarks/mcp_load.py [--transport stdio --transport sse]
+        [--ramp 1,2,4,8,16,32] [--stage-seconds 10] [--mix climate=4,eto=4,advice=2]
+        [--latency-ms 50] [--gemini-latency-ms 300] [--json out.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport, SSETransport
+from mock_services import MockOpenMeteo
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+TARGET = BENCH_DIR / "mcp_server_target.py"
+SEED = 2024
+DATES = ["2023-01-01", "2023-01-02", "2023-01-03"]
+SERVER_START_TIMEOUT = 60.0
+
+
+@dataclass
+class StageResult:
+    transport: str
+    concurrency: int
+    seconds: float
+    calls: list[tuple[str, float, str | None]] = field(default_factory=list)
+
+    def summary(self, baseline_ms: dict[str, float]) -> dict[str, object]:
+        ok = [(tool, latency) for tool, latency, error in self.calls if error is None]
+        errors: dict[str, int] = {}
+        for _, _, error in self.calls:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+        latency_ms = np.array([latency for _, latency in ok]) * 1000
+        queueing = np.array([
+            max(latency * 1000 - baseline_ms.get(tool, latency * 1000), 0.0)
+            for tool, latency in ok
+        ])
+
+        def pct(values: np.ndarray, q: float) -> float | None:
+            return float(np.percentile(values, q)) if values.size else None
+
+        per_tool = {}
+        for tool in sorted({tool for tool, _ in ok}):
+            values = np.array([latency for name, latency in ok if name == tool]) * 1000
+            per_tool[tool] = {"calls": int(values.size), "p50_ms": pct(values, 50),
+                              "p99_ms": pct(values, 99)}
+        return {
+            "concurrency": self.concurrency,
+            "calls": len(self.calls),
+            "throughput_rps": len(ok) / self.seconds,
+            "error_rate": (len(self.calls) - len(ok)) / len(self.calls) if self.calls else 0.0,
+            "errors": errors,
+            "latency_ms": {"p50": pct(latency_ms, 50), "p95": pct(latency_ms, 95),
+                           "p99": pct(latency_ms, 99)},
+            "queueing_ms": {"p50": pct(queueing, 50), "p95": pct(queueing, 95)},
+            "tools": per_tool,
+        }
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("climate", "eto", "advice"):
+            raise ValueError(f"Unknown workload '{name}'; use climate, eto or advice")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _text(content: list) -> str:
+    text = content[0].text if content else ""
+    # Tools report failures as a JSON payload with an "error" key, not as MCP errors.
+    if text.startswith('{"error"'):
+        raise RuntimeError(json.loads(text)["error"])
+    return text
+
+
+class Workload:
+    """Mixed tool calls; ETo and advice reuse payloads captured during warm-up."""
+
+    def __init__(self, mix: dict[str, float]) -> None:
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.climate_json = ""
+        self.eto_json = ""
+
+    async def prepare(self, client: Client) -> None:
+        arguments = {"lat": 12.1, "lon": -86.2, "date": DATES[0]}
+        self.climate_json = _text(await client.call_tool("get_climate_data", arguments))
+        self.eto_json = _text(
+            await client.call_tool("calculate_eto", {"climate_data_json": self.climate_json})
+        )
+
+    async def call(self, client: Client, rng: random.Random) -> str:
+        name = rng.choices(self.names, self.weights)[0]
+        if name == "climate":
+            arguments = {"lat": round(rng.uniform(10.8, 15.0), 4),
+                         "lon": round(rng.uniform(-87.6, -83.2), 4), "date": rng.choice(DATES)}
+            _text(await client.call_tool("get_climate_data", arguments))
+        elif name == "eto":
+            _text(await client.call_tool("calculate_eto", {"climate_data_json": self.climate_json}))
+        else:
+            _text(await client.call_tool("get_agronomist_advice",
+                                         {"eto_result_json": self.eto_json}))
+        return name
+
+
+async def run_stage(
+    clients: list[Client], workload: Workload, transport: str, concurrency: int,
+    seconds: float, call_timeout: float,
+) -> StageResult:
+    stage = StageResult(transport, concurrency, seconds)
+    deadline = time.perf_counter() + seconds
+
+    async def worker(index: int) -> None:
+        rng = random.Random(SEED + index)
+        client = clients[index % len(clients)]
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            tool, error = "unknown", None
+            try:
+                tool = await asyncio.wait_for(workload.call(client, rng), timeout=call_timeout)
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except Exception as exc:  # noqa: BLE001
+                error = type(exc).__name__
+            stage.calls.append((tool, time.perf_counter() - start, error))
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return stage
+
+
+async def _wait_for_port(host: str, port: int, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"SSE server exited with code {process.returncode}")
+        with contextlib.suppress(OSError):
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"SSE server did not listen on {host}:{port}")
+
+
+@contextlib.asynccontextmanager
+async def spawn_clients(transport: str, count: int, env: dict[str, str], args: argparse.Namespace):
+    """Yield connected clients: one stdio session, or `count` SSE sessions to one server."""
+    target_args = ["--transport", transport, "--gemini-latency-ms", str(args.gemini_latency_ms)]
+    async with contextlib.AsyncExitStack() as stack:
+        if transport == "stdio":
+            client = Client(PythonStdioTransport(TARGET, target_args, env=env, cwd=str(REPO_ROOT)))
+            yield [await stack.enter_async_context(client)]
+            return
+        process = subprocess.Popen(
+            [sys.executable, str(TARGET), *target_args, "--port", str(args.port)],
+            env=env, cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+        )
+        stack.callback(process.wait, 10)
+        stack.callback(process.terminate)
+        await _wait_for_port("127.0.0.1", args.port, process)
+        url = f"http://127.0.0.1:{args.port}/sse"
+        yield [await stack.enter_async_context(Client(SSETransport(url))) for _ in range(count)]
+
+
+def find_saturation(stages: list[dict[str, object]], min_gain: float, max_error_rate: float):
+    """Last stage that still raised throughput by min_gain without exceeding the error budget."""
+    best = None
+    for stage in stages:
+        if stage["error_rate"] > max_error_rate:
+            break
+        if best is None or stage["throughput_rps"] >= best["throughput_rps"] * (1 + min_gain):
+            best = stage
+    return None if best is None else {
+        "concurrency": best["concurrency"],
+        "throughput_rps": best["throughput_rps"],
+        "p99_ms": best["latency_ms"]["p99"],
+    }
+
+
+async def run_transport(
+    transport: str, env: dict[str, str], args: argparse.Namespace
+) -> dict[str, object]:
+    ramp = [int(level) for level in args.ramp.split(",")]
+    workload = Workload(parse_mix(args.mix))
+    async with spawn_clients(transport, max(ramp), env, args) as clients:
+        await workload.prepare(clients[0])
+        baseline = await run_stage(
+            clients, workload, transport, 1, args.baseline_seconds, args.call_timeout
+        )
+        baseline_ms = {
+            tool: values["p50_ms"] for tool, values in baseline.summary({})["tools"].items()
+        }
+        stages = []
+        for level in ramp:
+            stage = await run_stage(
+                clients, workload, transport, level, args.stage_seconds, args.call_timeout
+            )
+            stages.append(stage.summary(baseline_ms))
+            print(
+                f"{transport:<6} c={level:<4} {stages[-1]['throughput_rps']:8.1f} req/s  "
+                f"p99 {stages[-1]['latency_ms']['p99'] or 0:8.1f} ms  "
+                f"queue p50 {stages[-1]['queueing_ms']['p50'] or 0:7.1f} ms  "
+                f"errors {stages[-1]['error_rate']:.1%}",
+                file=sys.stderr,
+            )
+            if stages[-1]["error_rate"] > args.max_error_rate:
+                break
+        server_metrics = json.loads(_text(await clients[0].call_tool("get_server_metrics", {})))
+    return {
+        "baseline_p50_ms": baseline_ms,
+        "stages": stages,
+        "saturation": find_saturation(stages, args.min_gain, args.max_error_rate),
+        "server_stage_latency": server_metrics.get("nwa_stage_duration_seconds", {}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the FastMCP server.")
+    parser.add_argument("--transport", action="append", choices=["stdio", "sse"],
+                        help="repeatable; default runs both")
+    parser.add_argument("--ramp", default="1,2,4,8,16,32", help="comma-separated concurrency")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    parser.add_argument("--mix", default="climate=4,eto=4,advice=2")
+    parser.add_argument("--call-timeout", type=float, default=30.0)
+    parser.add_argument("--min-gain", type=float, default=0.10,
+                        help="throughput gain a stage needs to count as unsaturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.05,
+                        help="stop ramping once a stage exceeds this error rate")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=8765, help="SSE server port")
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    results = {}
+    with MockOpenMeteo(args.latency_ms, args.jitter_ms, args.failure_rate, SEED) as mock:
+        env = {**os.environ, "NWA_HYDRO_ARCHIVE_URL": mock.url}
+        for transport in args.transport or ["stdio", "sse"]:
+            results[transport] = asyncio.run(run_transport(transport, env, args))
+
+    report = {
+        "benchmark": "mcp_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "transports": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.json:
+        args.json.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
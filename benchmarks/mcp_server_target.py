@@ -0,0 +1,36 @@
+"""
+Entry point that runs the real FastMCP server with Gemini swapped for the fake model.
+
+Spawned by mcp_load.py; Open-Meteo is redirected through NWA_HYDRO_ARCHIVE_URL,
+which the driver sets to its MockOpenMeteo before launching this process.
+
+    python benchmarks/mcp_server_target.py --transport sse --port 8765
+"""
+import argparse
+import logging
+import os
+
+from mock_services import fake_gemini
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FastMCP server under load test.")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    with fake_gemini(args.gemini_latency_ms):
+        from nwa_hydro.server import mcp
+
+        # stdout carries the stdio protocol; keep request logging off the hot path.
+        logging.getLogger().setLevel(os.getenv("NWA_LOAD_SERVER_LOG_LEVEL", "WARNING"))
+        if args.transport == "sse":
+            mcp.settings.host, mcp.settings.port = args.host, args.port
+            mcp.settings.log_level = "WARNING"
+        mcp.run(transport=args.transport)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Local stand-ins for the external services, so the pipeline can be benchmarked offline.
+
+MockOpenMeteo serves the archive API's daily JSON shape from a background HTTP
+server, with configurable latency, jitter and failure rate. Values are derived
+from (lat, lon, date), so repeated runs see identical data. fake_gemini()
+swaps google.generativeai.GenerativeModel for a model that answers with a
+schema-valid JSON insight after a configurable delay.
+"""
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+
+def _unit(*parts: object) -> float:
+    """Deterministic pseudo-random value in [0, 1) for the given key."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def _daily_series(lat: float, lon: float, start: str, end: str) -> dict[str, list]:
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    daily: dict[str, list] = {name: [] for name in (
+        "time", "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean",
+        "precipitation_sum", "relative_humidity_2m_mean", "wind_speed_10m_mean",
+        "shortwave_radiation_sum",
+    )}
+    for day in days:
+        noise = _unit(round(lat, 4), round(lon, 4), day.isoformat())
+        tmin = 18.0 + 6.0 * noise
+        tmax = tmin + 6.0 + 8.0 * _unit(noise)
+        daily["time"].append(day.isoformat())
+        daily["temperature_2m_min"].append(round(tmin, 1))
+        daily["temperature_2m_max"].append(round(tmax, 1))
+        daily["temperature_2m_mean"].append(round((tmin + tmax) / 2, 1))
+        daily["precipitation_sum"].append(round(max(0.0, 30.0 * noise - 12.0), 1))
+        daily["relative_humidity_2m_mean"].append(round(55.0 + 35.0 * noise))
+        daily["wind_speed_10m_mean"].append(round(1.0 + 4.0 * _unit(noise, "wind"), 2))
+        daily["shortwave_radiation_sum"].append(round(12.0 + 12.0 * _unit(noise, "rad"), 2))
+    return daily
+
+
+class MockOpenMeteo:
+    """Threaded HTTP server speaking the subset of the archive API the app uses."""
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 20.0,
+        failure_rate: float = 0.0,
+        seed: int = 2024,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/archive"
+
+    def _delay_and_outcome(self) -> tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self._random.uniform(-1.0, 1.0) * self.jitter_ms
+            failed = self._random.random() < self.failure_rate
+        return max(delay, 0.0) / 1000, failed
+
+    def respond(self, query: dict[str, list[str]]) -> object:
+        lats = [float(v) for v in query["latitude"][0].split(",")]
+        lons = [float(v) for v in query["longitude"][0].split(",")]
+        start, end = query["start_date"][0], query["end_date"][0]
+        payloads = [
+            {"latitude": lat, "longitude": lon, "elevation": 120.0,
+             "daily": _daily_series(lat, lon, start, end)}
+            for lat, lon in zip(lats, lons, strict=True)
+        ]
+        return payloads[0] if len(payloads) == 1 else payloads
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                delay, failed = mock._delay_and_outcome()
+                time.sleep(delay)
+                if failed:
+                    body, status = b'{"error": true, "reason": "injected failure"}', 500
+                else:
+                    query = parse_qs(urlparse(self.path).query)
+                    body, status = json.dumps(mock.respond(query)).encode(), 200
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+    def start(self) -> "MockOpenMeteo":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "MockOpenMeteo":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class FakeGeminiModel:
+    """
+    Answers generate_content_async like the SDK, with a canned JSON insight. With
+    stream=True the answer arrives as a few chunks spread over the latency.
+    """
+
+    latency_ms = 300.0
+    failure_rate = 0.0
+    calls = 0
+    stream_chunks = 4
+
+    def __init__(self, model_name: str, **kwargs) -> None:
+        self.model_name = model_name
+
+    @staticmethod
+    def _response(text: str, usage: SimpleNamespace | None) -> SimpleNamespace:
+        candidate = SimpleNamespace(
+            finish_reason=SimpleNamespace(name="STOP"),
+            content=SimpleNamespace(parts=[SimpleNamespace(text=text)]),
+        )
+        return SimpleNamespace(prompt_feedback=None, candidates=[candidate], usage_metadata=usage)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        cls = type(self)
+        cls.calls += 1
+        text = json.dumps({
+            "summary": "Evaporative demand is moderate relative to recent rainfall.",
+            "advice": "Irrigate every 2-3 days, early in the morning.",
+            "risk_level": "Medium",
+        })
+        # Roughly 4 characters per token, like Gemini's English tokenizer.
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4,
+                                candidates_token_count=len(text) // 4)
+        if not stream:
+            await asyncio.sleep(cls.latency_ms / 1000)
+            if random.random() < cls.failure_rate:
+                raise RuntimeError("injected Gemini failure")
+            return self._response(text, usage)
+
+        async def chunks():
+            size = -(-len(text) // cls.stream_chunks)
+            for start in range(0, len(text), size):
+                await asyncio.sleep(cls.latency_ms / 1000 / cls.stream_chunks)
+                if start == 0 and random.random() < cls.failure_rate:
+                    raise RuntimeError("injected Gemini failure")
+                last = start + size >= len(text)
+                yield self._response(text[start:start + size], usage if last else None)
+
+        return chunks()
+
+
+@contextlib.contextmanager
+def fake_gemini(latency_ms: float = 300.0, failure_rate: float = 0.0) -> Iterator[type]:
+    """Route Gemini calls to FakeGeminiModel for the duration of the block."""
+    import google.generativeai as genai
+
+    FakeGeminiModel.latency_ms = latency_ms
+    FakeGeminiModel.failure_rate = failure_rate
+    FakeGeminiModel.calls = 0
+    original_model, original_key = genai.GenerativeModel, os.environ.get("GOOGLE_API_KEY")
+    genai.GenerativeModel = FakeGeminiModel
+    os.environ["GOOGLE_API_KEY"] = "benchmark-fake-key"
+    try:
+        yield FakeGeminiModel
+    finally:
+        genai.GenerativeModel = original_model
+        if original_key is None:
+            os.environ.pop("GOOGLE_API_KEY", None)
+        else:
+            os.environ["GOOGLE_API_KEY"] = original_key
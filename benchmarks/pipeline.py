@@ -0,0 +1,214 @@
+"""
+End-to-end pipeline benchmark against local stand-ins for Open-Meteo and Gemini.
+
+Drives fetch_climate_data, fetch_climate_range, the MCP tools and the Gradio
+analyze_hydro chain under concurrency, reporting throughput, latency
+percentiles, errors and memory. Runs fully offline; see mock_services.py.
+
+Usage:
+    python benchmarks/pipeline.py [--requests 200] [--concurrency 16]
+        [--latency-ms 50] [--failure-rate 0.05] [--gemini-latency-ms 300]
+        [--scenario fetch_climate_data ...] [--trace-memory] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import numpy as np
+from mock_services import MockOpenMeteo, fake_gemini
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SEED = 2024
+# Dates present in data/samples/local_station.csv, so injected API failures can fall back.
+DATES = ["2023-01-01", "2023-01-02", "2023-01-03"]
+LAT_RANGE = (10.8, 15.0)
+LON_RANGE = (-87.6, -83.2)
+
+Scenario = Callable[[random.Random], Awaitable[object]]
+
+
+def _point(rng: random.Random) -> tuple[float, float, str]:
+    return (
+        round(rng.uniform(*LAT_RANGE), 4),
+        round(rng.uniform(*LON_RANGE), 4),
+        rng.choice(DATES),
+    )
+
+
+def build_scenarios() -> dict[str, Scenario]:
+    """Import the pipeline only now, after NWA_HYDRO_ARCHIVE_URL points at the mock."""
+    from nwa_hydro.schemas import EToResult
+    from nwa_hydro.server import calculate_eto, get_agronomist_advice, get_climate_data
+    from nwa_hydro.tools.fusion import fetch_climate_data, fetch_climate_range
+    from nwa_hydro.tools.science import calculate_hargreaves_eto
+
+    async def single_day(rng: random.Random) -> object:
+        return await fetch_climate_data(*_point(rng))
+
+    async def date_range(rng: random.Random) -> object:
+        lat, lon, _ = _point(rng)
+        return await fetch_climate_range(lat, lon, "2023-01-01", "2023-01-07")
+
+    async def mcp_tools(rng: random.Random) -> object:
+        climate_json = await get_climate_data(*_point(rng))
+        eto_json = calculate_eto(climate_json)
+        EToResult.model_validate_json(eto_json)
+        return await get_agronomist_advice(eto_json)
+
+    async def analyze_hydro(rng: random.Random) -> object:
+        sys.path.insert(0, str(REPO_ROOT))
+        import app
+
+        lat, lon, date_str = _point(rng)
+        result = await app.analyze_hydro(lat, lon, date_str)
+        return await app.final_insight_html(lat, lon, date_str, result[5])
+
+    async def eto_only(rng: random.Random) -> object:
+        climate = await fetch_climate_data(*_point(rng))
+        return calculate_hargreaves_eto(climate)
+
+    return {
+        "fetch_climate_data": single_day,
+        "fetch_climate_range": date_range,
+        "fetch_and_eto": eto_only,
+        "mcp_tools": mcp_tools,
+        "analyze_hydro": analyze_hydro,
+    }
+
+
+async def run_scenario(
+    scenario: Scenario, requests: int, concurrency: int, trace_memory: bool
+) -> dict[str, object]:
+    rng = random.Random(SEED)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await scenario(rng)
+            except Exception as exc:  # noqa: BLE001
+                errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+            latencies.append(time.perf_counter() - start)
+
+    # One warm-up call keeps import and first-connection cost out of the numbers.
+    await scenario(random.Random(SEED))
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_rps": requests / wall,
+        "latency_ms": {
+            "mean": float(ms.mean()),
+            "p50": float(np.percentile(ms, 50)),
+            "p95": float(np.percentile(ms, 95)),
+            "p99": float(np.percentile(ms, 99)),
+            "max": float(ms.max()),
+        },
+        "memory": {
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "traced_peak_mb": None if traced_peak is None else traced_peak / 2**20,
+        },
+    }
+
+
+async def run(args: argparse.Namespace, mock: MockOpenMeteo) -> dict[str, object]:
+    scenarios = build_scenarios()
+    from nwa_hydro.health import MONITOR
+    from nwa_hydro.metrics import snapshot
+
+    results = {}
+    for name in args.scenario or list(scenarios):
+        MONITOR.reset()
+        mock_before = mock.requests
+        results[name] = await run_scenario(
+            scenarios[name], args.requests, args.concurrency, args.trace_memory
+        )
+        results[name]["upstream_requests"] = mock.requests - mock_before
+        print(
+            f"{name:<20} {results[name]['throughput_rps']:8.1f} req/s  "
+            f"p50 {results[name]['latency_ms']['p50']:7.1f} ms  "
+            f"p99 {results[name]['latency_ms']['p99']:7.1f} ms  "
+            f"errors {sum(results[name]['errors'].values())}",
+            file=sys.stderr,
+        )
+    metrics = snapshot()
+    return {
+        "scenarios": results,
+        "pipeline_counters": {
+            key: metrics[key]
+            for key in ("nwa_fallback_activations_total", "nwa_timeouts_total")
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--scenario", action="append",
+        choices=["fetch_climate_data", "fetch_climate_range", "fetch_and_eto", "mcp_tools",
+                 "analyze_hydro"],
+        help="repeatable; default runs all",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="also report tracemalloc peaks (slows the run, so latencies are inflated)",
+    )
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    # The CSV fallback path is relative to the repository root.
+    os.chdir(REPO_ROOT)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with MockOpenMeteo(args.latency_ms, args.jitter_ms, args.failure_rate, SEED) as mock:
+        os.environ["NWA_HYDRO_ARCHIVE_URL"] = mock.url
+        with fake_gemini(args.gemini_latency_ms, args.gemini_failure_rate):
+            results = asyncio.run(run(args, mock))
+
+    report = {
+        "benchmark": "pipeline",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        **results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.json:
+        args.json.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
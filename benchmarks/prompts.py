@@ -0,0 +1,208 @@
+"""
+Compare insight prompt variants: prompt size, tokens, latency, cost and answer agreement.
+
+With --record, every case in data/insight_cases.json is sent to Gemini once per
+prompt variant (nwa_hydro.tools.intelligence.PROMPT_VARIANTS); this needs
+GOOGLE_API_KEY. The answers are saved with their token usage and latency to a
+JSONL fixture. Without --record the script only replays that fixture. It makes
+no network calls and gives the same numbers on every run, so a prompt edit can
+be judged against the recorded baseline. A variant without recordings reports
+its current prompt size and an estimate of its input tokens (characters / 4).
+Cost uses --input-price and --output-price, in USD per million tokens.
+
+Usage:
+    python benchmarks/prompts.py --record [--variants verbose compact] [--repeats 3]
+    python benchmarks/prompts.py [--fixture data/insight_recordings.jsonl] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from nwa_hydro.schemas import ClimateAnomaly, EToResult
+from nwa_hydro.tools.intelligence import (
+    PROMPT_VARIANTS,
+    RESPONSE_SCHEMA,
+    PromptVariant,
+    request_gemini,
+)
+
+DATA = Path(__file__).parent / "data"
+# Gemini 2.5 Flash-Lite list prices, USD per million tokens.
+INPUT_PRICE = 0.10
+OUTPUT_PRICE = 0.40
+CHARS_PER_TOKEN = 4
+RISK_LEVELS = set(RESPONSE_SCHEMA["properties"]["risk_level"]["enum"])
+
+Case = tuple[str, EToResult, ClimateAnomaly | None]
+
+
+def load_cases(path: Path) -> list[Case]:
+    return [
+        (
+            case["id"],
+            EToResult.model_validate(case["eto_result"]),
+            ClimateAnomaly.model_validate(case["anomaly"]) if case["anomaly"] else None,
+        )
+        for case in json.loads(path.read_text())
+    ]
+
+
+def prompt_chars(variant: PromptVariant, case: Case) -> int:
+    _, eto_result, anomaly = case
+    return len(variant.system_instruction) + len(variant.build(eto_result, anomaly))
+
+
+async def record(
+    cases: list[Case], variants: list[PromptVariant], repeats: int
+) -> list[dict]:
+    """One live Gemini request per variant, case and repeat."""
+    rows = []
+    for _ in range(repeats):
+        for variant in variants:
+            for case in cases:
+                row = {"variant": variant.name, "case": case[0],
+                       "prompt_chars": prompt_chars(variant, case)}
+                try:
+                    text, usage = await request_gemini(case[1], case[2], variant)
+                except Exception as exc:  # noqa: BLE001
+                    row["error"] = f"{type(exc).__name__}: {exc}"
+                else:
+                    row |= {"input_tokens": usage.input_tokens,
+                            "output_tokens": usage.output_tokens,
+                            "seconds": usage.seconds, "text": text}
+                rows.append(row)
+                print(f"{variant.name:<10} {case[0]:<28} "
+                      f"{row.get('error') or format(row['seconds'] * 1000, '.0f') + ' ms'}",
+                      file=sys.stderr)
+    return rows
+
+
+def _risk(text: str) -> str | None:
+    """risk_level of a schema-valid answer, else None."""
+    try:
+        answer = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(answer, dict) or not {"summary", "advice"} <= answer.keys():
+        return None
+    return answer.get("risk_level") if answer.get("risk_level") in RISK_LEVELS else None
+
+
+def compare(
+    cases: list[Case],
+    variants: list[PromptVariant],
+    recordings: list[dict],
+    input_price: float = INPUT_PRICE,
+    output_price: float = OUTPUT_PRICE,
+) -> dict[str, dict]:
+    """Per-variant summary of the recordings, with risk agreement against the first variant."""
+    results: dict[str, dict] = {}
+    baseline: dict[str, str | None] = {}
+    for variant in variants:
+        chars_by_case = {case[0]: prompt_chars(variant, case) for case in cases}
+        chars = list(chars_by_case.values())
+        rows = [row for row in recordings if row["variant"] == variant.name]
+        ok = [row for row in rows if "error" not in row]
+        result = {
+            "prompt_chars_mean": float(np.mean(chars)),
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+        }
+        if not ok:
+            result["estimated_input_tokens_mean"] = float(np.mean(chars)) / CHARS_PER_TOKEN
+            results[variant.name] = result
+            continue
+        seconds = np.array([row["seconds"] for row in ok])
+        input_tokens = float(np.mean([row["input_tokens"] for row in ok]))
+        output_tokens = float(np.mean([row["output_tokens"] for row in ok]))
+        risks = {row["case"]: _risk(row["text"]) for row in ok}
+        if not baseline:
+            baseline = risks
+        shared = [case for case in risks if case in baseline]
+        result |= {
+            # Recorded with a different prompt than the current builder produces.
+            "stale": any(row["prompt_chars"] != chars_by_case.get(row["case"]) for row in ok),
+            "input_tokens_mean": input_tokens,
+            "output_tokens_mean": output_tokens,
+            "latency_mean_ms": float(seconds.mean() * 1000),
+            "latency_p50_ms": float(np.percentile(seconds, 50) * 1000),
+            "latency_p95_ms": float(np.percentile(seconds, 95) * 1000),
+            "cost_per_1k_requests_usd": (input_tokens * input_price
+                                         + output_tokens * output_price) / 1000,
+            "valid_json_rate": sum(risk is not None for risk in risks.values()) / len(risks),
+            "risk_agreement": (sum(risks[case] == baseline[case] for case in shared)
+                               / len(shared) if shared else None),
+        }
+        results[variant.name] = result
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=Path, default=DATA / "insight_cases.json")
+    parser.add_argument("--fixture", type=Path, default=DATA / "insight_recordings.jsonl")
+    parser.add_argument("--variants", nargs="+", default=list(PROMPT_VARIANTS),
+                        choices=list(PROMPT_VARIANTS))
+    parser.add_argument("--record", action="store_true",
+                        help="call Gemini and overwrite the fixture")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--input-price", type=float, default=INPUT_PRICE)
+    parser.add_argument("--output-price", type=float, default=OUTPUT_PRICE)
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    cases = load_cases(args.cases)
+    variants = [PROMPT_VARIANTS[name] for name in args.variants]
+    if args.record:
+        if not os.getenv("GOOGLE_API_KEY"):
+            parser.error("--record needs GOOGLE_API_KEY")
+        rows = asyncio.run(record(cases, variants, args.repeats))
+        args.fixture.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    recordings = (
+        [json.loads(line) for line in args.fixture.read_text().splitlines() if line]
+        if args.fixture.exists() else []
+    )
+
+    results = compare(cases, variants, recordings, args.input_price, args.output_price)
+    for name, result in results.items():
+        if "input_tokens_mean" in result:
+            agreement = result["risk_agreement"]
+            print(
+                f"{name:<10} {result['input_tokens_mean']:7.0f} in "
+                f"{result['output_tokens_mean']:5.0f} out tokens  "
+                f"p50 {result['latency_p50_ms']:6.0f} ms  "
+                f"${result['cost_per_1k_requests_usd']:.4f}/1k  "
+                f"agreement {'n/a' if agreement is None else format(agreement, '.0%')}"
+                f"{'  (stale)' if result['stale'] else ''}",
+                file=sys.stderr,
+            )
+        else:
+            print(f"{name:<10} {result['prompt_chars_mean']:7.0f} prompt chars  "
+                  f"~{result['estimated_input_tokens_mean']:.0f} input tokens (not recorded)",
+                  file=sys.stderr)
+
+    report = {
+        "benchmark": "prompts",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: str(value) if isinstance(value, Path) else value
+                   for key, value in vars(args).items() if key != "json"},
+        "variants": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.json:
+        args.json.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
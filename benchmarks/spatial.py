@@ -0,0 +1,90 @@
+"""
+Benchmark spatial lookups: SpatialIndex queries against a brute-force haversine scan.
+
+Sites are scattered over Nicaragua like archived and station series, and every
+query asks for the nearest site within --max-km, as fusion does before calling
+Open-Meteo. The lookup is meant to stay well under a millisecond per query.
+
+Usage:
+    python benchmarks/spatial.py [--sites 5000] [--queries 2000] [--max-km 5] [--json out.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from nwa_hydro.tools.spatial import SpatialIndex, haversine_km
+
+SEED = 7
+LAT_RANGE = (10.7, 15.0)
+LON_RANGE = (-87.7, -83.1)
+
+
+def per_query_us(lookup, queries: np.ndarray, repeats: int) -> float:
+    """Best-of-repeats mean microseconds per query."""
+    best = float("inf")
+    for _ in range(repeats):
+        began = time.perf_counter()
+        for lat, lon in queries:
+            lookup(lat, lon)
+        best = min(best, time.perf_counter() - began)
+    return best / len(queries) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sites", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-km", type=float, default=5.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(SEED)
+    lats, lons = rng.uniform(*LAT_RANGE, args.sites), rng.uniform(*LON_RANGE, args.sites)
+    began = time.perf_counter()
+    index = SpatialIndex()
+    for i, (lat, lon) in enumerate(zip(lats, lons, strict=True)):
+        index.add(lat, lon, f"site {i}", "station" if i % 10 == 0 else "archive")
+    build_seconds = time.perf_counter() - began
+    queries = rng.uniform((LAT_RANGE[0], LON_RANGE[0]), (LAT_RANGE[1], LON_RANGE[1]),
+                          (args.queries, 2))
+
+    results = {
+        "index_nearest_us": per_query_us(
+            lambda lat, lon: index.nearest(lat, lon, args.max_km), queries, args.repeats
+        ),
+        "brute_force_us": per_query_us(
+            lambda lat, lon: haversine_km(lat, lon, lats, lons).min(), queries, args.repeats
+        ),
+        "build_seconds": build_seconds,
+    }
+    results["speedup"] = results["brute_force_us"] / results["index_nearest_us"]
+    print(
+        f"index {results['index_nearest_us']:8.1f} us/query  "
+        f"brute force {results['brute_force_us']:8.1f} us/query  "
+        f"({results['speedup']:.0f}x)",
+        file=sys.stderr,
+    )
+
+    report = {
+        "benchmark": "spatial",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.json:
+        args.json.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+pytest-benchmark suite for the low-level ETo kernels.
+
+    pytest benchmarks/test_kernel_throughput.py --benchmark-json=kernels.json
+
+The 100M-element case needs ~5 GB of RAM; enable it with NWA_BENCH_LARGE=1.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from nwa_hydro.tools import kernels
+
+SIZES = [1, 1_000, 1_000_000, 100_000_000]
+LARGE_ENABLED = os.getenv("NWA_BENCH_LARGE") == "1"
+# The pure-Python reference loop is benchmarked up to this size only.
+PYTHON_MAX_SIZE = 1_000
+
+
+def _inputs(size: int) -> tuple[np.ndarray, ...]:
+    rng = np.random.default_rng(size)
+    tmin = rng.uniform(14.0, 24.0, size)
+    tmax = tmin + rng.uniform(4.0, 14.0, size)
+    lat = rng.uniform(10.7, 15.0, size)
+    doy = rng.integers(1, 366, size).astype(np.float64)
+    return tmin, tmax, (tmin + tmax) / 2.0, lat, doy
+
+
+def _skip_reason(backend: str, size: int) -> str | None:
+    if backend not in kernels.available_backends():
+        return f"{backend} backend not installed"
+    if backend == "python" and size > PYTHON_MAX_SIZE:
+        return "pure-Python loop too slow at this size"
+    if size >= 100_000_000 and not LARGE_ENABLED:
+        return "set NWA_BENCH_LARGE=1 to run the 100M-element case"
+    return None
+
+
+@pytest.mark.parametrize("size", SIZES, ids=lambda s: f"n={s:,}")
+@pytest.mark.parametrize("backend", kernels.KERNEL_BACKENDS)
+def test_hargreaves_throughput(benchmark, backend, size):
+    reason = _skip_reason(backend, size)
+    if reason:
+        pytest.skip(reason)
+    tmin, tmax, tmean, lat, doy = _inputs(size)
+    # Warm up so JIT compilation is not part of the measurement.
+    kernels.hargreaves(tmin[:1], tmax[:1], tmean[:1], lat[:1], doy[:1], backend=backend)
+
+    benchmark.extra_info["elements"] = size
+    result = benchmark(kernels.hargreaves, tmin, tmax, tmean, lat, doy, backend=backend)
+
+    assert result.shape == (size,)
+
+
+@pytest.mark.parametrize("size", SIZES, ids=lambda s: f"n={s:,}")
+@pytest.mark.parametrize("backend", kernels.KERNEL_BACKENDS)
+def test_extraterrestrial_radiation_throughput(benchmark, backend, size):
+    reason = _skip_reason(backend, size)
+    if reason:
+        pytest.skip(reason)
+    _, _, _, lat, doy = _inputs(size)
+    lat_rad = np.radians(lat)
+    kernels.extraterrestrial_radiation(lat_rad[:1], doy[:1], backend=backend)
+
+    benchmark.extra_info["elements"] = size
+    result = benchmark(kernels.extraterrestrial_radiation, lat_rad, doy, backend=backend)
+
+    assert result.shape == (size,)
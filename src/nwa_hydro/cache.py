@@ -0,0 +1,367 @@
+"""
+Shared result cache for climate data and insights.
+
+When the dashboard is scaled out to several worker processes, each one would
+otherwise fetch the same Open-Meteo data and pay for the same Gemini call.
+Workers share one backend instead, chosen with NWA_HYDRO_CACHE_URL:
+
+- memory://                   per-process dict (default; one worker)
+- disk:///var/cache/nwa       one file per key, atomic writes
+- sqlite:///var/cache/nwa.db  WAL-mode table, safe for concurrent processes
+- redis://host:6379/0         any Redis-compatible server (needs the `redis` package)
+
+get_or_compute() adds single-flight: on a miss, one worker takes a per-key lock
+and computes while the others wait for its result. Disk and SQLite use flock on
+lock files, so a crashed worker never leaves a lock behind.
+"""
+import abc
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+from pydantic import TypeAdapter
+
+from .metrics import CACHE_HITS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_TTL_SECONDS = float(os.getenv("NWA_HYDRO_CACHE_TTL", str(6 * 3600)))
+# A computation holding the lock longer than this is presumed dead; waiters compute too.
+LOCK_TIMEOUT_SECONDS = 30.0
+LOCK_POLL_SECONDS = 0.05
+KEY_PREFIX = "nwa:v1:"
+
+
+@functools.cache
+def _adapter(value_type: Any) -> TypeAdapter:
+    return TypeAdapter(value_type)
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CacheBackend(abc.ABC):
+    """Byte-oriented key/value store with expiry and a non-blocking per-key lock."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes | None: ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None: ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abc.abstractmethod
+    def try_lock(self, key: str, ttl: float = LOCK_TIMEOUT_SECONDS) -> bool: ...
+
+    @abc.abstractmethod
+    def unlock(self, key: str) -> None: ...
+
+
+class MemoryCache(CacheBackend):
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._items: dict[str, tuple[float, bytes]] = {}
+        self._locks: set[str] = set()
+        self._mutex = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._mutex:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at and expires_at < time.time():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._mutex:
+            self._items[key] = (time.time() + ttl if ttl else 0.0, value)
+
+    def delete(self, key: str) -> None:
+        with self._mutex:
+            self._items.pop(key, None)
+
+    def try_lock(self, key: str, ttl: float = LOCK_TIMEOUT_SECONDS) -> bool:
+        with self._mutex:
+            if key in self._locks:
+                return False
+            self._locks.add(key)
+            return True
+
+    def unlock(self, key: str) -> None:
+        with self._mutex:
+            self._locks.discard(key)
+
+
+class _FileLocks:
+    """flock-based per-key locks; released by the OS if the holder dies."""
+
+    def __init__(self, lock_dir: Path) -> None:
+        self._lock_dir = lock_dir
+        self._lock_dir.mkdir(parents=True, exist_ok=True)
+        self._held: dict[str, int] = {}
+        self._mutex = threading.Lock()
+
+    def try_lock(self, key: str, ttl: float = LOCK_TIMEOUT_SECONDS) -> bool:
+        import fcntl
+
+        fd = os.open(self._lock_dir / f"{_digest(key)}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        with self._mutex:
+            self._held[key] = fd
+        return True
+
+    def unlock(self, key: str) -> None:
+        with self._mutex:
+            fd = self._held.pop(key, None)
+        if fd is not None:
+            os.close(fd)  # Closing the descriptor releases the flock.
+
+
+class DiskCache(_FileLocks, CacheBackend):
+    """One file per key: an 8-byte expiry timestamp followed by the value."""
+
+    name = "disk"
+    _HEADER = struct.Struct("<d")
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(self.directory / "locks")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{_digest(key)}.bin"
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        (expires_at,) = self._HEADER.unpack_from(data)
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return data[self._HEADER.size:]
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        header = self._HEADER.pack(time.time() + ttl if ttl else 0.0)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header + value)
+        os.replace(tmp, self._path(key))  # Atomic: readers never see a partial file.
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class SQLiteCache(_FileLocks, CacheBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+        super().__init__(self.path.with_suffix(self.path.suffix + ".locks"))
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are bound to their thread; asyncio.to_thread uses a pool.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl else 0.0),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+# Compare-and-delete in one step: after a timeout another worker may hold the lock.
+_UNLOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCache(CacheBackend):
+    """
+    Wraps any client with redis-py's get/set/delete/eval signatures, e.g. redis.Redis
+    against Redis, Valkey or KeyDB, or fakeredis for local runs.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self._tokens: dict[str, str] = {}
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        try:
+            import redis
+        except ImportError as exc:
+            raise ValueError(
+                "The redis cache backend needs the 'redis' package (pip install nwa-hydro[scale])"
+            ) from exc
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def try_lock(self, key: str, ttl: float = LOCK_TIMEOUT_SECONDS) -> bool:
+        token = uuid.uuid4().hex
+        if self.client.set(f"lock:{key}", token, nx=True, px=int(ttl * 1000)):
+            self._tokens[key] = token
+            return True
+        return False
+
+    def unlock(self, key: str) -> None:
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            self.client.eval(_UNLOCK_SCRIPT, 1, f"lock:{key}", token)
+
+
+def cache_from_url(url: str) -> CacheBackend:
+    """Build a backend from a memory://, disk://, sqlite:// or redis(s):// URL."""
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "memory"):
+        return MemoryCache()
+    if parsed.scheme in ("disk", "sqlite"):
+        path = (parsed.netloc + parsed.path) or None
+        if not path:
+            raise ValueError(f"Cache URL '{url}' needs a path, e.g. {parsed.scheme}:///tmp/nwa")
+        return DiskCache(path) if parsed.scheme == "disk" else SQLiteCache(path)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisCache.from_url(url)
+    raise ValueError(
+        f"Unsupported cache backend '{parsed.scheme}'. Use memory, disk, sqlite or redis."
+    )
+
+
+@functools.cache
+def get_cache() -> CacheBackend:
+    """Process-wide backend configured by NWA_HYDRO_CACHE_URL."""
+    backend = cache_from_url(os.getenv("NWA_HYDRO_CACHE_URL", "memory://"))
+    logger.info("Result cache backend: %s", backend.name)
+    return backend
+
+
+def cache_key(namespace: str, *parts: object) -> str:
+    """Stable key; floats are rounded so 12.10000001 and 12.1 share an entry."""
+    normalized = [f"{part:.4f}" if isinstance(part, float) else str(part) for part in parts]
+    return KEY_PREFIX + namespace + ":" + ":".join(normalized)
+
+
+async def get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[T]],
+    value_type: Any,
+    ttl: float | None = DEFAULT_TTL_SECONDS,
+    store: Callable[[T], bool] | None = None,
+    cache: CacheBackend | None = None,
+    encode: Callable[[T], bytes] | None = None,
+    decode: Callable[[bytes], T] | None = None,
+) -> T:
+    """
+    Return the cached value for key, or compute it once across all workers.
+    Values are (de)serialized as JSON via pydantic unless encode/decode are
+    given (e.g. the binary series codec); `store` can veto caching a result
+    (e.g. a degraded fallback).
+    """
+    cache = cache or get_cache()
+    adapter = _adapter(value_type)
+    encode = encode or adapter.dump_json
+    decode = decode or adapter.validate_json
+    namespace = key.removeprefix(KEY_PREFIX).split(":", 1)[0]
+
+    async def lookup() -> T | None:
+        raw = await asyncio.to_thread(cache.get, key)
+        if raw is None:
+            return None
+        CACHE_HITS.inc(cache=namespace)
+        return decode(raw)
+
+    cached = await lookup()
+    if cached is not None:
+        return cached
+
+    deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+    while not await asyncio.to_thread(cache.try_lock, key):
+        # Another worker is computing this key: wait for its result.
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+        cached = await lookup()
+        if cached is not None:
+            return cached
+        if time.monotonic() > deadline:
+            logger.warning("Cache lock for %s timed out; computing without it", key)
+            return await compute()
+    try:
+        cached = await lookup()
+        if cached is not None:
+            return cached
+        value = await compute()
+        if store is None or store(value):
+            await asyncio.to_thread(cache.set, key, encode(value), ttl)
+        return value
+    finally:
+        await asyncio.to_thread(cache.unlock, key)
@@ -0,0 +1,29 @@
+"""
+`nwa-hydro` command line.
+
+    nwa-hydro ingest --sites "Matagalpa:12.9256,-85.9189" --start 2020-01-01
+"""
+import argparse
+import logging
+
+from .tools import ingest
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="nwa-hydro", description="NWA Hydro-Compute tools.")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser(
+        "ingest", help="download Open-Meteo history into the local climate store"
+    )
+    ingest.add_arguments(ingest_parser)
+    ingest_parser.set_defaults(handler=ingest.run)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+"""
+Compact binary encoding for climate series (one site, many days).
+
+Cached ranges and exports are otherwise JSON: about 300 bytes per day of
+repeated field names and decimal text. This codec stores the same series
+column by column:
+
+- dates as the first day's ordinal plus int16 day deltas (almost all 1);
+- each variable as int16 quantized to its source precision (0.1 °C, 0.1 mm,
+  0.1 %, 0.01 m/s, 0.01 MJ m-2, 1 m), or as float32 when a column does not
+  fit that range or quantization is disabled. NaN/None is a sentinel;
+- the body zlib-compressed as one block.
+
+A year per site is a few KB. Uncompressed blobs decode zero-copy: the columns
+returned by decode_columns(..., dequantize=False) are NumPy views over the
+input bytes. Benchmark against JSON and CSV with benchmarks/codec.py.
+"""
+import struct
+import zlib
+from collections.abc import Sequence
+from datetime import date
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from .schemas import ClimateData
+from .tools.science import ClimateArrays
+
+MAGIC = b"NWCS"
+VERSION = 1
+FLAG_ZLIB = 1
+INT16_MISSING = np.iinfo(np.int16).min
+# (field, decimals kept when quantized); None-able fields decode to None when missing.
+COLUMNS = (
+    ("tmin", 1),
+    ("tmax", 1),
+    ("tmean", 1),
+    ("precipitation", 1),
+    ("humidity", 1),
+    ("wind_speed", 2),
+    ("solar_radiation", 2),
+    ("elevation", 0),
+)
+OPTIONAL_COLUMNS = {"wind_speed", "solar_radiation"}
+_FLOAT32, _INT16 = 0, 1
+# magic, version, flags, rows, lat, lon, first date ordinal, source length
+_HEADER = struct.Struct("<4sBBIddiB")
+# storage kind, decimals
+_COLUMN = struct.Struct("<BB")
+_SERIES = TypeAdapter(list[ClimateData])
+
+
+def _quantize(values: np.ndarray, decimals: int) -> np.ndarray | None:
+    """int16 steps of 10**-decimals, or None when a value falls outside the int16 range."""
+    missing = np.isnan(values)
+    scaled = np.round(np.where(missing, 0.0, values) * 10**decimals)
+    if scaled.size and np.abs(scaled).max() > np.iinfo(np.int16).max:
+        return None
+    return np.where(missing, INT16_MISSING, scaled).astype("<i2")
+
+
+def _padded(length: int) -> int:
+    return -length % 4
+
+
+def encode_series(
+    records: Sequence[ClimateData], quantize: bool = True, compress: bool = True
+) -> bytes:
+    """Encode one site's records in date order; lat, lon and source must be shared."""
+    first = records[0] if records else None
+    lat = first.lat if first else float("nan")
+    lon = first.lon if first and first.lon is not None else float("nan")
+    source = (first.source if first else "").encode()
+    if any(
+        (r.lat, r.lon, r.source) != (first.lat, first.lon, first.source) for r in records
+    ):
+        raise ValueError("A series must share lat, lon and source across records")
+    if len(source) > 255:
+        raise ValueError("Source label is too long to encode")
+
+    ordinals = np.array([date.fromisoformat(r.date).toordinal() for r in records], np.int64)
+    deltas = np.diff(ordinals, prepend=ordinals[:1])
+    if deltas.size and (deltas.min() < 0 or deltas.max() > np.iinfo(np.int16).max):
+        raise ValueError("Records must be in date order")
+
+    table, blocks = [], [deltas.astype("<i2").tobytes()]
+    for name, decimals in COLUMNS:
+        values = np.array(
+            [np.nan if getattr(r, name) is None else getattr(r, name) for r in records],
+            dtype=np.float64,
+        )
+        quantized = _quantize(values, decimals) if quantize else None
+        if quantized is None:
+            table.append(_COLUMN.pack(_FLOAT32, decimals))
+            blocks.append(values.astype("<f4").tobytes())
+        else:
+            table.append(_COLUMN.pack(_INT16, decimals))
+            blocks.append(quantized.tobytes())
+
+    # Every block starts 4-byte aligned so float32 views need no copy.
+    body = b"".join(block + b"\0" * _padded(len(block)) for block in blocks)
+    flags = 0
+    if compress:
+        body, flags = zlib.compress(body, 6), FLAG_ZLIB
+    header = _HEADER.pack(
+        MAGIC, VERSION, flags, len(records), lat, lon,
+        int(ordinals[0]) if ordinals.size else 0, len(source),
+    )
+    prefix = header + source + b"".join(table)
+    return prefix + b"\0" * _padded(len(prefix)) + body
+
+
+def decode_columns(
+    blob: bytes | memoryview, dequantize: bool = True
+) -> tuple[dict[str, object], dict[str, np.ndarray]]:
+    """
+    (metadata, columns) of an encoded series. Columns are float64 when dequantized;
+    otherwise they are int16/float32 views into the (decompressed) body, and
+    metadata["decimals"] gives each int16 column's scale (None for float32).
+    """
+    view = memoryview(blob)
+    magic, version, flags, rows, lat, lon, first, source_length = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an encoded climate series (or an unsupported version)")
+    offset = _HEADER.size
+    source = bytes(view[offset:offset + source_length]).decode()
+    offset += source_length
+    table = []
+    for _ in COLUMNS:
+        table.append(_COLUMN.unpack_from(view, offset))
+        offset += _COLUMN.size
+    offset += _padded(offset)
+    body = zlib.decompress(view[offset:]) if flags & FLAG_ZLIB else view[offset:]
+
+    position = 0
+
+    def take(dtype: str) -> np.ndarray:
+        nonlocal position
+        array = np.frombuffer(body, dtype=dtype, count=rows, offset=position)
+        position += array.nbytes + _padded(array.nbytes)
+        return array
+
+    dates = first + np.cumsum(take("<i2"), dtype=np.int64)
+    columns: dict[str, np.ndarray] = {}
+    scales = {}
+    for (name, _), (kind, decimals) in zip(COLUMNS, table, strict=True):
+        raw = take("<i2" if kind == _INT16 else "<f4")
+        scales[name] = decimals if kind == _INT16 else None
+        if not dequantize:
+            columns[name] = raw
+        elif kind == _INT16:
+            # Dividing (not multiplying by 0.1) gives the float nearest to the decimal.
+            columns[name] = np.where(raw == INT16_MISSING, np.nan, raw / 10**decimals)
+        else:
+            columns[name] = raw.astype(np.float64)
+    metadata = {
+        "lat": lat,
+        "lon": None if np.isnan(lon) else lon,
+        "source": source,
+        "ordinals": dates,
+        "decimals": scales,
+    }
+    return metadata, columns
+
+
+def decode_arrays(blob: bytes) -> ClimateArrays:
+    """Decode straight into the vectorized ETo inputs, without building records."""
+    metadata, columns = decode_columns(blob)
+    days = metadata["ordinals"] - date(1970, 1, 1).toordinal()
+    dates = days.astype("datetime64[D]")
+    doy = (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+    humidity = columns["humidity"].copy()
+    humidity[humidity <= 0.0] = np.nan
+    return ClimateArrays(
+        tmin=columns["tmin"],
+        tmax=columns["tmax"],
+        tmean=columns["tmean"],
+        lat=np.full(days.size, metadata["lat"]),
+        doy=doy.astype(np.float64),
+        humidity=humidity,
+        wind_speed=columns["wind_speed"],
+        solar_radiation=columns["solar_radiation"],
+        elevation=columns["elevation"],
+    )
+
+
+def decode_series(blob: bytes) -> list[ClimateData]:
+    metadata, columns = decode_columns(blob)
+    for name in OPTIONAL_COLUMNS:
+        columns[name] = np.where(np.isnan(columns[name]), None, columns[name])
+    names = [name for name, _ in COLUMNS]
+    shared = {"lat": metadata["lat"], "lon": metadata["lon"], "source": metadata["source"]}
+    # validate_python on plain dicts runs in pydantic-core, several times faster than
+    # constructing the models one by one in Python.
+    rows = zip(
+        metadata["ordinals"].tolist(), *(columns[name].tolist() for name in names), strict=True
+    )
+    return _SERIES.validate_python([
+        {
+            "date": date.fromordinal(ordinal).isoformat(),
+            **shared,
+            **dict(zip(names, values, strict=True)),
+        }
+        for ordinal, *values in rows
+    ])
@@ -0,0 +1,173 @@
+"""
+Process-pool executor for CPU-heavy batch work.
+
+Interactive single-site calls run in the event loop; large array jobs (batch ETo,
+water balance, aggregation) are shipped to worker processes so FastMCP and Gradio
+keep serving requests. Arrays travel through shared memory rather than pickling:
+the parent copies inputs into shared blocks once, workers attach to them and write
+the result into a preallocated shared output block.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING = 8
+# Batches smaller than this many elements are cheaper to compute in-loop.
+DEFAULT_INLINE_THRESHOLD = 50_000
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the pending-job queue stays full past the caller's timeout."""
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Picklable handle to an ndarray living in a shared memory block."""
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, SharedArraySpec]:
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, SharedArraySpec(block.name, array.shape, array.dtype.str)
+
+
+def _run_in_worker(
+    func: Callable[..., np.ndarray],
+    inputs: list[SharedArraySpec],
+    output: SharedArraySpec,
+    kwargs: dict,
+) -> None:
+    """Worker entrypoint: attach to shared blocks, compute, write into the output block."""
+    blocks = [shared_memory.SharedMemory(name=spec.name) for spec in [*inputs, output]]
+    try:
+        views = [
+            np.ndarray(spec.shape, dtype=spec.dtype, buffer=block.buf)
+            for spec, block in zip([*inputs, output], blocks, strict=True)
+        ]
+        *arrays, out = views
+        out[...] = func(*arrays, **kwargs)
+        del arrays, out, views  # Release buffer exports before closing the blocks.
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class BatchExecutor:
+    """
+    Offload array functions to a process pool with bounded queue depth.
+
+    At most `max_pending` jobs are queued or running; further callers wait for a
+    slot (backpressure) and fail with ExecutorSaturatedError after `wait_timeout`.
+    `func` must be a picklable top-level callable taking and returning ndarrays.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+    ) -> None:
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending = max_pending
+        self.inline_threshold = inline_threshold
+        self._slots = asyncio.Semaphore(max_pending)
+        self._pending = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn" is safe alongside the event loop's threads on every platform.
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    async def run(
+        self,
+        func: Callable[..., np.ndarray],
+        *arrays: np.ndarray,
+        out_dtype: np.dtype | str = np.float64,
+        wait_timeout: float | None = None,
+        **kwargs,
+    ) -> np.ndarray:
+        """Compute func(*arrays, **kwargs); the result has the arrays' broadcast shape."""
+        arrays = tuple(np.asarray(a) for a in arrays)
+        out_shape = np.broadcast_shapes(*(a.shape for a in arrays))
+        if int(np.prod(out_shape)) < self.inline_threshold:
+            return np.asarray(func(*arrays, **kwargs), dtype=out_dtype)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=wait_timeout)
+        except asyncio.TimeoutError as exc:
+            raise ExecutorSaturatedError(
+                f"Batch executor saturated ({self.max_pending} jobs pending)"
+            ) from exc
+
+        self._pending += 1
+        blocks: list[shared_memory.SharedMemory] = []
+        try:
+            specs = []
+            for array in arrays:
+                block, spec = _share(array)
+                blocks.append(block)
+                specs.append(spec)
+            out_block = shared_memory.SharedMemory(
+                create=True, size=max(int(np.prod(out_shape)) * np.dtype(out_dtype).itemsize, 1)
+            )
+            blocks.append(out_block)
+            out_spec = SharedArraySpec(out_block.name, out_shape, np.dtype(out_dtype).str)
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._get_pool(), _run_in_worker, func, specs, out_spec, kwargs
+            )
+            return np.ndarray(out_shape, dtype=out_dtype, buffer=out_block.buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+            self._pending -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_EXECUTOR: BatchExecutor | None = None
+
+
+def get_batch_executor() -> BatchExecutor:
+    """Process-wide executor configured from NWA_HYDRO_BATCH_WORKERS / _MAX_PENDING."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        workers = os.getenv("NWA_HYDRO_BATCH_WORKERS")
+        _EXECUTOR = BatchExecutor(
+            max_workers=int(workers) if workers else None,
+            max_pending=int(os.getenv("NWA_HYDRO_BATCH_MAX_PENDING", DEFAULT_MAX_PENDING)),
+        )
+    return _EXECUTOR
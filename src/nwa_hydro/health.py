@@ -0,0 +1,164 @@
+"""
+Dependency health: background probes with a cached status.
+
+Probes check Open-Meteo reachability, the local fallback archive and Gemini
+configuration on a schedule. Readers (the health tool, the fusion layer) only
+consult the cache, so they answer instantly. Fusion also reports what it sees
+on real requests, so an outage is noticed before the next scheduled probe and
+later requests skip the known-down upstream instead of waiting for a timeout.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL_SECONDS = float(os.getenv("NWA_HYDRO_HEALTH_INTERVAL", "60"))
+PROBE_TIMEOUT_SECONDS = 3.0
+# A failure is trusted for this long; afterwards requests try the upstream again.
+DOWN_TTL_SECONDS = 30.0
+
+# Probe name -> degraded mode reported while it fails.
+DEGRADED_MODES = {
+    "open_meteo": "offline_archive_only",
+    "local_archive": "no_offline_fallback",
+    "gemini": "rule_based_insights",
+}
+
+Probe = Callable[[], Awaitable[str]]
+
+
+@dataclass
+class ProbeResult:
+    name: str
+    ok: bool
+    detail: str
+    latency_ms: float
+    checked_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return max(time.time() - self.checked_at, 0.0)
+
+
+async def probe_open_meteo() -> str:
+    from .tools.fusion import ARCHIVE_URL
+
+    params = {
+        "latitude": 12.0,
+        "longitude": -85.0,
+        "start_date": "2023-01-01",
+        "end_date": "2023-01-01",
+        "daily": "temperature_2m_max",
+    }
+    async with httpx.AsyncClient() as client:
+        response = await client.get(ARCHIVE_URL, params=params, timeout=PROBE_TIMEOUT_SECONDS)
+        response.raise_for_status()
+    return f"HTTP {response.status_code}"
+
+
+async def probe_local_archive() -> str:
+    # Also (re)builds fusion's fallback index, so the first outage finds it preloaded.
+    from .tools.fusion import LOCAL_DATA_PATH, fallback_index
+
+    rows = len(await asyncio.to_thread(fallback_index))
+    return f"{LOCAL_DATA_PATH} ({rows} days)"
+
+
+async def probe_gemini() -> str:
+    # Configuration only: a live call would spend quota on every probe.
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise RuntimeError("GOOGLE_API_KEY not set")
+    return "API key configured"
+
+
+DEFAULT_PROBES: dict[str, Probe] = {
+    "open_meteo": probe_open_meteo,
+    "local_archive": probe_local_archive,
+    "gemini": probe_gemini,
+}
+
+
+class HealthMonitor:
+    """Runs probes periodically and serves their cached results."""
+
+    def __init__(
+        self,
+        probes: dict[str, Probe] | None = None,
+        interval: float = PROBE_INTERVAL_SECONDS,
+        down_ttl: float = DOWN_TTL_SECONDS,
+    ) -> None:
+        self.probes = DEFAULT_PROBES if probes is None else probes
+        self.interval = interval
+        self.down_ttl = down_ttl
+        self._results: dict[str, ProbeResult] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(self, name: str, ok: bool, detail: str = "", latency_ms: float = 0.0) -> None:
+        """Store an outcome, from a scheduled probe or observed on a real request."""
+        previous = self._results.get(name)
+        if previous is not None and previous.ok != ok:
+            logger.warning("Dependency %s is now %s (%s)", name, "up" if ok else "down", detail)
+        self._results[name] = ProbeResult(name, ok, detail, latency_ms, time.time())
+
+    def reset(self) -> None:
+        self._results.clear()
+
+    def is_down(self, name: str) -> bool:
+        """True only for a recent failure; unknown or stale results count as up."""
+        result = self._results.get(name)
+        return result is not None and not result.ok and result.age_seconds < self.down_ttl
+
+    async def _run_probe(self, name: str, probe: Probe) -> None:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe(), timeout=PROBE_TIMEOUT_SECONDS + 1.0)
+            ok = True
+        except Exception as exc:  # noqa: BLE001
+            detail = f"{type(exc).__name__}: {exc}"
+            ok = False
+        self.record(name, ok, detail, (time.perf_counter() - start) * 1000)
+
+    async def run_probes(self) -> None:
+        await asyncio.gather(*(self._run_probe(n, p) for n, p in self.probes.items()))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_probes()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background schedule on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict[str, object]:
+        """Cached readiness: 'starting' before the first probe, else 'ok' or 'degraded'."""
+        checks = {name: asdict(result) for name, result in self._results.items()}
+        if not checks:
+            return {"status": "starting", "tools_ready": False, "degraded_modes": [], "checks": {}}
+        failing = [name for name, result in self._results.items() if not result.ok]
+        data_ready = not (self.is_down("open_meteo") and self.is_down("local_archive"))
+        return {
+            "status": "degraded" if failing else "ok",
+            "tools_ready": data_ready,
+            "degraded_modes": [DEGRADED_MODES.get(name, name) for name in failing],
+            "checks": checks,
+        }
+
+
+MONITOR = HealthMonitor()
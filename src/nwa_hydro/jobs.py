@@ -0,0 +1,442 @@
+"""
+Background jobs for analyses that outlive a tool call or a Gradio request.
+
+A multi-year site history or a region over many days can take minutes, well past
+MCP client and Gradio timeouts. Callers submit a job instead and get its ID
+back immediately. A few worker tasks run the jobs, interactive ones ahead of
+batch ones, and callers poll the status and then page through the result rows.
+
+Each job is a JSON file under NWA_HYDRO_JOBS, and finished results are a JSONL
+file next to it, so a restart keeps finished work. The files are the only shared
+state: several processes (Gradio workers, the MCP server) may use one directory.
+A worker claims a job with an flock on its `.lock` file, held while the job runs,
+so each job runs once. A job left `running` whose lock is free was interrupted,
+and is queued again by whichever process scans the directory next. Finished jobs
+are deleted after NWA_HYDRO_JOB_RETENTION_SECONDS.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from .executor import get_batch_executor
+from .tools.fusion import fetch_climate_range
+from .tools.grid import GridSpec, build_eto_raster
+from .tools.science import ClimateArrays, eto_from_columns, resolve_eto_method
+
+logger = logging.getLogger(__name__)
+
+JOBS_PATH = Path(os.getenv("NWA_HYDRO_JOBS", "data/jobs"))
+JOB_WORKERS = int(os.getenv("NWA_HYDRO_JOB_WORKERS", "2"))
+MAX_QUEUED_JOBS = 100
+# How often idle workers look for jobs submitted or orphaned by other processes.
+JOB_POLL_SECONDS = float(os.getenv("NWA_HYDRO_JOB_POLL_SECONDS", "5"))
+# Finished (done or failed) jobs and their results are deleted after this.
+JOB_RETENTION_SECONDS = int(os.getenv("NWA_HYDRO_JOB_RETENTION_SECONDS", str(7 * 86400)))
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+MAX_PAGE_ROWS = 1000
+PRIORITIES = {"interactive": 0, "batch": 10}
+# One archive request per year of a site history.
+SITE_CHUNK_DAYS = 366
+# Size limits checked on submit: one site-history request per year, and one
+# Open-Meteo call per 100 grid cells for every day of a region job. The default
+# cell-day budget covers about a year of the national 0.25° grid.
+MAX_SITE_HISTORY_DAYS = int(os.getenv("NWA_HYDRO_MAX_SITE_HISTORY_DAYS", str(40 * 366)))
+MAX_REGION_CELL_DAYS = int(os.getenv("NWA_HYDRO_MAX_REGION_CELL_DAYS", "150000"))
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when MAX_QUEUED_JOBS jobs are already waiting."""
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    params: dict[str, Any]
+    priority: str
+    status: str = "queued"  # queued, running, done or failed
+    submitted_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    progress: float = 0.0
+    rows: int = 0
+    error: str | None = None
+
+
+class JobPage(BaseModel):
+    job_id: str
+    status: str
+    offset: int
+    total: int
+    rows: list[dict[str, Any]]
+    next_offset: int | None = None
+
+
+Progress = Callable[[float], None]
+JobHandler = Callable[[dict[str, Any], Progress], Awaitable[list[dict[str, Any]]]]
+JobCheck = Callable[[dict[str, Any]], None]
+
+
+def _dates(params: dict[str, Any]) -> tuple[date, date]:
+    start = date.fromisoformat(params["start_date"])
+    end = date.fromisoformat(params["end_date"])
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    return start, end
+
+
+def _site(params: dict[str, Any]) -> tuple[float, float]:
+    return float(params["lat"]), float(params["lon"])
+
+
+async def site_history(params: dict[str, Any], progress: Progress) -> list[dict[str, Any]]:
+    """Daily climate and ETo for one site over [start_date, end_date], a year per request."""
+    lat, lon = _site(params)
+    start, end = _dates(params)
+    method = params.get("method", "hargreaves")
+    total = (end - start).days + 1
+    rows: list[dict[str, Any]] = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=SITE_CHUNK_DAYS - 1), end)
+        records = await fetch_climate_range(
+            lat, lon, chunk_start.isoformat(), chunk_end.isoformat()
+        )
+        if not records:
+            raise ValueError(f"No climate data for {chunk_start}..{chunk_end}")
+        arrays = ClimateArrays.from_records(records)
+        selected = resolve_eto_method(arrays, method)
+        values = await get_batch_executor().run(
+            eto_from_columns, *arrays.columns(), method=selected.key
+        )
+        rows.extend(
+            {
+                "date": record.date,
+                "eto": float(value),
+                "method": selected.label,
+                "tmin": record.tmin,
+                "tmax": record.tmax,
+                "precipitation": record.precipitation,
+                "source": record.source,
+            }
+            for record, value in zip(records, values, strict=True)
+        )
+        progress(((chunk_end - start).days + 1) / total)
+        chunk_start = chunk_end + timedelta(days=1)
+    return rows
+
+
+def _region_spec(params: dict[str, Any]) -> GridSpec:
+    return GridSpec(
+        float(params["min_lat"]),
+        float(params["min_lon"]),
+        float(params["max_lat"]),
+        float(params["max_lon"]),
+        float(params.get("resolution", 0.25)),
+    )
+
+
+async def region_eto(params: dict[str, Any], progress: Progress) -> list[dict[str, Any]]:
+    """ETo raster summary (min/mean/max) for a bbox on every day of [start_date, end_date]."""
+    spec = _region_spec(params)
+    start, end = _dates(params)
+    method = params.get("method", "hargreaves")
+    total = (end - start).days + 1
+    rows = []
+    for offset in range(total):
+        day = (start + timedelta(days=offset)).isoformat()
+        rows.append((await build_eto_raster(spec, day, method)).summary())
+        progress((offset + 1) / total)
+    return rows
+
+
+JOB_KINDS: dict[str, JobHandler] = {
+    "site_history": site_history,
+    "region_eto": region_eto,
+}
+
+
+def check_site_history(params: dict[str, Any]) -> None:
+    """Reject malformed or oversized site-history jobs before they are queued."""
+    _site(params)
+    start, end = _dates(params)
+    days = (end - start).days + 1
+    if days > MAX_SITE_HISTORY_DAYS:
+        raise ValueError(
+            f"Site history spans {days:,} days; the limit is {MAX_SITE_HISTORY_DAYS:,}"
+        )
+
+
+def check_region_eto(params: dict[str, Any]) -> None:
+    """Reject malformed or oversized region jobs (grid cells × days) before they are queued."""
+    rows, cols = _region_spec(params).shape
+    start, end = _dates(params)
+    cell_days = rows * cols * ((end - start).days + 1)
+    if cell_days > MAX_REGION_CELL_DAYS:
+        raise ValueError(
+            f"Region job covers {cell_days:,} cell-days; the limit is {MAX_REGION_CELL_DAYS:,}. "
+            "Use a shorter period, a smaller box or a coarser resolution"
+        )
+
+
+JOB_CHECKS: dict[str, JobCheck] = {
+    "site_history": check_site_history,
+    "region_eto": check_region_eto,
+}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        handle.write(text)
+    os.replace(tmp, path)
+
+
+class JobQueue:
+    """Priority queue of persisted jobs run by `workers` tasks on the running loop."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        workers: int = JOB_WORKERS,
+        handlers: dict[str, JobHandler] | None = None,
+        max_queued: int = MAX_QUEUED_JOBS,
+        checks: dict[str, JobCheck] | None = None,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.handlers = handlers if handlers is not None else JOB_KINDS
+        self.max_queued = max_queued
+        self.checks = checks if checks is not None else JOB_CHECKS
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self._order = itertools.count()
+        self._pending: set[str] = set()  # Queued here and not yet picked up by a worker.
+        self._queue: asyncio.PriorityQueue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _results_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.results.jsonl"
+
+    def _lock_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.lock"
+
+    def _save(self, job: Job) -> None:
+        _write_atomic(self._job_path(job.id), job.model_dump_json())
+
+    def _load(self, job_id: str) -> Job | None:
+        if not _JOB_ID.fullmatch(job_id):
+            return None  # Also keeps client-supplied IDs inside the directory.
+        try:
+            return Job.model_validate_json(self._job_path(job_id).read_text())
+        except FileNotFoundError:
+            return None
+
+    def _load_all(self) -> list[Job]:
+        jobs = []
+        for path in self.directory.glob("*.json"):
+            job = self._load(path.stem)
+            if job is not None:
+                jobs.append(job)
+        return jobs
+
+    def _try_lock(self, job_id: str) -> int | None:
+        """An fd holding the job's flock, or None while another worker holds it."""
+        import fcntl
+
+        fd = os.open(self._lock_path(job_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _is_claimable(self, job: Job) -> bool:
+        """Queued, or left running by a worker that no longer holds its lock."""
+        if job.status == "queued":
+            return True
+        if job.status != "running":
+            return False
+        fd = self._try_lock(job.id)
+        if fd is None:
+            return False
+        os.close(fd)
+        return True
+
+    def _claim(self, job_id: str) -> tuple[int, Job] | None:
+        """Lock a job and mark it running; None if it is taken or already finished."""
+        fd = self._try_lock(job_id)
+        if fd is None:
+            return None
+        job = self._load(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            os.close(fd)
+            return None
+        job.status, job.started_at, job.progress = "running", time.time(), 0.0
+        self._save(job)
+        return fd, job
+
+    def _enqueue(self, job: Job) -> None:
+        if self._queue is not None and job.id not in self._pending:
+            self._pending.add(job.id)
+            self._queue.put_nowait((PRIORITIES[job.priority], next(self._order), job.id))
+
+    def _claimable_jobs(self) -> list[Job]:
+        jobs = [job for job in self._load_all()
+                if job.id not in self._pending and self._is_claimable(job)]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def prune(self, max_age: float | None = None) -> int:
+        """Delete jobs that finished more than max_age seconds ago; returns the count."""
+        cutoff = time.time() - (self.retention_seconds if max_age is None else max_age)
+        removed = 0
+        for job in self._load_all():
+            if job.status in ("done", "failed") and (job.finished_at or 0.0) < cutoff:
+                for path in (self._results_path(job.id), self._lock_path(job.id),
+                             self._job_path(job.id)):
+                    path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info("Pruned %d finished job(s)", removed)
+        return removed
+
+    def submit(self, kind: str, params: dict[str, Any], priority: str = "batch") -> Job:
+        """Validate and queue a job; raises ValueError for bad or oversized params."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'; expected one of {sorted(self.handlers)}")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'; expected one of {sorted(PRIORITIES)}")
+        check = self.checks.get(kind)
+        if check is not None:
+            try:
+                check(params)
+            except (KeyError, TypeError) as exc:
+                raise ValueError(f"Invalid params for '{kind}': {exc!r}") from exc
+        self.prune()
+        queued = sum(job.status == "queued" for job in self._load_all())
+        if queued >= self.max_queued:
+            raise JobQueueFullError(f"{queued} jobs are already queued; try again later")
+        job = Job(
+            id=uuid.uuid4().hex, kind=kind, params=params, priority=priority,
+            submitted_at=time.time(),
+        )
+        self._save(job)
+        self._enqueue(job)
+        logger.info("Queued %s job %s (%s)", kind, job.id, priority)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """The job as last saved by whichever process runs it."""
+        return self._load(job_id)
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> JobPage:
+        """One page of a job's rows; empty until the job is done."""
+        job = self._load(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job '{job_id}'")
+        offset, limit = max(offset, 0), min(max(limit, 1), MAX_PAGE_ROWS)
+        rows = []
+        if job.status == "done":
+            with self._results_path(job_id).open() as handle:
+                lines = itertools.islice(handle, offset, offset + limit)
+                rows = [json.loads(line) for line in lines]
+        end = offset + len(rows)
+        return JobPage(
+            job_id=job_id, status=job.status, offset=offset, total=job.rows, rows=rows,
+            next_offset=end if end < job.rows else None,
+        )
+
+    def start(self) -> None:
+        """Start the workers on the running event loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._pending = set()
+        self.prune()
+        for job in self._claimable_jobs():
+            self._enqueue(job)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._poll()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _poll(self) -> None:
+        """Pick up jobs submitted by other processes or orphaned by a dead one."""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            for job in await asyncio.to_thread(self._claimable_jobs):
+                self._enqueue(job)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            claim = await asyncio.to_thread(self._claim, job_id)
+            if claim is None:
+                continue  # Finished, or running in another worker or process.
+            fd, job = claim
+            try:
+                await self._run(job)
+            finally:
+                os.close(fd)  # Closing the descriptor releases the flock.
+
+    async def _run(self, job: Job) -> None:
+        def progress(fraction: float) -> None:
+            job.progress = round(min(max(fraction, 0.0), 1.0), 3)
+            self._save(job)  # Visible to get() in every process.
+
+        try:
+            rows = await self.handlers[job.kind](job.params, progress)
+            text = "".join(json.dumps(row) + "\n" for row in rows)
+            await asyncio.to_thread(_write_atomic, self._results_path(job.id), text)
+        except asyncio.CancelledError:
+            # Shutting down: the lock is released and the job runs again elsewhere or later.
+            raise
+        except Exception as exc:  # noqa: BLE001
+            job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+            logger.warning("Job %s (%s) failed: %s", job.id, job.kind, exc)
+        else:
+            job.status, job.rows, job.progress = "done", len(rows), 1.0
+            logger.info("Job %s (%s) finished with %d rows", job.id, job.kind, len(rows))
+        job.finished_at = time.time()
+        self._save(job)
+
+
+_QUEUE: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue persisted under NWA_HYDRO_JOBS."""
+    global _QUEUE
+    if _QUEUE is None or _QUEUE.directory != JOBS_PATH:
+        _QUEUE = JobQueue(JOBS_PATH)
+    return _QUEUE
@@ -0,0 +1,86 @@
+"""
+Request-scoped results shared along one dashboard event chain.
+
+A dashboard click runs analyze -> KPIs -> chart -> insight as separate Gradio
+events. Between them, values travel through gr.State as JSON strings, and the
+insight step has to re-parse them, or re-fetch when parsing fails. Instead,
+the analyze step records its native objects for the user's session, keyed by
+(lat, lon, date), and later handlers in the same chain read them back. Each
+session keeps only its latest chain: a new analysis replaces it, and entries
+expire after a few minutes or when the browser tab closes.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .metrics import CACHE_HITS
+from .schemas import ClimateAnomaly, ClimateData, EToResult
+
+MEMO_TTL_SECONDS = float(os.getenv("NWA_HYDRO_MEMO_TTL", "600"))
+MAX_SESSIONS = 10_000
+
+
+@dataclass
+class ChainResult:
+    """What the analyze step computed, as native objects."""
+    climate: ClimateData | None = None
+    history: list[ClimateData] = field(default_factory=list)
+    eto: EToResult | None = None
+    anomaly: ClimateAnomaly | None = None
+
+
+def _key(lat: float, lon: float, date: str) -> tuple[float, float, str]:
+    return round(float(lat), 4), round(float(lon), 4), date
+
+
+class RequestMemo:
+    """Latest ChainResult per session, bounded by MAX_SESSIONS (least recently used first out)."""
+
+    def __init__(self, ttl: float = MEMO_TTL_SECONDS, max_sessions: int = MAX_SESSIONS) -> None:
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._entries: OrderedDict[str, tuple[tuple[float, float, str], float, ChainResult]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(
+        self, session: str | None, lat: float, lon: float, date: str, result: ChainResult
+    ) -> None:
+        if not session:
+            return
+        with self._lock:
+            self._entries[session] = (_key(lat, lon, date), time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(session)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def get(self, session: str | None, lat: float, lon: float, date: str) -> ChainResult | None:
+        """The session's chain result, if it was computed for these inputs and is still fresh."""
+        if not session:
+            return None
+        with self._lock:
+            entry = self._entries.get(session)
+            if entry is None:
+                return None
+            key, expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[session]
+                return None
+            if key != _key(lat, lon, date):
+                return None
+            self._entries.move_to_end(session)
+        CACHE_HITS.inc(cache="request")
+        return result
+
+    def drop(self, session: str | None) -> None:
+        with self._lock:
+            self._entries.pop(session, None)
+
+
+MEMO = RequestMemo()
@@ -0,0 +1,257 @@
+"""
+Lightweight in-process metrics: per-stage latency histograms and counters.
+
+Recording is a perf_counter call plus a locked bucket increment, so it is cheap
+enough for the hot path. Metrics are exposed as Prometheus text (see
+render_prometheus / start_metrics_server) and as a JSON snapshot for MCP clients.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond ETo math up to LLM calls near their 15 s timeout.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0
+)
+
+
+def _label_text(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: list | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        # Metrics outside the process-wide REGISTRY are not exported (e.g. in tests).
+        (REGISTRY if registry is None else registry).append(self)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        for key, value in items:
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value:g}")
+        return lines
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in sorted(self._values.items())}
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: "Histogram", labels: dict[str, str]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: list | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, **labels: str) -> _Timer:
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def _quantile(self, counts: list[int], q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        total = sum(counts)
+        if total == 0:
+            return math.nan
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(c), s[0])) for key, (c, s) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], counts, strict=True):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                labels = _label_text(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            items = sorted((key, (list(c), s[0])) for key, (c, s) in self._series.items())
+        result = {}
+        for key, (counts, total) in items:
+            count = sum(counts)
+            result[",".join(key) or "total"] = {
+                "count": count,
+                "mean_ms": total / count * 1000 if count else 0.0,
+                "p50_ms": self._quantile(counts, 0.50) * 1000,
+                "p95_ms": self._quantile(counts, 0.95) * 1000,
+                "p99_ms": self._quantile(counts, 0.99) * 1000,
+            }
+        return result
+
+
+REGISTRY: list[Counter | Histogram] = []
+
+STAGE_SECONDS = Histogram(
+    "nwa_stage_duration_seconds",
+    "Latency of pipeline stages (api_fetch, csv_fallback, eto_compute, gemini_call, ...).",
+    labelnames=("stage",),
+)
+FALLBACKS = Counter(
+    "nwa_fallback_activations_total",
+    "Times a degraded path was used instead of the primary source.",
+    labelnames=("source",),
+)
+CACHE_HITS = Counter(
+    "nwa_cache_hits_total", "Results served from a cache layer.", labelnames=("cache",)
+)
+TIMEOUTS = Counter("nwa_timeouts_total", "Upstream calls that timed out.", labelnames=("stage",))
+FETCH_REQUESTS = Counter(
+    "nwa_fetch_requests_total",
+    "Climate fetches requested by callers (kind=requested) and Open-Meteo calls sent for them.",
+    labelnames=("kind",),
+)
+
+LLM_TOKENS = Counter(
+    "nwa_llm_tokens_total",
+    "Gemini tokens by kind (input, output) and prompt variant.",
+    labelnames=("kind", "variant"),
+)
+LLM_LATENCY = Histogram(
+    "nwa_llm_request_seconds",
+    "Latency of Gemini requests per prompt variant.",
+    labelnames=("variant",),
+)
+INSIGHT_ROUTES = Counter(
+    "nwa_insight_routes_total",
+    "Insights answered by the rule-based fast path (route=rules) or sent to Gemini (route=llm).",
+    labelnames=("route",),
+)
+
+
+def track_stage(stage: str) -> _Timer:
+    """Shortcut: `with track_stage("api_fetch"): ...`"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def llm_bypass_rate() -> float | None:
+    """Share of insights the rule-based fast path answered without Gemini; None before any."""
+    rules, llm = INSIGHT_ROUTES.value(route="rules"), INSIGHT_ROUTES.value(route="llm")
+    return rules / (rules + llm) if rules + llm else None
+
+
+def snapshot() -> dict[str, object]:
+    """JSON-friendly view of every registered metric, plus the LLM bypass rate."""
+    return {metric.name: metric.snapshot() for metric in REGISTRY} | {
+        "llm_bypass_rate": llm_bypass_rate()
+    }
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 (http.server API)
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logger.debug("metrics scrape: " + format, *args)
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; works alongside stdio MCP and Gradio."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="nwa-metrics", daemon=True).start()
+    logger.info("Prometheus metrics on http://%s:%d/metrics", addr, server.server_address[1])
+    return server
@@ -5,20 +5,26 @@ from pydantic import BaseModel, Field
 class ClimateData(BaseModel):
     """
     Standardized climate data model for hydrological calculations.
-    Source can be 'API' (Open-Meteo) or 'CSV' (Local Fallback).
+    Source can be 'API' (Open-Meteo), 'Archive' (local store) or 'CSV' (Local Fallback).
     """
     date: str = Field(..., description="Date in YYYY-MM-DD format")
     tmin: float = Field(..., description="Minimum temperature in Celsius")
     tmax: float = Field(..., description="Maximum temperature in Celsius")
     tmean: float = Field(..., description="Mean temperature in Celsius")
     lat: float = Field(..., description="Latitude of the location")
-    source: str = Field(..., description="Source of the data: 'API' or 'CSV'")
+    lon: float | None = Field(None, description="Longitude of the location, when known")
+    source: str = Field(..., description="Source of the data: 'API', 'Archive' or 'CSV'")
     precipitation: float = Field(0.0, description="Daily precipitation sum in mm")
     humidity: float = Field(0.0, description="Daily mean relative humidity (0-100)")
+    wind_speed: float | None = Field(None, description="Daily mean wind speed at 2 m in m/s")
+    solar_radiation: float | None = Field(
+        None, description="Daily shortwave radiation sum in MJ m-2 day-1"
+    )
+    elevation: float = Field(0.0, description="Site elevation in metres above sea level")
 
 class EToResult(BaseModel):
     """
-    Result of the Hargreaves ETo calculation.
+    Result of an ETo calculation (see tools.science.ETO_METHODS).
     """
     date: str = Field(..., description="Date in YYYY-MM-DD format")
     eto: float = Field(..., description="Reference Evapotranspiration (ETo) in mm/day")
@@ -33,3 +39,47 @@ class AgronomistInsight(BaseModel):
     advice: str = Field(..., description="Actionable advice for the farmer")
     risk_level: str = Field(..., description="Risk level: 'Low', 'Medium', 'High'")
     eto_value: float = Field(..., description="The ETo value analyzed")
+    fallback: bool = Field(
+        False, description="True when Gemini was unavailable and a stand-in answer was returned"
+    )
+
+
+class ClimateAnomaly(BaseModel):
+    """
+    A day's ETo and precipitation compared with the precomputed day-of-year climatology.
+    """
+    day_of_year: int = Field(..., description="Day of year (1-366) used for the baseline")
+    eto_normal: float = Field(..., description="Climatological mean ETo in mm/day")
+    eto_anomaly: float | None = Field(None, description="ETo minus the normal, mm/day")
+    eto_percentile: float | None = Field(None, description="Percentile rank of ETo (0-100)")
+    precipitation_normal: float = Field(..., description="Climatological mean precipitation in mm")
+    precipitation_anomaly: float | None = Field(None, description="Precipitation minus the normal")
+    precipitation_percentile: float | None = Field(
+        None, description="Percentile rank of precipitation (0-100)"
+    )
+
+
+class RollingWaterBalance(BaseModel):
+    """
+    Rolling ETo and precipitation totals for a site, maintained incrementally as days arrive.
+    Window keys are day counts; windows shorter than `days` cover every day seen so far.
+    """
+    lat: float = Field(..., description="Latitude of the site")
+    lon: float = Field(..., description="Longitude of the site")
+    date: str = Field(..., description="Last day included, YYYY-MM-DD")
+    days: int = Field(..., description="Number of days aggregated since tracking started")
+    method: str = Field(..., description="ETo method used for the daily values")
+    eto_sum: dict[int, float] = Field(..., description="ETo sum in mm per rolling window")
+    precipitation_sum: dict[int, float] = Field(
+        ..., description="Precipitation sum in mm per rolling window"
+    )
+    deficit: dict[int, float] = Field(
+        ..., description="ETo minus precipitation in mm per window (positive means a deficit)"
+    )
+    complete_windows: list[int] = Field(..., description="Windows that span their full length")
+    cumulative_deficit: float = Field(
+        ..., description="Running deficit in mm: grows with ETo, drawn down by rain, floored at 0"
+    )
+    cumulative_balance: float = Field(
+        ..., description="Precipitation minus ETo in mm since tracking started"
+    )
@@ -1,21 +1,66 @@
+import asyncio
 import json
 import logging
+import os
 import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime
+from pathlib import Path
 
 from dotenv import load_dotenv
 from fastmcp import FastMCP
+from pydantic import TypeAdapter
 
 load_dotenv()  # Load environment variables from .env file
 
+from nwa_hydro.executor import get_batch_executor
+from nwa_hydro.health import MONITOR
+from nwa_hydro.jobs import JobQueueFullError, get_job_queue
+from nwa_hydro.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    render_prometheus,
+    snapshot,
+    start_metrics_server,
+    track_stage,
+)
 from nwa_hydro.schemas import AgronomistInsight, ClimateData, EToResult
+from nwa_hydro.snapshots import parse_sites
+from nwa_hydro.tools.export import EXPORT_RETENTION_SECONDS, export_sites, generated_export
 from nwa_hydro.tools.fusion import fetch_climate_data
+from nwa_hydro.tools.grid import (
+    GridSpec,
+    build_eto_raster,
+    export_eto_raster,
+    resolve_export_path,
+)
 from nwa_hydro.tools.intelligence import generate_agronomist_insight
-from nwa_hydro.tools.science import calculate_hargreaves_eto
+from nwa_hydro.tools.rolling import get_rolling
+from nwa_hydro.tools.science import (
+    ClimateArrays,
+    EToMethod,
+    eto_from_columns,
+    resolve_eto_method,
+)
+from nwa_hydro.tools.science import calculate_eto as compute_eto
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    """Run dependency probes and job workers in the background for the server's lifetime."""
+    MONITOR.start()
+    get_job_queue().start()
+    try:
+        yield {}
+    finally:
+        await get_job_queue().stop()
+        await MONITOR.stop()
+
+
 # Initialize FastMCP Server
 # Define the MCP Server with rich metadata
 # This helps Claude Desktop understand the server's purpose and requirements.
@@ -29,9 +74,12 @@ mcp = FastMCP(
         "pandas",
         "python-dotenv"
     ],
-    description="Hydrological intelligence system for Nicaraguan agriculture. Provides real-time weather, ETo calculations, and AI-driven agronomic advice."
+    description="Hydrological intelligence system for Nicaraguan agriculture. Provides real-time weather, ETo calculations, and AI-driven agronomic advice.",
+    lifespan=_lifespan,
 )
 _START_TIME = time.monotonic()
+_CLIMATE_SERIES = TypeAdapter(list[ClimateData])
+_ETO_SERIES = TypeAdapter(list[EToResult])
 
 
 def _validate_inputs(lat: float, lon: float, date_str: str) -> None:
@@ -64,19 +112,148 @@ async def get_climate_data(lat: float, lon: float, date: str) -> str:
     _validate_inputs(lat, lon, date)
     data = await fetch_climate_data(lat, lon, date)
     logger.info("Fetched climate data from %s for %s", data.source, date)
-    return data.model_dump_json()
+    with track_stage("serialization"):
+        return data.model_dump_json()
 
 
-def calculate_eto(climate_data_json: str) -> str:
+def calculate_eto(climate_data_json: str, method: str = "hargreaves") -> str:
     """
     Calculate ETo from ClimateData JSON.
     Requires meteorological data as input.
+    method: 'hargreaves' (default), 'penman_monteith', 'priestley_taylor',
+    or 'auto' to use the most complete method the fetched inputs allow.
     Returns a JSON string of the EToResult.
     """
     data = ClimateData.model_validate_json(climate_data_json)
-    result = calculate_hargreaves_eto(data)
+    result = compute_eto(data, method)
     logger.info("Calculated ETo via %s for %s", result.method, data.date)
-    return result.model_dump_json()
+    with track_stage("serialization"):
+        return result.model_dump_json()
+
+
+def _parse_eto_batch(
+    climate_series_json: str, method: str
+) -> tuple[list[ClimateData], ClimateArrays | None, EToMethod | None]:
+    records = _CLIMATE_SERIES.validate_json(climate_series_json)
+    if not records:
+        return records, None, None
+    arrays = ClimateArrays.from_records(records)
+    return records, arrays, resolve_eto_method(arrays, method)
+
+
+def _dump_eto_batch(records: list[ClimateData], values, selected: EToMethod) -> str:
+    results = [
+        EToResult(date=record.date, eto=float(value), method=selected.label, input_data=record)
+        for record, value in zip(records, values, strict=True)
+    ]
+    with track_stage("serialization"):
+        return _ETO_SERIES.dump_json(results).decode()
+
+
+async def calculate_eto_batch(climate_series_json: str, method: str = "hargreaves") -> str:
+    """
+    Calculate ETo for a JSON array of ClimateData records (e.g. a multi-year series).
+    Parsing and serialization run in a thread and the kernel in a worker process,
+    so interactive tools stay responsive during large batches.
+    Returns a JSON array of EToResult.
+    """
+    records, arrays, selected = await asyncio.to_thread(
+        _parse_eto_batch, climate_series_json, method
+    )
+    if not records:
+        return "[]"
+    values = await get_batch_executor().run(
+        eto_from_columns, *arrays.columns(), method=selected.key
+    )
+    logger.info("Calculated %d ETo values via %s", len(records), selected.label)
+    return await asyncio.to_thread(_dump_eto_batch, records, values, selected)
+
+
+async def get_eto_raster(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    resolution: float,
+    date: str,
+    method: str = "hargreaves",
+    export_path: str | None = None,
+    export_format: str = "npy",
+) -> str:
+    """
+    Compute a gridded ETo raster over a bounding box (resolution in degrees), up to
+    NWA_HYDRO_MAX_INTERACTIVE_GRID_CELLS cells; use submit_analysis_job for more.
+    Optionally exports it as 'npy' tiles, 'netcdf' or 'zarr' to export_path, a new
+    name relative to the server's export directory (NWA_HYDRO_EXPORTS).
+    Returns a JSON summary (shape, min/mean/max ETo, export location).
+    """
+    _validate_inputs(min_lat, min_lon, date)
+    _validate_inputs(max_lat, max_lon, date)
+    target = resolve_export_path(export_path) if export_path else None
+    if target is not None and target.exists():
+        raise ValueError(f"Export '{export_path}' already exists; choose another name")
+    spec = GridSpec(min_lat, min_lon, max_lat, max_lon, resolution)
+    spec.check_interactive()
+    raster = await build_eto_raster(spec, date, method)
+    summary = raster.summary()
+    if target is not None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(export_eto_raster, raster, target, export_format)
+        summary["export_path"] = export_path
+    logger.info("Computed %s ETo raster for %s", "x".join(map(str, spec.shape)), date)
+    return json.dumps(summary)
+
+
+async def get_water_balance(lat: float, lon: float) -> str:
+    """
+    Rolling 7/30/90-day ETo and precipitation sums, per-window deficits and the
+    cumulative deficit for a site kept up to date by `nwa-hydro ingest`.
+    Returns a JSON string of the RollingWaterBalance, or an error for untracked sites.
+    """
+    _validate_inputs(lat, lon, datetime.now().strftime("%Y-%m-%d"))
+    state = await asyncio.to_thread(get_rolling)
+    balance = state.get(lat, lon) if state is not None else None
+    if balance is None:
+        return _error_payload(
+            "No rolling water balance for this site", "Add it to the `nwa-hydro ingest` sites."
+        )
+    with track_stage("serialization"):
+        return balance.model_dump_json()
+
+
+async def export_climate_eto(
+    sites: str,
+    start_date: str,
+    end_date: str,
+    export_format: str = "csv",
+    method: str = "hargreaves",
+) -> str:
+    """
+    Export daily climate and ETo for many sites over [start_date, end_date] to one
+    new file under the server's export directory, written site by site.
+    sites: 'Label:lat,lon;Label 2:lat,lon'. export_format: 'csv', 'arrow' (IPC
+    file) or 'parquet'; the last two need pyarrow. Returns a JSON summary: name,
+    path (absolute, for clients on the server's machine), url (download path when
+    the server runs over HTTP), expires_at, format, rows, sites and skipped sites.
+    """
+    try:
+        site_map = parse_sites(sites)
+        for lat, lon in site_map.values():
+            _validate_inputs(lat, lon, start_date)
+        _validate_inputs(0.0, 0.0, end_date)
+        summary = await export_sites(
+            site_map, start_date, end_date, fmt=export_format, method=method
+        )
+    except ValueError as exc:
+        return _error_payload("Could not export climate data", str(exc))
+    path = Path(summary.path).resolve()
+    expires_at = datetime.fromtimestamp(path.stat().st_mtime + EXPORT_RETENTION_SECONDS)
+    return json.dumps(asdict(summary) | {
+        "path": str(path),
+        "name": path.name,
+        "url": f"/exports/{path.name}",
+        "expires_at": expires_at.isoformat(timespec="seconds"),
+    })
 
 
 async def get_agronomist_advice(eto_result_json: str) -> str:
@@ -94,29 +271,114 @@ async def get_agronomist_advice(eto_result_json: str) -> str:
     try:
         insight: AgronomistInsight = await generate_agronomist_insight(eto_result)
         logger.info("Generated agronomist insight for %s", eto_result.date)
-        return insight.model_dump_json()
+        with track_stage("serialization"):
+            return insight.model_dump_json()
     except Exception as exc:  # noqa: BLE001
         logger.error("Failed to generate agronomist insight: %s", exc)
         return _error_payload("Failed to generate agronomist insight", str(exc))
 
 
+async def submit_analysis_job(kind: str, params_json: str, priority: str = "batch") -> str:
+    """
+    Start a long-running analysis in the background and return its job (with the ID
+    to poll). kind: 'site_history' (params lat, lon, start_date, end_date, method)
+    or 'region_eto' (params min_lat, min_lon, max_lat, max_lon, resolution,
+    start_date, end_date, method). priority: 'interactive' runs ahead of 'batch'.
+    """
+    queue = get_job_queue()
+    try:
+        params = json.loads(params_json)
+        if not isinstance(params, dict):
+            raise ValueError("params_json must be a JSON object")
+        job = queue.submit(kind, params, priority)
+    except (ValueError, JobQueueFullError) as exc:
+        return _error_payload("Could not submit job", str(exc))
+    queue.start()  # No-op under the server lifespan; needed when tools are called directly.
+    return job.model_dump_json()
+
+
+async def get_job_status(job_id: str) -> str:
+    """
+    Status of a submitted job: queued, running (with progress 0-1), done (with the
+    number of result rows) or failed (with the error). Returns a JSON string.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return _error_payload("Unknown job", job_id)
+    return job.model_dump_json()
+
+
+async def get_job_results(job_id: str, offset: int = 0, limit: int = 100) -> str:
+    """
+    One page of a finished job's result rows (at most 1000). Pass next_offset from
+    the previous page to continue; it is null on the last page.
+    """
+    try:
+        page = await asyncio.to_thread(get_job_queue().results, job_id, offset, limit)
+    except ValueError as exc:
+        return _error_payload("Unknown job", str(exc))
+    with track_stage("serialization"):
+        return page.model_dump_json()
+
+
 async def get_server_health() -> dict[str, object]:
-    """Return basic health information for readiness probes."""
+    """
+    Return cached readiness from the background dependency probes: status
+    (starting/ok/degraded), tools_ready, active degraded modes and per-check details.
+    """
     uptime_seconds = max(time.monotonic() - _START_TIME, 0.0)
-    return {
-        "status": "ok",
-        "tools_ready": True,
-        "uptime_seconds": uptime_seconds,
-    }
+    return {**MONITOR.status(), "uptime_seconds": uptime_seconds}
+
+
+def get_server_metrics(output_format: str = "json") -> dict[str, object] | str:
+    """
+    Return pipeline metrics: per-stage latency (count, mean, p50/p95/p99 ms)
+    for api_fetch, csv_fallback, eto_compute, gemini_call and serialization,
+    plus fallback, cache-hit and timeout counters and llm_bypass_rate (the share of
+    insights answered by deterministic rules instead of Gemini).
+    output_format: 'json' (default) or 'prometheus' for the text exposition format.
+    """
+    if output_format == "prometheus":
+        return render_prometheus()
+    return snapshot()
 
 
 # --- MCP REGISTRATION ---
 # Manually invoke the decorator to register tools while keeping functions pure
 mcp.tool()(get_climate_data)
 mcp.tool()(calculate_eto)
+mcp.tool()(calculate_eto_batch)
+mcp.tool()(get_eto_raster)
+mcp.tool()(get_water_balance)
+mcp.tool()(export_climate_eto)
 mcp.tool()(get_agronomist_advice)
+mcp.tool()(submit_analysis_job)
+mcp.tool()(get_job_status)
+mcp.tool()(get_job_results)
 mcp.tool()(get_server_health)
+mcp.tool()(get_server_metrics)
+
+if hasattr(mcp, "custom_route"):
+    # Scrape endpoint when the server runs over an HTTP transport (e.g. SSE).
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def prometheus_metrics(request):  # noqa: ARG001
+        from starlette.responses import PlainTextResponse
+
+        return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    @mcp.custom_route("/exports/{name}", methods=["GET"])
+    async def download_export(request):
+        """Files written by export_climate_eto, until they are pruned."""
+        from starlette.responses import FileResponse, PlainTextResponse
+
+        path = generated_export(request.path_params["name"])
+        if path is None:
+            return PlainTextResponse("Export not found or expired", status_code=404)
+        return FileResponse(path, filename=path.name)
 
 # Run the FastMCP Server
 if __name__ == "__main__":
+    if os.getenv("NWA_HYDRO_METRICS_PORT"):
+        # stdio has no HTTP listener, so expose /metrics from a side thread.
+        start_metrics_server(int(os.environ["NWA_HYDRO_METRICS_PORT"]))
     mcp.run()
@@ -0,0 +1,166 @@
+"""
+Precomputed dashboard snapshots for scenario presets and other hot sites.
+
+Every visitor of a preset would otherwise trigger the same fetch + ETo + Gemini
+chain. A background refresher computes each site's results on a schedule and
+stores them in the shared result cache, so page loads and scenario clicks are
+served instantly, and only one worker refreshes each site. Snapshots are kept
+after they go stale; readers show their age instead of blocking on a refresh.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+from typing import Any
+
+from pydantic import BaseModel
+
+from .cache import CacheBackend, cache_key, get_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("NWA_HYDRO_SNAPSHOT_INTERVAL", "1800"))
+# Older than this many refresh intervals, a snapshot is flagged as stale.
+STALE_AFTER_INTERVALS = 2.0
+# Days the reanalysis archive trails the calendar; today is usually not in it yet.
+ARCHIVE_LAG_DAYS = int(os.getenv("NWA_HYDRO_ARCHIVE_LAG_DAYS", "1"))
+
+
+class Snapshot(BaseModel):
+    site: str
+    lat: float
+    lon: float
+    date: str
+    computed_at: float
+    payload: dict[str, Any]
+
+    @property
+    def age_seconds(self) -> float:
+        return max(time.time() - self.computed_at, 0.0)
+
+
+SnapshotCompute = Callable[[float, float, str, str], Awaitable[dict[str, Any]]]
+
+
+def parse_sites(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse 'Label:lat,lon;Label 2:lat,lon' (the NWA_HYDRO_HOT_SITES format)."""
+    sites = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        label, _, coords = entry.rpartition(":")
+        try:
+            lat, lon = (float(value) for value in coords.split(","))
+        except ValueError as exc:
+            raise ValueError(f"Invalid hot site '{entry}'; expected 'Label:lat,lon'") from exc
+        sites[label or coords] = (lat, lon)
+    return sites
+
+
+def latest_available_date() -> str:
+    """The most recent day the archive should have; the dashboard's default date."""
+    return (date.today() - timedelta(days=ARCHIVE_LAG_DAYS)).isoformat()
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 90:
+        return "just now"
+    if seconds < 5400:
+        return f"{seconds / 60:.0f} min ago"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} h ago"
+    return f"{seconds / 86400:.0f} days ago"
+
+
+class SnapshotRefresher:
+    """Keeps one snapshot per site fresh in the shared cache."""
+
+    def __init__(
+        self,
+        sites: dict[str, tuple[float, float]],
+        compute: SnapshotCompute,
+        interval: float = SNAPSHOT_INTERVAL_SECONDS,
+        cache: CacheBackend | None = None,
+        today: Callable[[], str] = latest_available_date,
+    ) -> None:
+        self.sites = sites
+        self.compute = compute
+        self.interval = interval
+        self.today = today
+        self._cache = cache
+        self._task: asyncio.Task | None = None
+
+    @property
+    def cache(self) -> CacheBackend:
+        return self._cache or get_cache()
+
+    @staticmethod
+    def _key(lat: float, lon: float) -> str:
+        return cache_key("snapshot", lat, lon)
+
+    def get(self, lat: float, lon: float, date: str | None = None) -> Snapshot | None:
+        """Latest snapshot for a site's coordinates (and date, when given)."""
+        raw = self.cache.get(self._key(lat, lon))
+        if raw is None:
+            return None
+        snapshot = Snapshot.model_validate_json(raw)
+        if date is not None and snapshot.date != date:
+            return None
+        return snapshot
+
+    def is_stale(self, snapshot: Snapshot) -> bool:
+        return snapshot.age_seconds > self.interval * STALE_AFTER_INTERVALS
+
+    def status(self, snapshot: Snapshot) -> str:
+        """One-line staleness indicator for the dashboard."""
+        age = format_age(snapshot.age_seconds)
+        if self.is_stale(snapshot):
+            return f"🟠 Snapshot from {age} (stale, refresh pending)"
+        return f"⚡ Precomputed snapshot, updated {age}"
+
+    async def refresh(self, site: str, force: bool = False) -> Snapshot | None:
+        """Recompute one site unless another worker just did (or is doing) it."""
+        lat, lon = self.sites[site]
+        date = self.today()
+        key = self._key(lat, lon)
+        current = await asyncio.to_thread(self.get, lat, lon, date)
+        if not force and current is not None and current.age_seconds < self.interval * 0.9:
+            return current
+        if not await asyncio.to_thread(self.cache.try_lock, key):
+            return current
+        try:
+            payload = await self.compute(lat, lon, date, site)
+            snapshot = Snapshot(
+                site=site, lat=lat, lon=lon, date=date, computed_at=time.time(), payload=payload
+            )
+            # No TTL: a stale snapshot with an age label beats a slow page load.
+            await asyncio.to_thread(self.cache.set, key, snapshot.model_dump_json().encode())
+            logger.info("Refreshed snapshot for %s (%s)", site, date)
+            return snapshot
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Snapshot refresh for %s failed: %s", site, exc)
+            return current
+        finally:
+            await asyncio.to_thread(self.cache.unlock, key)
+
+    async def refresh_all(self) -> None:
+        await asyncio.gather(*(self.refresh(site) for site in self.sites))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the schedule on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,369 @@
+"""
+Day-of-year climatology baselines for instant anomaly comparisons.
+
+An offline build step pulls decades of daily history for every grid cell,
+computes ETo, and stores per-cell, per-day-of-year means and percentiles in a
+compact .npz indexed by (row, col, doy). Lookups are pure array indexing, so
+anomalies and percentile ranks cost no network calls.
+
+Build (offline):
+    python -m nwa_hydro.tools.climatology --start 1991-01-01 --end 2020-12-31
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from ..schemas import ClimateAnomaly, EToResult
+from .fusion import WIND_10M_TO_2M
+from .grid import (
+    MAX_CONCURRENT_REQUESTS,
+    NICARAGUA_BBOX,
+    GridSpec,
+    fetch_locations,
+)
+from .science import (
+    ETO_METHODS,
+    ClimateArrays,
+    EToMethod,
+    compute_eto_array,
+    get_eto_method,
+)
+
+logger = logging.getLogger(__name__)
+
+CLIMATOLOGY_PATH = Path(os.getenv("NWA_HYDRO_CLIMATOLOGY", "data/climatology/climatology.npz"))
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+DOY_BINS = 366
+# Days either side of a day-of-year pooled into its baseline (smooths sampling noise).
+DEFAULT_WINDOW_DAYS = 7
+# Long histories are heavy; fewer coordinates per request than a single-day grid fetch.
+HISTORY_COORDS_PER_REQUEST = 10
+HISTORY_VARIABLES = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "temperature_2m_mean",
+    "precipitation_sum",
+]
+# Extra inputs fetched when the baseline method needs them: (daily variable, scale factor).
+OPTIONAL_HISTORY_VARIABLES = {
+    "humidity": ("relative_humidity_2m_mean", 1.0),
+    "wind_speed": ("wind_speed_10m_mean", WIND_10M_TO_2M),
+    "solar_radiation": ("shortwave_radiation_sum", 1.0),
+}
+
+
+def history_variables(method: EToMethod) -> list[str]:
+    """Daily variables needed to compute a baseline with this method."""
+    return HISTORY_VARIABLES + [OPTIONAL_HISTORY_VARIABLES[name][0] for name in method.requires]
+
+
+def _day_of_year(dates: np.ndarray) -> np.ndarray:
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    return (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+
+
+@dataclass
+class Climatology:
+    """
+    Per-cell day-of-year statistics. Arrays are float32 with shapes
+    (rows, cols, 366) for means and (rows, cols, 366, len(percentiles)) for percentiles.
+    """
+    spec: GridSpec
+    period: str
+    method: str
+    percentiles: np.ndarray
+    eto_mean: np.ndarray
+    eto_percentiles: np.ndarray
+    precipitation_mean: np.ndarray
+    precipitation_percentiles: np.ndarray
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            bbox=np.array(self.spec.bbox),
+            resolution=self.spec.resolution,
+            period=self.period,
+            method=self.method,
+            percentiles=self.percentiles,
+            eto_mean=self.eto_mean,
+            eto_percentiles=self.eto_percentiles,
+            precipitation_mean=self.precipitation_mean,
+            precipitation_percentiles=self.precipitation_percentiles,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Climatology":
+        with np.load(path) as data:
+            return cls(
+                spec=GridSpec(*data["bbox"].tolist(), resolution=float(data["resolution"])),
+                period=str(data["period"]),
+                method=str(data["method"]),
+                percentiles=data["percentiles"],
+                eto_mean=data["eto_mean"],
+                eto_percentiles=data["eto_percentiles"],
+                precipitation_mean=data["precipitation_mean"],
+                precipitation_percentiles=data["precipitation_percentiles"],
+            )
+
+    def _rank(self, value: float | None, quantiles: np.ndarray) -> float | None:
+        """Percentile rank by interpolating between the stored quantiles."""
+        if value is None or not np.all(np.isfinite(quantiles)):
+            return None
+        return float(np.interp(value, quantiles, self.percentiles, left=0.0, right=100.0))
+
+    def lookup(
+        self,
+        lat: float,
+        lon: float,
+        date: str,
+        eto: float | None = None,
+        precipitation: float | None = None,
+        method: str | None = None,
+    ) -> ClimateAnomaly | None:
+        """
+        Baseline and anomaly for a point and date; None outside the grid, without data,
+        or when `method` (the label of the ETo being compared) differs from the baseline's.
+        """
+        if method is not None and method != self.method:
+            return None
+        index = self.spec.cell_index(lat, lon)
+        if index is None:
+            return None
+        doy = datetime.strptime(date, "%Y-%m-%d").timetuple().tm_yday
+        cell = (*index, doy - 1)
+        eto_normal = float(self.eto_mean[cell])
+        precipitation_normal = float(self.precipitation_mean[cell])
+        if not (np.isfinite(eto_normal) and np.isfinite(precipitation_normal)):
+            return None
+        return ClimateAnomaly(
+            day_of_year=doy,
+            eto_normal=eto_normal,
+            eto_anomaly=None if eto is None else eto - eto_normal,
+            eto_percentile=self._rank(eto, self.eto_percentiles[cell]),
+            precipitation_normal=precipitation_normal,
+            precipitation_anomaly=(
+                None if precipitation is None else precipitation - precipitation_normal
+            ),
+            precipitation_percentile=self._rank(
+                precipitation, self.precipitation_percentiles[cell]
+            ),
+        )
+
+
+def build_climatology(
+    spec: GridSpec,
+    dates: np.ndarray,
+    eto: np.ndarray,
+    precipitation: np.ndarray,
+    method: str,
+    window: int = DEFAULT_WINDOW_DAYS,
+) -> Climatology:
+    """
+    Aggregate daily series of shape (rows * cols, days) into day-of-year statistics,
+    pooling days within +/- window (circularly) of each day of year.
+    """
+    rows, cols = spec.shape
+    doy = _day_of_year(dates)
+    levels = np.array(PERCENTILES, dtype=np.float32)
+    stats = {
+        name: (
+            np.full((rows * cols, DOY_BINS), np.nan, dtype=np.float32),
+            np.full((rows * cols, DOY_BINS, len(levels)), np.nan, dtype=np.float32),
+        )
+        for name in ("eto", "precipitation")
+    }
+    for day in range(1, DOY_BINS + 1):
+        distance = np.abs(doy - day)
+        selected = np.minimum(distance, DOY_BINS - distance) <= window
+        if not selected.any():
+            continue
+        for name, series in (("eto", eto), ("precipitation", precipitation)):
+            sample = series[:, selected]
+            has_data = np.isfinite(sample).any(axis=1)
+            if not has_data.any():
+                continue
+            means, quantiles = stats[name]
+            means[has_data, day - 1] = np.nanmean(sample[has_data], axis=1)
+            quantiles[has_data, day - 1] = np.nanpercentile(sample[has_data], levels, axis=1).T
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    return Climatology(
+        spec=spec,
+        period=f"{dates.min()}/{dates.max()}",
+        method=method,
+        percentiles=levels,
+        eto_mean=stats["eto"][0].reshape(rows, cols, DOY_BINS),
+        eto_percentiles=stats["eto"][1].reshape(rows, cols, DOY_BINS, len(levels)),
+        precipitation_mean=stats["precipitation"][0].reshape(rows, cols, DOY_BINS),
+        precipitation_percentiles=stats["precipitation"][1].reshape(
+            rows, cols, DOY_BINS, len(levels)
+        ),
+    )
+
+
+async def fetch_grid_history(
+    spec: GridSpec, start_date: str, end_date: str, variables: list[str] = HISTORY_VARIABLES
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Daily history for every cell: (dates, {variable: array of shape (cells, days)}),
+    plus each cell's "elevation" (shape (cells,)).
+    """
+    rows, cols = spec.shape
+    cell_lats = np.repeat(spec.lats, cols)
+    cell_lons = np.tile(spec.lons, rows)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with httpx.AsyncClient() as client:
+        chunks = await asyncio.gather(
+            *(
+                fetch_locations(
+                    client,
+                    cell_lats[start:start + HISTORY_COORDS_PER_REQUEST],
+                    cell_lons[start:start + HISTORY_COORDS_PER_REQUEST],
+                    start_date,
+                    end_date,
+                    semaphore,
+                    variables=variables,
+                )
+                for start in range(0, cell_lats.size, HISTORY_COORDS_PER_REQUEST)
+            )
+        )
+    locations = [location for chunk in chunks for location in chunk]
+    dates = np.array(locations[0]["daily"]["time"], dtype="datetime64[D]")
+    fields = {
+        "elevation": np.array([float(location.get("elevation") or 0.0) for location in locations])
+    }
+    for variable in variables:
+        fields[variable] = np.array(
+            [
+                [np.nan if v is None else v for v in location["daily"][variable]]
+                for location in locations
+            ],
+            dtype=np.float64,
+        )
+    return dates, fields
+
+
+async def build_climatology_from_archive(
+    spec: GridSpec,
+    start_date: str,
+    end_date: str,
+    method: str = "hargreaves",
+    window: int = DEFAULT_WINDOW_DAYS,
+) -> Climatology:
+    """Offline build: fetch history for all cells, compute ETo, aggregate by day of year."""
+    if method == "auto":
+        raise ValueError("A climatology baseline needs one fixed ETo method, not 'auto'")
+    selected = get_eto_method(method)
+    dates, fields = await fetch_grid_history(
+        spec, start_date, end_date, history_variables(selected)
+    )
+    cells, days = fields["temperature_2m_max"].shape
+    lat = np.repeat(np.repeat(spec.lats, spec.shape[1]), days)
+    doy = np.tile(_day_of_year(dates).astype(np.float64), cells)
+    tmin = fields["temperature_2m_min"].ravel()
+    tmax = fields["temperature_2m_max"].ravel()
+    tmean = fields["temperature_2m_mean"].ravel()
+    valid = np.isfinite(tmin) & np.isfinite(tmax) & np.isfinite(tmean) & (tmax >= tmin)
+    inputs = {}
+    for name, (variable, scale) in OPTIONAL_HISTORY_VARIABLES.items():
+        if name in selected.requires:
+            inputs[name] = fields[variable].ravel() * scale
+            valid &= np.isfinite(inputs[name])
+    # Invalid days get placeholder inputs so the kernel runs; their ETo is masked below.
+    missing = np.full(cells * days, np.nan)
+    arrays = ClimateArrays(
+        tmin=np.where(valid, tmin, 0.0),
+        tmax=np.where(valid, tmax, 0.0),
+        tmean=np.where(valid, tmean, 0.0),
+        lat=lat,
+        doy=doy,
+        **{
+            name: np.where(valid, inputs[name], 0.0) if name in inputs else missing
+            for name in OPTIONAL_HISTORY_VARIABLES
+        },
+        elevation=np.repeat(fields["elevation"], days),
+    )
+    values, _ = compute_eto_array(arrays, selected.key)
+    eto = np.where(valid, values, np.nan).reshape(cells, days)
+    return build_climatology(
+        spec, dates, eto, fields["precipitation_sum"], selected.label, window
+    )
+
+
+_CLIMATOLOGY: tuple[Path, float, Climatology | None] | None = None
+_CLIMATOLOGY_LOCK = threading.Lock()
+
+
+def get_climatology(path: Path | None = None) -> Climatology | None:
+    """The baseline, reloaded when a build rewrites it; None when it has not been built."""
+    global _CLIMATOLOGY
+    path = Path(path or CLIMATOLOGY_PATH)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    with _CLIMATOLOGY_LOCK:
+        if _CLIMATOLOGY is None or _CLIMATOLOGY[:2] != (path, mtime):
+            try:
+                climatology = Climatology.load(path)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Could not load climatology from %s: %s", path, exc)
+                climatology = None
+            _CLIMATOLOGY = (path, mtime, climatology)
+        return _CLIMATOLOGY[2]
+
+
+def lookup_anomaly(eto_result: EToResult) -> ClimateAnomaly | None:
+    """
+    Anomaly for an EToResult when a baseline for its ETo method exists and the
+    location is known.
+    """
+    climatology = get_climatology()
+    data = eto_result.input_data
+    if climatology is None or data.lon is None:
+        return None
+    return climatology.lookup(
+        data.lat,
+        data.lon,
+        eto_result.date,
+        eto=eto_result.eto,
+        precipitation=data.precipitation,
+        method=eto_result.method,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the day-of-year climatology baseline.")
+    parser.add_argument(
+        "--bbox", type=float, nargs=4, default=NICARAGUA_BBOX,
+        metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"),
+    )
+    parser.add_argument("--resolution", type=float, default=0.25)
+    parser.add_argument("--start", default="1991-01-01")
+    parser.add_argument("--end", default="2020-12-31")
+    parser.add_argument("--method", default="hargreaves", choices=sorted(ETO_METHODS))
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_DAYS)
+    parser.add_argument("--out", type=Path, default=CLIMATOLOGY_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    spec = GridSpec.from_bbox(tuple(args.bbox), args.resolution)
+    climatology = asyncio.run(
+        build_climatology_from_archive(spec, args.start, args.end, args.method, args.window)
+    )
+    logger.info("Wrote climatology %s to %s", climatology.period, climatology.save(args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Columnar exports of daily climate and ETo for many sites (CSV, Arrow IPC, Parquet).
+
+Analysts pull months of history for dozens of sites into their own tools. An
+export fetches a few sites at a time (local store first, then Open-Meteo),
+computes their ETo and writes each site as one chunk. For Arrow that is a
+record batch and for Parquet a row group. Memory stays bounded by the sites in
+flight, however many sites or days are requested:
+
+    summary = await export_sites({"Matagalpa": (12.9256, -85.9189)},
+                                 "2024-01-01", "2024-06-30", "out.parquet", "parquet")
+
+Arrow and Parquet need pyarrow (pip install nwa-hydro[export]); CSV needs nothing.
+"""
+import asyncio
+import csv
+import logging
+import os
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from ..executor import get_batch_executor
+from .fusion import fetch_climate_range
+from .science import ClimateArrays, eto_from_columns, resolve_eto_method
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PATH = Path(os.getenv("NWA_HYDRO_EXPORTS", "data/exports"))
+# Generated exports live apart from client-named raster exports (grid.resolve_export_path).
+GENERATED_SUBDIR = "generated"
+EXPORT_FORMATS = {"csv": ".csv", "arrow": ".arrow", "parquet": ".parquet"}
+GENERATED_NAME = re.compile(r"export-[0-9a-f]{12}\.(?:csv|arrow|parquet)")
+EXPORT_COLUMNS = (
+    "site", "lat", "lon", "date", "tmin", "tmax", "tmean", "precipitation", "humidity",
+    "wind_speed", "solar_radiation", "eto", "method", "source",
+)
+_FLOAT_COLUMNS = frozenset(EXPORT_COLUMNS) - {"site", "date", "method", "source"}
+# Sites fetched concurrently; also the most site chunks held in memory at once.
+DEFAULT_CONCURRENCY = 4
+# Generated export files older than this are deleted when the next export starts.
+EXPORT_RETENTION_SECONDS = int(os.getenv("NWA_HYDRO_EXPORT_RETENTION_SECONDS", "86400"))
+# Sites × days one export may cover (the dashboard download is 1 × 90).
+MAX_EXPORT_SITE_DAYS = int(os.getenv("NWA_HYDRO_MAX_EXPORT_SITE_DAYS", "20000"))
+
+Batch = dict[str, list]
+
+
+@dataclass
+class ExportSummary:
+    path: str
+    format: str
+    rows: int = 0
+    sites: int = 0
+    skipped: list[str] = field(default_factory=list)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ValueError(
+            "Arrow and Parquet exports need the 'pyarrow' package (pip install nwa-hydro[export])"
+        ) from exc
+    return pyarrow
+
+
+async def _site_batch(
+    site: str, lat: float, lon: float, start_date: str, end_date: str, method: str
+) -> Batch | None:
+    records = await fetch_climate_range(lat, lon, start_date, end_date)
+    if not records:
+        return None
+    arrays = ClimateArrays.from_records(records)
+    selected = resolve_eto_method(arrays, method)
+    eto = await get_batch_executor().run(eto_from_columns, *arrays.columns(), method=selected.key)
+    size = len(records)
+    batch: Batch = {"site": [site] * size, "lat": [lat] * size, "lon": [lon] * size}
+    for name in EXPORT_COLUMNS[3:11]:
+        batch[name] = [getattr(record, name) for record in records]
+    batch["eto"] = [float(value) if np.isfinite(value) else None for value in eto]
+    batch["method"] = [selected.label] * size
+    batch["source"] = [record.source for record in records]
+    return batch
+
+
+async def site_batches(
+    sites: dict[str, tuple[float, float]],
+    start_date: str,
+    end_date: str,
+    method: str = "hargreaves",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    skipped: list[str] | None = None,
+) -> AsyncIterator[Batch]:
+    """One column batch per site, in site order; sites without data are skipped."""
+    items = list(sites.items())
+    for offset in range(0, len(items), concurrency):
+        window = items[offset:offset + concurrency]
+        batches = await asyncio.gather(
+            *(_site_batch(name, lat, lon, start_date, end_date, method)
+              for name, (lat, lon) in window)
+        )
+        for (name, _), batch in zip(window, batches, strict=True):
+            if batch is None:
+                logger.warning("Export: no climate data for %s, skipped", name)
+                if skipped is not None:
+                    skipped.append(name)
+                continue
+            yield batch
+
+
+def export_schema(pa):
+    """Fixed Arrow schema of EXPORT_COLUMNS, so all-null columns keep their type."""
+    return pa.schema([
+        (name, pa.float64() if name in _FLOAT_COLUMNS else pa.string())
+        for name in EXPORT_COLUMNS
+    ])
+
+
+# Sinks create their file exclusively ("x"): an export never overwrites a file.
+class _CsvSink:
+    def __init__(self, path: Path) -> None:
+        self._handle = path.open("x", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, batch: Batch) -> None:
+        self._writer.writerows(zip(*(batch[name] for name in EXPORT_COLUMNS), strict=True))
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class _ArrowSink:
+    """Arrow IPC file, one record batch per site."""
+
+    def __init__(self, path: Path) -> None:
+        self._pa = _pyarrow()
+        self._schema = export_schema(self._pa)
+        self._handle = path.open("xb")
+        self._writer = self._open_writer()
+
+    def _open_writer(self):
+        return self._pa.ipc.new_file(self._handle, self._schema)
+
+    def write(self, batch: Batch) -> None:
+        table = self._pa.table(
+            {name: batch[name] for name in EXPORT_COLUMNS}, schema=self._schema
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        try:
+            self._writer.close()
+        finally:
+            self._handle.close()
+
+
+class _ParquetSink(_ArrowSink):
+    """Parquet file, one row group per site."""
+
+    def _open_writer(self):
+        return self._pa.parquet.ParquetWriter(self._handle, self._schema, compression="zstd")
+
+
+_SINKS = {"csv": _CsvSink, "arrow": _ArrowSink, "parquet": _ParquetSink}
+
+
+def generated_exports_dir() -> Path:
+    return EXPORT_PATH / GENERATED_SUBDIR
+
+
+def export_path(fmt: str, directory: Path | None = None) -> Path:
+    """A fresh file name under NWA_HYDRO_EXPORTS/generated for one export."""
+    directory = directory or generated_exports_dir()
+    return directory / f"export-{uuid.uuid4().hex[:12]}{EXPORT_FORMATS[fmt]}"
+
+
+def generated_export(name: str) -> Path | None:
+    """The generated export with this file name, or None if there is no such file."""
+    path = generated_exports_dir() / name
+    return path if GENERATED_NAME.fullmatch(name) and path.is_file() else None
+
+
+def prune_exports(
+    directory: Path | None = None, max_age: float = EXPORT_RETENTION_SECONDS
+) -> int:
+    """Delete generated exports (see export_path) older than max_age seconds; returns the count."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in (directory or generated_exports_dir()).iterdir():
+        if not GENERATED_NAME.fullmatch(path.name) or not path.is_file():
+            continue  # Only files this module named; never anything a client wrote.
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue  # Pruned concurrently by another worker.
+        except OSError as exc:
+            logger.warning("Could not prune export %s: %s", path, exc)
+    if removed:
+        logger.info("Pruned %d export(s) older than %.0f s", removed, max_age)
+    return removed
+
+
+async def export_sites(
+    sites: dict[str, tuple[float, float]],
+    start_date: str,
+    end_date: str,
+    path: str | Path | None = None,
+    fmt: str = "csv",
+    method: str = "hargreaves",
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> ExportSummary:
+    """
+    Stream every site's daily climate and ETo into one new file; returns what was
+    written. Without a path, the file gets a generated name under
+    NWA_HYDRO_EXPORTS/generated and stale generated exports there are pruned first.
+    An existing path is an error, and so is more than MAX_EXPORT_SITE_DAYS site-days.
+    """
+    if fmt not in _SINKS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of {sorted(_SINKS)}.")
+    if not sites:
+        raise ValueError("Nothing to export: no sites given")
+    days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+    if days < 1:
+        raise ValueError("end_date must not be before start_date")
+    if len(sites) * days > MAX_EXPORT_SITE_DAYS:
+        raise ValueError(
+            f"Export covers {len(sites) * days:,} site-days; the limit is "
+            f"{MAX_EXPORT_SITE_DAYS:,}. Split it by sites or dates, or submit "
+            "'site_history' jobs (submit_analysis_job) for long histories"
+        )
+    if path:
+        path = Path(path)
+    else:
+        path = export_path(fmt)
+        if path.parent.is_dir():
+            await asyncio.to_thread(prune_exports, path.parent)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        sink = await asyncio.to_thread(_SINKS[fmt], path)
+    except FileExistsError as exc:
+        raise ValueError(f"Export file already exists: {path}") from exc
+    summary = ExportSummary(path=str(path), format=fmt)
+    try:
+        async for batch in site_batches(
+            sites, start_date, end_date, method, concurrency, summary.skipped
+        ):
+            await asyncio.to_thread(sink.write, batch)
+            summary.rows += len(batch["date"])
+            summary.sites += 1
+    finally:
+        await asyncio.to_thread(sink.close)
+    logger.info("Exported %d rows for %d site(s) to %s", summary.rows, summary.sites, path)
+    return summary
@@ -1,102 +1,448 @@
+import asyncio
+import csv
+import math
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from datetime import date, timedelta
 from pathlib import Path
 
 import httpx
-import pandas as pd
 
+from ..health import MONITOR
+from ..metrics import CACHE_HITS, FALLBACKS, FETCH_REQUESTS, TIMEOUTS, track_stage
 from ..schemas import ClimateData
+from . import spatial
+from .store import ClimateStore, get_store, site_coords
 
 LOCAL_DATA_PATH = Path("data/samples/local_station.csv")
+CSV_REQUIRED_COLUMNS = {"date", "tmin", "tmax", "tmean"}
+# Overridable so benchmarks and load tests can point at a local stand-in.
+ARCHIVE_URL = os.getenv("NWA_HYDRO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+DAILY_VARIABLES = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "temperature_2m_mean",
+    "precipitation_sum",
+    "relative_humidity_2m_mean",
+    "wind_speed_10m_mean",
+    "shortwave_radiation_sum",
+]
+# FAO-56 eq. 47 log wind profile, converting 10 m wind to the 2 m reference height.
+WIND_10M_TO_2M = 4.87 / math.log(67.8 * 10 - 5.42)
+
+# Fetches arriving within this window are merged into as few Open-Meteo calls as possible.
+BATCH_WINDOW_SECONDS = float(os.getenv("NWA_HYDRO_FETCH_BATCH_MS", "5")) / 1000
+# Date ranges of one location this many days apart (or less) are fetched in one call.
+MAX_MERGE_GAP_DAYS = 7
+# Locations share a call when the combined span stays this short (extra days are cheap).
+MAX_SHARED_SPAN_DAYS = 31
+MAX_COORDS_PER_CALL = 50
+
+_CSV_INDEX: tuple[tuple[Path, float], dict[str, dict[str, str]]] | None = None
+_CSV_INDEX_LOCK = threading.Lock()
+
+
+def _optional_value(daily: dict, key: str, index: int, scale: float = 1.0) -> float | None:
+    values = daily.get(key)
+    if not values or index >= len(values) or values[index] is None:
+        return None
+    return float(values[index]) * scale
+
+
+# --- FETCH PLANNER (micro-batching) ---
+
+
+@dataclass(frozen=True)
+class FetchRequest:
+    lat: float
+    lon: float
+    start_date: str
+    end_date: str
+    daily: tuple[str, ...] = tuple(DAILY_VARIABLES)
+    hourly: tuple[str, ...] = ()
+
+
+@dataclass
+class PlannedCall:
+    """One Open-Meteo call; members map each served request to its location in the response."""
+    coords: list[tuple[float, float]]
+    start_date: str
+    end_date: str
+    daily: tuple[str, ...]
+    hourly: tuple[str, ...]
+    members: list[tuple[int, int]]  # (request index, location index)
+
+
+@dataclass
+class _Segment:
+    coord: tuple[float, float]
+    start_date: str
+    end_date: str
+    daily: dict[str, None] = field(default_factory=dict)
+    hourly: dict[str, None] = field(default_factory=dict)
+    requests: list[int] = field(default_factory=list)
+
+    def add(self, index: int, request: FetchRequest) -> None:
+        self.end_date = max(self.end_date, request.end_date)
+        self.daily.update(dict.fromkeys(request.daily))
+        self.hourly.update(dict.fromkeys(request.hourly))
+        self.requests.append(index)
+
+
+def _span_days(start_date: str, end_date: str) -> int:
+    return (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+
+
+def plan_fetches(
+    requests: list[FetchRequest],
+    max_gap_days: int = MAX_MERGE_GAP_DAYS,
+    max_coords: int = MAX_COORDS_PER_CALL,
+    max_shared_span_days: int = MAX_SHARED_SPAN_DAYS,
+) -> list[PlannedCall]:
+    """
+    Minimal calls for a batch: per location, overlapping or nearby date ranges merge
+    into one span with the union of their variables; locations whose spans fit in a
+    short common window then share one multi-coordinate call.
+    """
+    by_location: dict[tuple[float, float], list[int]] = {}
+    for index, request in enumerate(requests):
+        by_location.setdefault((request.lat, request.lon), []).append(index)
+
+    segments: list[_Segment] = []
+    for coord, indices in by_location.items():
+        current = None
+        for index in sorted(indices, key=lambda i: requests[i].start_date):
+            request = requests[index]
+            gap = date.fromisoformat(request.start_date) - date.fromisoformat(
+                current.end_date if current else request.start_date
+            )
+            if current is None or gap > timedelta(days=max_gap_days + 1):
+                current = _Segment(coord, request.start_date, request.end_date)
+                segments.append(current)
+            current.add(index, request)
+
+    # Greedy in start order: a segment joins the open call unless that would stretch
+    # the call past the shared window, repeat a location or exceed the coordinate cap.
+    groups: list[list[_Segment]] = []
+    for segment in sorted(segments, key=lambda seg: seg.start_date):
+        group = groups[-1] if groups else None
+        if (
+            group is None
+            or len(group) >= max_coords
+            or any(member.coord == segment.coord for member in group)
+            or _span_days(group[0].start_date, max(segment.end_date, *(m.end_date for m in group)))
+            > max_shared_span_days
+        ):
+            groups.append([segment])
+        else:
+            group.append(segment)
+
+    calls = []
+    for group in groups:
+        daily: dict[str, None] = {}
+        hourly: dict[str, None] = {}
+        for segment in group:
+            daily.update(segment.daily)
+            hourly.update(segment.hourly)
+        calls.append(PlannedCall(
+            coords=[segment.coord for segment in group],
+            start_date=group[0].start_date,
+            end_date=max(segment.end_date for segment in group),
+            daily=tuple(daily),
+            hourly=tuple(hourly),
+            members=[
+                (index, location)
+                for location, segment in enumerate(group)
+                for index in segment.requests
+            ],
+        ))
+    return calls
+
+
+def _slice_payload(location: dict, request: FetchRequest) -> dict:
+    """A caller's view of a merged response: only its dates and variables."""
+    payload = {
+        key: value for key, value in location.items()
+        if key not in ("daily", "hourly", "daily_units", "hourly_units")
+    }
+    for section, variables in (("daily", request.daily), ("hourly", request.hourly)):
+        if not variables:
+            continue
+        block = location.get(section) or {}
+        times = block.get("time") or []
+        keep = [
+            i for i, stamp in enumerate(times)
+            if request.start_date <= stamp[:10] <= request.end_date
+        ]
+        payload[section] = {"time": [times[i] for i in keep]}
+        for variable in variables:
+            values = block.get(variable)
+            if values is not None:
+                payload[section][variable] = [values[i] for i in keep]
+    return payload
+
+
+def _single_call(request: FetchRequest, index: int) -> PlannedCall:
+    """The call a request would have made on its own."""
+    return PlannedCall(
+        coords=[(request.lat, request.lon)],
+        start_date=request.start_date,
+        end_date=request.end_date,
+        daily=request.daily,
+        hourly=request.hourly,
+        members=[(index, 0)],
+    )
+
+
+def _is_outage(error: BaseException) -> bool:
+    """Transport failures, rate limiting and server errors; a 4xx is the request's own fault."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and (
+        error.response.status_code == 429 or error.response.status_code >= 500
+    )
+
+
+class FetchPlanner:
+    """
+    Collects fetches for BATCH_WINDOW_SECONDS, sends the planned calls and fans the
+    columns back out. A merged call rejected with a 4xx is retried once per request,
+    so one bad request cannot fail the others; any other error reaches every request
+    the call served.
+    """
+
+    def __init__(
+        self,
+        window: float = BATCH_WINDOW_SECONDS,
+        max_gap_days: int = MAX_MERGE_GAP_DAYS,
+        max_coords: int = MAX_COORDS_PER_CALL,
+    ) -> None:
+        self.window = window
+        self.max_gap_days = max_gap_days
+        self.max_coords = max_coords
+        self._pending: list[tuple[FetchRequest, asyncio.Future, float]] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def fetch(self, request: FetchRequest, timeout: float = 8.0) -> dict:
+        """Open-Meteo payload for one location, as if it had been requested alone."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future, timeout))
+        if self._flush_handle is None:
+            if self.window > 0:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        batch, self._pending, self._flush_handle = self._pending, [], None
+        requests = [request for request, _, _ in batch]
+        calls = plan_fetches(requests, self.max_gap_days, self.max_coords)
+        FETCH_REQUESTS.inc(len(batch), kind="requested")
+        FETCH_REQUESTS.inc(len(calls), kind="sent")
+        for call in calls:
+            task = asyncio.get_running_loop().create_task(self._execute(call, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(
+        self, call: PlannedCall, batch: list[tuple[FetchRequest, asyncio.Future, float]]
+    ) -> None:
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in call.coords),
+            "longitude": ",".join(str(lon) for _, lon in call.coords),
+            "start_date": call.start_date,
+            "end_date": call.end_date,
+            "wind_speed_unit": "ms",
+            "timezone": "auto",
+        }
+        if call.daily:
+            params["daily"] = list(call.daily)
+        if call.hourly:
+            params["hourly"] = list(call.hourly)
+        timeout = max(batch[index][2] for index, _ in call.members)
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(ARCHIVE_URL, params=params, timeout=timeout)
+            response.raise_for_status()
+            MONITOR.record("open_meteo", True, f"HTTP {response.status_code}")
+            payload = response.json()
+            # A single coordinate returns an object; several return a list.
+            locations = payload if isinstance(payload, list) else [payload]
+        except Exception as error:  # noqa: BLE001
+            if _is_outage(error):
+                MONITOR.record("open_meteo", False, f"{type(error).__name__}: {error}")
+            elif isinstance(error, httpx.HTTPStatusError) and len(call.members) > 1:
+                FETCH_REQUESTS.inc(len(call.members), kind="sent")
+                await asyncio.gather(
+                    *(self._execute(_single_call(batch[index][0], index), batch)
+                      for index, _ in call.members)
+                )
+                return
+            for index, _ in call.members:
+                if not batch[index][1].done():
+                    batch[index][1].set_exception(error)
+            return
+        for index, location in call.members:
+            request, future, _ = batch[index]
+            if not future.done():
+                future.set_result(_slice_payload(locations[location], request))
+
+
+_PLANNERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, FetchPlanner]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_planner() -> FetchPlanner:
+    """The running event loop's planner (futures and tasks cannot cross loops)."""
+    loop = asyncio.get_running_loop()
+    planner = _PLANNERS.get(loop)
+    if planner is None:
+        planner = _PLANNERS[loop] = FetchPlanner()
+    return planner
+
+
+def _read_store(
+    store: ClimateStore, lat: float, lon: float, start_date: str, end_date: str
+) -> list[ClimateData]:
+    """
+    The site's complete range, else the nearest ingested site's within
+    NWA_HYDRO_NEAREST_KM (relabelled with the requested coordinates). Blocking.
+    """
+    days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+    records = store.get_range(lat, lon, start_date, end_date)
+    if len(records) == days:
+        CACHE_HITS.inc(cache="store")
+        return records
+    if spatial.NEAREST_SITE_KM <= 0:
+        return []
+    neighbor = spatial.get_site_index(store).nearest(
+        lat, lon, spatial.NEAREST_SITE_KM, kind="archive"
+    )
+    if neighbor is None or (neighbor.lat, neighbor.lon) == site_coords(lat, lon):
+        return []
+    records = store.get_range(neighbor.lat, neighbor.lon, start_date, end_date)
+    if len(records) != days:
+        return []
+    CACHE_HITS.inc(cache="nearest_site")
+    return [record.model_copy(update={"lat": lat, "lon": lon}) for record in records]
+
+
+async def _from_store(lat: float, lon: float, start_date: str, end_date: str) -> list[ClimateData]:
+    """Days ingested ahead of time by `nwa-hydro ingest`; empty unless the range is complete."""
+    store = get_store()
+    if store is None:
+        return []
+    with track_stage("store_read"):
+        return await asyncio.to_thread(_read_store, store, lat, lon, start_date, end_date)
+
+
+def _near_station(lat: float, lon: float) -> bool:
+    """Whether the local CSV station (NWA_HYDRO_LOCAL_STATION) is within tolerance. Blocking."""
+    if not spatial.LOCAL_STATION or spatial.NEAREST_SITE_KM <= 0:
+        return False
+    index = spatial.get_site_index(get_store())
+    return index.nearest(lat, lon, spatial.NEAREST_SITE_KM, kind="station") is not None
 
 
 async def fetch_climate_data(lat: float, lon: float, target_date: str) -> ClimateData:
-    """Fetch climate data from Open-Meteo, fallback to local CSV if needed."""
+    """Fetch climate data from the local store or Open-Meteo, fallback to local CSV if needed."""
+    archived = await _from_store(lat, lon, target_date, target_date)
+    if archived:
+        return archived[0]
+    if await asyncio.to_thread(_near_station, lat, lon):
+        # Ground truth next door beats reanalysis; days the station lacks go to the API.
+        try:
+            station = await _fallback(lat, target_date, lon)
+            CACHE_HITS.inc(cache="station")
+            return station
+        except (OSError, ValueError):
+            pass
+    if MONITOR.is_down("open_meteo"):
+        # Known outage: answer from the archive instead of waiting for a timeout.
+        FALLBACKS.inc(source="csv")
+        return await _fallback(lat, target_date, lon)
     try:
-        # 1. Try API
-        async with httpx.AsyncClient() as client:
-            url = "https://archive-api.open-meteo.com/v1/archive"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "start_date": target_date,
-                "end_date": target_date,
-                "daily": [
-                    "temperature_2m_max",
-                    "temperature_2m_min",
-                    "temperature_2m_mean",
-                    "precipitation_sum",
-                    "relative_humidity_2m_mean",
-                ],
-                "timezone": "auto"
-            }
-            response = await client.get(url, params=params, timeout=5.0)
-            response.raise_for_status()
-            data = response.json()
-
-            daily = data.get("daily", {})
-            precipitation_values = daily.get("precipitation_sum") or daily.get("precipitation")
-            humidity_values = daily.get("relative_humidity_2m_mean") or daily.get("relativehumidity_2m_mean")
-            precipitation = float(precipitation_values[0]) if precipitation_values else 0.0
-            humidity = float(humidity_values[0]) if humidity_values else 0.0
-            return ClimateData(
-                date=target_date,
-                tmin=daily["temperature_2m_min"][0],
-                tmax=daily["temperature_2m_max"][0],
-                tmean=daily["temperature_2m_mean"][0],
-                lat=lat,
-                precipitation=precipitation,
-                humidity=humidity,
-                source="API",
+        # 1. Try API (merged with concurrent fetches by the planner)
+        with track_stage("api_fetch"):
+            data = await get_planner().fetch(
+                FetchRequest(lat, lon, target_date, target_date), timeout=5.0
             )
+        daily = data.get("daily", {})
+        precipitation_values = daily.get("precipitation_sum") or daily.get("precipitation")
+        humidity_values = daily.get("relative_humidity_2m_mean") or daily.get("relativehumidity_2m_mean")
+        precipitation = float(precipitation_values[0]) if precipitation_values else 0.0
+        humidity = float(humidity_values[0]) if humidity_values else 0.0
+        return ClimateData(
+            date=target_date,
+            tmin=daily["temperature_2m_min"][0],
+            tmax=daily["temperature_2m_max"][0],
+            tmean=daily["temperature_2m_mean"][0],
+            lat=lat,
+            lon=lon,
+            precipitation=precipitation,
+            humidity=humidity,
+            wind_speed=_optional_value(daily, "wind_speed_10m_mean", 0, WIND_10M_TO_2M),
+            solar_radiation=_optional_value(daily, "shortwave_radiation_sum", 0),
+            elevation=float(data.get("elevation") or 0.0),
+            source="API",
+        )
 
     except Exception as error:
         # 2. Fallback to CSV
+        if isinstance(error, httpx.TimeoutException):
+            TIMEOUTS.inc(stage="api_fetch")
+        FALLBACKS.inc(source="csv")
         print(f"API failed ({error}), switching to local fallback.")
-        return _load_from_csv(lat, target_date)
+        return await _fallback(lat, target_date, lon)
 
 
 async def fetch_climate_range(lat: float, lon: float, start_date: str, end_date: str) -> list[ClimateData]:
-    """Fetch climate data for a date range in a SINGLE API call."""
+    """Fetch climate data for a date range in a SINGLE API call (or from the local store)."""
+    archived = await _from_store(lat, lon, start_date, end_date)
+    if archived:
+        return archived
+    if MONITOR.is_down("open_meteo"):
+        FALLBACKS.inc(source="range_empty")
+        return []
     try:
-        async with httpx.AsyncClient() as client:
-            url = "https://archive-api.open-meteo.com/v1/archive"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "start_date": start_date,
-                "end_date": end_date,
-                "daily": [
-                    "temperature_2m_max",
-                    "temperature_2m_min",
-                    "temperature_2m_mean",
-                    "precipitation_sum",
-                    "relative_humidity_2m_mean",
-                ],
-                "timezone": "auto"
-            }
-            response = await client.get(url, params=params, timeout=8.0)
-            response.raise_for_status()
-            data = response.json()
-            daily = data.get("daily", {})
-            
-            results = []
-            dates = daily.get("time", [])
-            for i, date_str in enumerate(dates):
-                precip = daily["precipitation_sum"][i] if daily.get("precipitation_sum") else 0.0
-                humid = daily["relative_humidity_2m_mean"][i] if daily.get("relative_humidity_2m_mean") else 0.0
-                
-                results.append(ClimateData(
-                    date=date_str,
-                    tmin=daily["temperature_2m_min"][i],
-                    tmax=daily["temperature_2m_max"][i],
-                    tmean=daily["temperature_2m_mean"][i],
-                    lat=lat,
-                    precipitation=float(precip) if precip is not None else 0.0,
-                    humidity=float(humid) if humid is not None else 0.0,
-                    source="API (Range)"
-                ))
-            return results
+        with track_stage("api_fetch_range"):
+            data = await get_planner().fetch(
+                FetchRequest(lat, lon, start_date, end_date), timeout=8.0
+            )
+        daily = data.get("daily", {})
+
+        results = []
+        dates = daily.get("time", [])
+        for i, date_str in enumerate(dates):
+            precip = daily["precipitation_sum"][i] if daily.get("precipitation_sum") else 0.0
+            humid = daily["relative_humidity_2m_mean"][i] if daily.get("relative_humidity_2m_mean") else 0.0
+
+            results.append(ClimateData(
+                date=date_str,
+                tmin=daily["temperature_2m_min"][i],
+                tmax=daily["temperature_2m_max"][i],
+                tmean=daily["temperature_2m_mean"][i],
+                lat=lat,
+                lon=lon,
+                precipitation=float(precip) if precip is not None else 0.0,
+                humidity=float(humid) if humid is not None else 0.0,
+                wind_speed=_optional_value(daily, "wind_speed_10m_mean", i, WIND_10M_TO_2M),
+                solar_radiation=_optional_value(daily, "shortwave_radiation_sum", i),
+                elevation=float(data.get("elevation") or 0.0),
+                source="API (Range)"
+            ))
+        return results
 
     except Exception as error:
+        if isinstance(error, httpx.TimeoutException):
+            TIMEOUTS.inc(stage="api_fetch_range")
+        FALLBACKS.inc(source="range_empty")
         print(f"Range API failed ({error}), falling back to iterative CSV load.")
         # Fallback: Load day by day from CSV (local is fast, so loop is fine)
         results = []
@@ -105,28 +451,45 @@ async def fetch_climate_range(lat: float, lon: float, start_date: str, end_date:
         return []
 
 
-def _load_from_csv(lat: float, target_date: str) -> ClimateData:
-    """Load climate data from the local CSV fallback."""
+def fallback_index() -> dict[str, dict[str, str]]:
+    """
+    Local CSV rows by date. Parsed once and re-read only when the file changes, so
+    fallback lookups are a dict access. Blocking: call it from a worker thread.
+    """
+    global _CSV_INDEX
     if not LOCAL_DATA_PATH.exists():
         raise FileNotFoundError(f"Local fallback file not found at {LOCAL_DATA_PATH}")
+    version = (LOCAL_DATA_PATH, LOCAL_DATA_PATH.stat().st_mtime)
+    with _CSV_INDEX_LOCK:
+        if _CSV_INDEX is None or _CSV_INDEX[0] != version:
+            with LOCAL_DATA_PATH.open(newline="") as handle:
+                reader = csv.DictReader(handle)
+                missing = CSV_REQUIRED_COLUMNS - set(reader.fieldnames or ())
+                if missing:
+                    raise ValueError(f"Local fallback is missing columns: {sorted(missing)}")
+                _CSV_INDEX = (version, {row["date"]: row for row in reader})
+        return _CSV_INDEX[1]
 
-    df = pd.read_csv(LOCAL_DATA_PATH)
-    df["date"] = df["date"].astype(str)
-    record = df[df["date"] == target_date]
 
-    if record.empty:
+def _load_from_csv(lat: float, target_date: str, lon: float | None = None) -> ClimateData:
+    """Load climate data from the local CSV fallback."""
+    row = fallback_index().get(target_date)
+    if row is None:
         raise ValueError(f"No data found for {target_date} in local CSV.")
-
-    row = record.iloc[0]
-    precip = float(row.get("precipitation", 0.0)) if hasattr(row, "get") else 0.0
-    humidity = float(row.get("humidity", 0.0)) if hasattr(row, "get") else 0.0
     return ClimateData(
         date=target_date,
-        tmin=row["tmin"],
-        tmax=row["tmax"],
-        tmean=row["tmean"],
+        tmin=float(row["tmin"]),
+        tmax=float(row["tmax"]),
+        tmean=float(row["tmean"]),
         lat=lat,
-        precipitation=precip,
-        humidity=humidity,
+        lon=lon,
+        precipitation=float(row.get("precipitation") or 0.0),
+        humidity=float(row.get("humidity") or 0.0),
         source="CSV",
     )
+
+
+async def _fallback(lat: float, target_date: str, lon: float | None = None) -> ClimateData:
+    """CSV fallback off the event loop: an outage must not stall every other request."""
+    with track_stage("csv_fallback"):
+        return await asyncio.to_thread(_load_from_csv, lat, target_date, lon)
@@ -0,0 +1,400 @@
+"""
+Gridded (raster) ETo over a bounding box.
+
+Climate fields for every cell are fetched in bulk (Open-Meteo accepts many
+coordinates per request) or loaded from a saved .npz, pushed through the
+vectorized ETo kernels, and exported as chunked .npy tiles, NetCDF or Zarr.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from ..executor import get_batch_executor
+from ..health import MONITOR
+from .fusion import ARCHIVE_URL, DAILY_VARIABLES, WIND_10M_TO_2M
+from .science import ClimateArrays, eto_from_columns, resolve_eto_method
+
+logger = logging.getLogger(__name__)
+
+# Raster exports requested over MCP are confined to this directory.
+EXPORT_PATH = Path(os.getenv("NWA_HYDRO_EXPORTS", "data/exports"))
+
+# (min_lat, min_lon, max_lat, max_lon)
+NICARAGUA_BBOX = (10.7, -87.7, 15.1, -82.7)
+COORDS_PER_REQUEST = 100
+MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_TILE_SIZE = 256
+MAX_GRID_CELLS = 250_000
+# One interactive raster (get_eto_raster) sends cells / COORDS_PER_REQUEST
+# Open-Meteo calls; larger grids go through submit_analysis_job('region_eto').
+MAX_INTERACTIVE_GRID_CELLS = int(os.getenv("NWA_HYDRO_MAX_INTERACTIVE_GRID_CELLS", "2000"))
+
+# Grid field name -> (Open-Meteo daily variable, scale factor)
+_FIELD_SOURCES = {
+    "tmin": ("temperature_2m_min", 1.0),
+    "tmax": ("temperature_2m_max", 1.0),
+    "tmean": ("temperature_2m_mean", 1.0),
+    "precipitation": ("precipitation_sum", 1.0),
+    "humidity": ("relative_humidity_2m_mean", 1.0),
+    "wind_speed": ("wind_speed_10m_mean", WIND_10M_TO_2M),
+    "solar_radiation": ("shortwave_radiation_sum", 1.0),
+}
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    """Regular lat/lon grid of cell centres covering a bounding box."""
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+    resolution: float
+
+    def __post_init__(self) -> None:
+        if self.resolution <= 0:
+            raise ValueError("Resolution must be positive (degrees)")
+        if self.min_lat >= self.max_lat or self.min_lon >= self.max_lon:
+            raise ValueError("Bounding box must satisfy min < max for lat and lon")
+        if self.shape[0] * self.shape[1] > MAX_GRID_CELLS:
+            raise ValueError(f"Grid exceeds {MAX_GRID_CELLS:,} cells; use a coarser resolution")
+
+    @property
+    def cells(self) -> int:
+        rows, cols = self.shape
+        return rows * cols
+
+    def check_interactive(self, limit: int | None = None) -> None:
+        """Reject grids too large to fetch within one tool call or dashboard request."""
+        limit = MAX_INTERACTIVE_GRID_CELLS if limit is None else limit
+        if self.cells > limit:
+            raise ValueError(
+                f"Grid has {self.cells:,} cells; interactive rasters are limited to {limit:,}. "
+                "Use a coarser resolution or submit a 'region_eto' job (submit_analysis_job)"
+            )
+
+    @classmethod
+    def from_bbox(cls, bbox: tuple[float, float, float, float], resolution: float) -> "GridSpec":
+        return cls(*bbox, resolution=resolution)
+
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        return self.min_lat, self.min_lon, self.max_lat, self.max_lon
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        rows = max(1, math.ceil((self.max_lat - self.min_lat) / self.resolution))
+        cols = max(1, math.ceil((self.max_lon - self.min_lon) / self.resolution))
+        return rows, cols
+
+    @property
+    def lats(self) -> np.ndarray:
+        return self.min_lat + (np.arange(self.shape[0]) + 0.5) * self.resolution
+
+    @property
+    def lons(self) -> np.ndarray:
+        return self.min_lon + (np.arange(self.shape[1]) + 0.5) * self.resolution
+
+    def cell_index(self, lat: float, lon: float) -> tuple[int, int] | None:
+        """(row, col) of the cell containing a point, or None outside the grid."""
+        row = math.floor((lat - self.min_lat) / self.resolution)
+        col = math.floor((lon - self.min_lon) / self.resolution)
+        rows, cols = self.shape
+        if 0 <= row < rows and 0 <= col < cols:
+            return row, col
+        return None
+
+
+@dataclass
+class ClimateGrid:
+    """Daily climate fields on a grid; each field has shape (rows, cols)."""
+    spec: GridSpec
+    date: str
+    fields: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def to_arrays(self) -> ClimateArrays:
+        rows, cols = self.spec.shape
+        lat = np.repeat(self.spec.lats, cols)
+        size = rows * cols
+        day = np.datetime64(self.date, "D")
+        doy = float((day - day.astype("datetime64[Y]")).astype(np.int64) + 1)
+
+        def flat(name: str, default: float = np.nan) -> np.ndarray:
+            values = self.fields.get(name)
+            if values is None:
+                return np.full(size, default)
+            return np.asarray(values, dtype=np.float64).ravel()
+
+        humidity = flat("humidity")
+        humidity[humidity <= 0.0] = np.nan
+        return ClimateArrays(
+            tmin=flat("tmin"),
+            tmax=flat("tmax"),
+            tmean=flat("tmean"),
+            lat=lat,
+            doy=np.full(size, doy),
+            humidity=humidity,
+            wind_speed=flat("wind_speed"),
+            solar_radiation=flat("solar_radiation"),
+            elevation=np.nan_to_num(flat("elevation", 0.0), nan=0.0),
+        )
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(
+            path,
+            bbox=np.array(self.spec.bbox),
+            resolution=self.spec.resolution,
+            date=self.date,
+            **self.fields,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "ClimateGrid":
+        with np.load(path) as data:
+            spec = GridSpec(*data["bbox"].tolist(), resolution=float(data["resolution"]))
+            reserved = {"bbox", "resolution", "date"}
+            fields = {name: data[name] for name in data.files if name not in reserved}
+            return cls(spec=spec, date=str(data["date"]), fields=fields)
+
+
+@dataclass
+class EToRaster:
+    """ETo values (mm/day, float32) on a grid for one date."""
+    spec: GridSpec
+    date: str
+    method: str
+    values: np.ndarray
+
+    def summary(self) -> dict[str, object]:
+        finite = self.values[np.isfinite(self.values)]
+        return {
+            "date": self.date,
+            "method": self.method,
+            "shape": list(self.values.shape),
+            "bbox": list(self.spec.bbox),
+            "resolution": self.spec.resolution,
+            "eto_min": float(finite.min()) if finite.size else None,
+            "eto_mean": float(finite.mean()) if finite.size else None,
+            "eto_max": float(finite.max()) if finite.size else None,
+        }
+
+
+async def fetch_locations(
+    client: httpx.AsyncClient,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    start_date: str,
+    end_date: str,
+    semaphore: asyncio.Semaphore,
+    variables: list[str] = DAILY_VARIABLES,
+) -> list[dict]:
+    """One multi-coordinate archive request; returns one payload per location."""
+    params = {
+        "latitude": ",".join(f"{v:.4f}" for v in lats),
+        "longitude": ",".join(f"{v:.4f}" for v in lons),
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": variables,
+        "wind_speed_unit": "ms",
+        "timezone": "auto",
+    }
+    async with semaphore:
+        response = await client.get(ARCHIVE_URL, params=params, timeout=30.0)
+    response.raise_for_status()
+    payload = response.json()
+    # A single coordinate returns an object; several return a list.
+    return payload if isinstance(payload, list) else [payload]
+
+
+async def fetch_climate_grid(spec: GridSpec, target_date: str) -> ClimateGrid:
+    """Fetch daily climate fields for every grid cell in bulk multi-coordinate requests."""
+    if MONITOR.is_down("open_meteo"):
+        # No archive fallback for grids; spare the quota until the probe sees it back.
+        raise ValueError("Open-Meteo is unavailable; try the grid again later")
+    rows, cols = spec.shape
+    cell_lats = np.repeat(spec.lats, cols)
+    cell_lons = np.tile(spec.lons, rows)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    starts = range(0, cell_lats.size, COORDS_PER_REQUEST)
+    async with httpx.AsyncClient() as client:
+        chunks = await asyncio.gather(
+            *(
+                fetch_locations(
+                    client,
+                    cell_lats[start:start + COORDS_PER_REQUEST],
+                    cell_lons[start:start + COORDS_PER_REQUEST],
+                    target_date,
+                    target_date,
+                    semaphore,
+                )
+                for start in starts
+            ),
+            return_exceptions=True,
+        )
+
+    for position, (start, chunk) in enumerate(zip(starts, chunks, strict=True)):
+        if isinstance(chunk, BaseException):
+            if not isinstance(chunk, (httpx.HTTPError, ValueError)):
+                raise chunk
+            size = min(COORDS_PER_REQUEST, cell_lats.size - start)
+            logger.warning("Grid fetch for cells %d-%d failed: %s", start, start + size - 1, chunk)
+            chunks[position] = [{}] * size
+
+    locations = [location for chunk in chunks for location in chunk]
+    fields = {name: np.full(rows * cols, np.nan) for name in [*_FIELD_SOURCES, "elevation"]}
+    for index, location in enumerate(locations):
+        daily = location.get("daily", {})
+        for name, (variable, scale) in _FIELD_SOURCES.items():
+            values = daily.get(variable) or [None]
+            if values[0] is not None:
+                fields[name][index] = float(values[0]) * scale
+        fields["elevation"][index] = float(location.get("elevation") or 0.0)
+
+    return ClimateGrid(
+        spec=spec,
+        date=target_date,
+        fields={name: values.reshape(rows, cols) for name, values in fields.items()},
+    )
+
+
+async def compute_eto_raster(grid: ClimateGrid, method: str = "hargreaves") -> EToRaster:
+    """Run the vectorized ETo engine over all cells; large grids go to the batch executor."""
+    arrays = grid.to_arrays()
+    valid = ~(np.isnan(arrays.tmin) | np.isnan(arrays.tmax) | np.isnan(arrays.tmean))
+    if not valid.any():
+        raise ValueError(f"No grid cells have temperature data for {grid.date}")
+
+    # Cells without data (e.g. failed fetches) stay NaN instead of failing the batch.
+    subset = ClimateArrays(*(column[valid] for column in arrays.columns()))
+    selected = resolve_eto_method(subset, method)
+    values = await get_batch_executor().run(
+        eto_from_columns, *subset.columns(), method=selected.key
+    )
+    raster = np.full(len(arrays), np.nan, dtype=np.float32)
+    raster[valid] = values
+    return EToRaster(
+        spec=grid.spec,
+        date=grid.date,
+        method=selected.label,
+        values=raster.reshape(grid.spec.shape),
+    )
+
+
+async def build_eto_raster(
+    spec: GridSpec, target_date: str, method: str = "hargreaves"
+) -> EToRaster:
+    """Fetch climate fields for a grid and compute its ETo raster."""
+    grid = await fetch_climate_grid(spec, target_date)
+    return await compute_eto_raster(grid, method)
+
+
+# --- EXPORT ---
+
+
+def _to_dataset(raster: EToRaster):
+    import xarray as xr
+
+    return xr.Dataset(
+        {"eto": (("lat", "lon"), raster.values, {"units": "mm/day", "method": raster.method})},
+        coords={"lat": raster.spec.lats, "lon": raster.spec.lons},
+        attrs={"date": raster.date, "resolution_deg": raster.spec.resolution},
+    )
+
+
+def _export_npy_tiles(raster: EToRaster, path: Path, tile_size: int) -> Path:
+    path.mkdir(parents=True)
+    rows, cols = raster.values.shape
+    tiles = []
+    for row in range(0, rows, tile_size):
+        for col in range(0, cols, tile_size):
+            name = f"tile_{row // tile_size}_{col // tile_size}.npy"
+            np.save(path / name, raster.values[row:row + tile_size, col:col + tile_size])
+            tiles.append({"file": name, "row": row, "col": col})
+    manifest = {**raster.summary(), "tile_size": tile_size, "dtype": "float32", "tiles": tiles}
+    (path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return path
+
+
+def export_eto_raster(
+    raster: EToRaster, path: str | Path, fmt: str = "npy", tile_size: int = DEFAULT_TILE_SIZE
+) -> Path:
+    """
+    Export a raster as 'npy' (directory of tiles + manifest.json), 'netcdf' or 'zarr'.
+    NetCDF and Zarr need the matching xarray backend (netCDF4/scipy, zarr) installed.
+    An existing export at path is never overwritten.
+    """
+    path = Path(path)
+    if path.exists():
+        raise ValueError(f"Export already exists: {path}")
+    if fmt == "npy":
+        return _export_npy_tiles(raster, path, tile_size)
+    if fmt == "netcdf":
+        rows, cols = raster.values.shape
+        chunks = (min(tile_size, rows), min(tile_size, cols))
+        encoding = {"eto": {"zlib": True, "chunksizes": chunks}}
+        try:
+            _to_dataset(raster).to_netcdf(path, engine="netcdf4", encoding=encoding)
+        except ValueError:
+            # netCDF4 missing: scipy writes uncompressed NetCDF3.
+            _to_dataset(raster).to_netcdf(path)
+        return path
+    if fmt == "zarr":
+        _to_dataset(raster).chunk({"lat": tile_size, "lon": tile_size}).to_zarr(path, mode="w-")
+        return path
+    raise ValueError(f"Unknown raster format '{fmt}'. Use 'npy', 'netcdf' or 'zarr'.")
+
+
+def resolve_export_path(name: str, root: Path | None = None) -> Path:
+    """Resolve a client-supplied export name under the export directory; reject escapes."""
+    root = (root or EXPORT_PATH).resolve()
+    path = (root / name).resolve()
+    if not name or path == root or not path.is_relative_to(root):
+        raise ValueError(f"Export name must be a relative path inside {root}")
+    return path
+
+
+def load_eto_raster(path: str | Path) -> EToRaster:
+    """Reassemble a raster exported in 'npy' tile format."""
+    path = Path(path)
+    manifest = json.loads((path / "manifest.json").read_text())
+    spec = GridSpec(*manifest["bbox"], resolution=manifest["resolution"])
+    values = np.full(spec.shape, np.nan, dtype=np.float32)
+    for tile in manifest["tiles"]:
+        block = np.load(path / tile["file"])
+        rows = slice(tile["row"], tile["row"] + block.shape[0])
+        cols = slice(tile["col"], tile["col"] + block.shape[1])
+        values[rows, cols] = block
+    return EToRaster(spec=spec, date=manifest["date"], method=manifest["method"], values=values)
+
+
+def raster_cells_geojson(raster: EToRaster) -> tuple[dict, np.ndarray, np.ndarray]:
+    """
+    GeoJSON squares for finite cells, plus matching ids and values, for map layers.
+    """
+    half = raster.spec.resolution / 2.0
+    features, ids, values = [], [], []
+    for r, lat in enumerate(raster.spec.lats):
+        for c, lon in enumerate(raster.spec.lons):
+            value = raster.values[r, c]
+            if not np.isfinite(value):
+                continue
+            cell_id = f"{r}-{c}"
+            ring = [
+                [lon - half, lat - half],
+                [lon + half, lat - half],
+                [lon + half, lat + half],
+                [lon - half, lat + half],
+                [lon - half, lat - half],
+            ]
+            geometry = {"type": "Polygon", "coordinates": [ring]}
+            features.append({"type": "Feature", "id": cell_id, "geometry": geometry})
+            ids.append(cell_id)
+            values.append(float(value))
+    return {"type": "FeatureCollection", "features": features}, np.array(ids), np.array(values)
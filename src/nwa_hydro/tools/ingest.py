@@ -0,0 +1,342 @@
+"""
+Bulk ingestion of Open-Meteo history into the local climate store.
+
+Pulls daily records for a list of sites (or every cell of a bbox grid) over a
+date range, so fusion answers those sites from disk instead of on user demand.
+Sites are batched into multi-coordinate requests and the range is split into
+chunks. Batches download concurrently behind a token-bucket rate limit, and
+429/5xx responses are retried with backoff.
+
+Each chunk is committed together with the sites' watermarks (last day of
+contiguous history). Re-running a command therefore resumes where it stopped,
+and a daily run without --start only fetches the days since each watermark:
+
+    nwa-hydro ingest --sites "Matagalpa:12.9256,-85.9189" --start 2020-01-01
+    nwa-hydro ingest --bbox 12 -87 13 -86 --resolution 0.25 --start 2024-01-01
+    nwa-hydro ingest                     # top-up of every site already in the store
+
+After each run the rolling water-balance state (tools/rolling.py) is advanced
+with the newly stored days. With --hourly, the sites' hourly buffers
+(tools/hourly.py) are topped up as well.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from ..snapshots import parse_sites
+from .fusion import DAILY_VARIABLES
+from .grid import _FIELD_SOURCES, MAX_CONCURRENT_REQUESTS, GridSpec, fetch_locations
+from .hourly import HOURLY_PATH, ingest_hourly
+from .rolling import ROLLING_PATH, RollingAggregates, update_from_store
+from .store import STORE_PATH, ClimateStore, DailyRow, site_coords
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_DAYS = 366
+# Long histories are heavy; same batch size as the climatology build.
+DEFAULT_COORDS_PER_REQUEST = 10
+# Requests per second; Open-Meteo's free tier allows 600 calls per minute.
+DEFAULT_RATE = float(os.getenv("NWA_HYDRO_INGEST_RATE", "2"))
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class Site:
+    name: str
+    lat: float
+    lon: float
+
+
+@dataclass
+class IngestReport:
+    sites: int = 0
+    up_to_date: int = 0
+    requests: int = 0
+    retries: int = 0
+    rows: int = 0
+    failed_batches: int = 0
+    seconds: float = 0.0
+    watermarks: dict[str, str] = field(default_factory=dict)
+
+
+class RateLimiter:
+    """Async token bucket; rate <= 0 disables limiting."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                # Sleeping under the lock keeps waiters in order.
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+
+def grid_sites(spec: GridSpec) -> list[Site]:
+    """One site per cell centre, named by (row, col)."""
+    return [
+        Site(f"cell {row},{col}", float(lat), float(lon))
+        for row, lat in enumerate(spec.lats)
+        for col, lon in enumerate(spec.lons)
+    ]
+
+
+def date_chunks(start: date, end: date, days: int) -> list[tuple[date, date]]:
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def rows_from_payload(location: dict, lat: float, lon: float) -> list[DailyRow]:
+    """Daily rows for one location; days without temperatures are not available yet."""
+    daily = location.get("daily", {})
+    elevation = float(location.get("elevation") or 0.0)
+    rows = []
+    for index, day in enumerate(daily.get("time", [])):
+        values = {}
+        for name, (variable, scale) in _FIELD_SOURCES.items():
+            series = daily.get(variable) or []
+            value = series[index] if index < len(series) else None
+            values[name] = None if value is None else float(value) * scale
+        if values["tmin"] is None or values["tmax"] is None or values["tmean"] is None:
+            continue
+        rows.append((
+            lat, lon, day, values["tmin"], values["tmax"], values["tmean"],
+            values["precipitation"] or 0.0, values["humidity"] or 0.0,
+            values["wind_speed"], values["solar_radiation"], elevation,
+        ))
+    return rows
+
+
+def contiguous_end(rows: list[DailyRow], start: date) -> date | None:
+    """Last day of the unbroken run of rows beginning at start."""
+    expected, last = start, None
+    for row in rows:
+        if date.fromisoformat(row[2]) != expected:
+            break
+        last, expected = expected, expected + timedelta(days=1)
+    return last
+
+
+async def _fetch_with_retries(
+    client: httpx.AsyncClient,
+    batch: list[Site],
+    start: date,
+    end: date,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    report: IngestReport,
+) -> list[dict]:
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        report.requests += 1
+        try:
+            return await fetch_locations(
+                client,
+                np.array([site.lat for site in batch]),
+                np.array([site.lon for site in batch]),
+                start.isoformat(),
+                end.isoformat(),
+                semaphore,
+                variables=DAILY_VARIABLES,
+            )
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            status = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else None
+            if attempt == MAX_RETRIES or (status is not None and status not in RETRY_STATUSES):
+                raise
+            delay = RETRY_BASE_SECONDS * 2**attempt
+            if status is not None and exc.response.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, float(exc.response.headers["Retry-After"]))
+            attempt += 1
+            report.retries += 1
+            logger.warning("Ingest request failed (%s); retrying in %.1fs", exc, delay)
+            await asyncio.sleep(delay)
+
+
+async def _ingest_batch(
+    client: httpx.AsyncClient,
+    store: ClimateStore,
+    batch: list[Site],
+    start: date,
+    end: date,
+    chunk_days: int,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    report: IngestReport,
+) -> None:
+    """Fetch one batch chunk by chunk, in date order, committing after each chunk."""
+    frontier = {site: start for site in batch}
+    for chunk_start, chunk_end in date_chunks(start, end, chunk_days):
+        locations = await _fetch_with_retries(
+            client, batch, chunk_start, chunk_end, semaphore, limiter, report
+        )
+        rows, watermarks = [], {}
+        for site, location in zip(batch, locations, strict=True):
+            site_rows = rows_from_payload(location, site.lat, site.lon)
+            rows.extend(site_rows)
+            # A gap (e.g. days the archive has not published yet) stops the watermark.
+            if frontier[site] == chunk_start:
+                last = contiguous_end(site_rows, chunk_start)
+                if last is not None:
+                    watermarks[(site.name, site.lat, site.lon)] = last.isoformat()
+                    frontier[site] = last + timedelta(days=1)
+        report.rows += await asyncio.to_thread(store.write, rows, watermarks)
+        for (name, _, _), last_date in watermarks.items():
+            report.watermarks[name] = last_date
+        logger.info(
+            "Ingested %d site(s) %s..%s (%d rows)", len(batch), chunk_start, chunk_end, len(rows)
+        )
+
+
+async def ingest(
+    sites: list[Site],
+    end: date,
+    start: date | None = None,
+    store: ClimateStore | None = None,
+    chunk_days: int = DEFAULT_CHUNK_DAYS,
+    coords_per_request: int = DEFAULT_COORDS_PER_REQUEST,
+    concurrency: int = MAX_CONCURRENT_REQUESTS,
+    rate: float = DEFAULT_RATE,
+    full: bool = False,
+) -> IngestReport:
+    """
+    Download [start, end] for every site into the store. Unless full is set, each
+    site starts the day after its watermark; sites without one need a start date.
+    """
+    began = time.perf_counter()
+    store = store or ClimateStore(STORE_PATH)
+    report = IngestReport(sites=len(sites))
+    watermarks = await asyncio.to_thread(store.watermarks)
+
+    # Sites sharing a start date can share multi-coordinate requests.
+    by_start: dict[date, list[Site]] = {}
+    for site in sites:
+        site_start = start
+        watermark = watermarks.get(site_coords(site.lat, site.lon))
+        if watermark is not None and not full:
+            resume = date.fromisoformat(watermark) + timedelta(days=1)
+            site_start = max(start, resume) if start else resume
+        if site_start is None:
+            raise ValueError(f"Site '{site.name}' has no ingested history; pass a start date")
+        if site_start > end:
+            report.up_to_date += 1
+            continue
+        by_start.setdefault(site_start, []).append(site)
+
+    batches = [
+        (site_start, group[index:index + coords_per_request])
+        for site_start, group in sorted(by_start.items())
+        for index in range(0, len(group), coords_per_request)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+
+    async def run_batch(batch_start: date, batch: list[Site]) -> None:
+        try:
+            await _ingest_batch(
+                client, store, batch, batch_start, end, chunk_days, semaphore, limiter, report
+            )
+        except Exception as exc:  # noqa: BLE001
+            # Committed chunks stay; the next run resumes from the watermarks.
+            report.failed_batches += 1
+            logger.error("Ingest of %s failed: %s", ", ".join(s.name for s in batch), exc)
+
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(run_batch(batch_start, batch) for batch_start, batch in batches))
+    report.seconds = time.perf_counter() - began
+    return report
+
+
+def _load_sites(args: argparse.Namespace, store: ClimateStore) -> list[Site]:
+    specs = [args.sites or ""]
+    if args.sites_file:
+        specs.append(args.sites_file.read_text().replace("\n", ";"))
+    sites = [
+        Site(name, lat, lon)
+        for spec in specs
+        for name, (lat, lon) in parse_sites(spec).items()
+    ]
+    if args.bbox:
+        sites.extend(grid_sites(GridSpec.from_bbox(tuple(args.bbox), args.resolution)))
+    if not sites:
+        # No explicit sites: top up everything already in the store.
+        sites = [Site(name, lat, lon) for name, lat, lon in store.sites()]
+    return sites
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sites", help="'Label:lat,lon;Label 2:lat,lon'")
+    parser.add_argument("--sites-file", type=Path, help="one 'Label:lat,lon' per line")
+    parser.add_argument(
+        "--bbox", type=float, nargs=4, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"),
+        help="ingest every cell centre of this grid",
+    )
+    parser.add_argument("--resolution", type=float, default=0.25)
+    parser.add_argument("--start", type=date.fromisoformat,
+                        help="first day (default: the day after each site's watermark)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                        help="last day (default: yesterday)")
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument("--coords-per-request", type=int, default=DEFAULT_COORDS_PER_REQUEST)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max requests per second")
+    parser.add_argument("--full", action="store_true",
+                        help="refetch from --start, ignoring watermarks")
+    parser.add_argument("--store", type=Path, default=STORE_PATH)
+    parser.add_argument("--rolling", type=Path, default=ROLLING_PATH,
+                        help="rolling water-balance state advanced with the new days")
+    parser.add_argument("--hourly", action="store_true",
+                        help="also top up each site's hourly buffer")
+    parser.add_argument("--hourly-dir", type=Path, default=HOURLY_PATH)
+
+
+def run(args: argparse.Namespace) -> int:
+    store = ClimateStore(args.store)
+    sites = _load_sites(args, store)
+    if not sites:
+        raise SystemExit("Nothing to ingest: pass --sites, --sites-file or --bbox")
+    report = asyncio.run(
+        ingest(
+            sites, args.end, args.start, store, args.chunk_days, args.coords_per_request,
+            args.concurrency, args.rate, args.full,
+        )
+    )
+    summary = {key: value for key, value in asdict(report).items() if key != "watermarks"}
+    state = RollingAggregates.load(args.rolling) if args.rolling.exists() else RollingAggregates()
+    summary["rolling_days"] = update_from_store(state, store)
+    state.save(args.rolling)
+    if args.hourly:
+        summary["hourly_samples"] = asyncio.run(
+            ingest_hourly(
+                [(site.lat, site.lon) for site in sites], args.end, args.start, args.hourly_dir
+            )
+        )
+    print(json.dumps(summary, indent=2))
+    return 1 if report.failed_batches else 0
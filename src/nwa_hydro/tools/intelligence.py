@@ -1,24 +1,53 @@
 import asyncio
+import functools
 import json
 import logging
 import os
+import re
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
 from textwrap import dedent
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv  # Import the library
 load_dotenv()  # Load environment variables from local .env file
 
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
-from ..schemas import AgronomistInsight, EToResult
+from ..metrics import FALLBACKS, LLM_LATENCY, LLM_TOKENS, STAGE_SECONDS, TIMEOUTS, track_stage
+from ..schemas import AgronomistInsight, ClimateAnomaly, EToResult
+from .climatology import lookup_anomaly
+from .rules import fast_path_insight
 
 logger = logging.getLogger(__name__)
 GENERATION_TIMEOUT_SECONDS = 15.0
 DEFAULT_RISK = "Medium"
-
-# Configure Gemini
-if os.getenv("GOOGLE_API_KEY"):
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+MODEL_NAME = "gemini-2.5-flash-lite"
+SYSTEM_INSTRUCTION = (
+    "You are an expert agronomist assistant for NWA. "
+    "Analyze the provided water metrics scientifically and return only JSON "
+    "matching the schema: summary (string), advice (string), risk_level "
+    "as Low, Medium, or High."
+)
+# The response schema already fixes the JSON shape, so the compact variant only names it.
+COMPACT_SYSTEM_INSTRUCTION = (
+    "Agronomist for NWA. JSON: summary (max 3 sentences), advice (one action), "
+    "risk_level (Low, Medium or High)."
+)
+PROMPT_VARIANT = os.getenv("NWA_HYDRO_PROMPT_VARIANT", "verbose")
+MAX_OUTPUT_TOKENS = int(os.getenv("NWA_HYDRO_MAX_OUTPUT_TOKENS", "256"))
+
+
+@functools.cache
+def _gemini():
+    """Import and configure the Gemini SDK on first use; it costs ~0.75 s to import."""
+    import google.generativeai as genai
+
+    if os.getenv("GOOGLE_API_KEY"):
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai
 
 
 RESPONSE_SCHEMA = {
@@ -30,6 +59,15 @@ RESPONSE_SCHEMA = {
     },
     "required": ["summary", "advice", "risk_level"],
 }
+GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "max_output_tokens": MAX_OUTPUT_TOKENS,
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+}
+# A JSON string field of the response, possibly still unterminated mid-stream.
+_STREAMED_FIELD = re.compile(r'"(summary|advice)"\s*:\s*"((?:[^"\\]|\\.)*)')
+_PARTIAL_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
 
 
 def _parse_risk(text: str) -> str:
@@ -41,8 +79,31 @@ def _parse_risk(text: str) -> str:
     return DEFAULT_RISK
 
 
-def _build_prompt(eto_result: EToResult) -> str:
-    return dedent(
+def _format_anomaly(anomaly: ClimateAnomaly | None) -> str:
+    """Climatology lines for the prompt; empty when no baseline is available."""
+    if anomaly is None:
+        return ""
+
+    def rank(percentile: float | None) -> str:
+        return "" if percentile is None else f", percentile {percentile:.0f}"
+
+    lines = []
+    if anomaly.eto_anomaly is not None:
+        lines.append(
+            f"- ETo vs. normal: {anomaly.eto_anomaly:+.2f} mm/day "
+            f"(normal {anomaly.eto_normal:.2f}{rank(anomaly.eto_percentile)})"
+        )
+    if anomaly.precipitation_anomaly is not None:
+        lines.append(
+            f"- Precipitation vs. normal: {anomaly.precipitation_anomaly:+.1f} mm "
+            f"(normal {anomaly.precipitation_normal:.1f}"
+            f"{rank(anomaly.precipitation_percentile)})"
+        )
+    return "\n".join(lines)
+
+
+def _build_prompt(eto_result: EToResult, anomaly: ClimateAnomaly | None = None) -> str:
+    prompt = dedent(
         f"""
         You are an expert Agronomist providing an executive summary for a farmer.
 
@@ -52,7 +113,7 @@ def _build_prompt(eto_result: EToResult) -> str:
         - Precipitation: {eto_result.input_data.precipitation:.1f} mm
         - Humidity: {eto_result.input_data.humidity:.1f} %
         - Reference Evapotranspiration (ETo): {eto_result.eto:.2f} mm/day
-
+        {{climatology}}
         Task:
         1. Analyze the water balance (Precipitation vs ETo).
         2. Determine the irrigation risk (Low, Medium, High).
@@ -60,6 +121,89 @@ def _build_prompt(eto_result: EToResult) -> str:
         4. Give one specific, actionable recommendation.
         """
     ).strip()
+    climatology = _format_anomaly(anomaly)
+    return prompt.replace("{climatology}", climatology + "\n" if climatology else "")
+
+
+def _build_compact_prompt(
+    eto_result: EToResult, anomaly: ClimateAnomaly | None = None
+) -> str:
+    """The same figures as _build_prompt as terse key=value pairs."""
+    data = eto_result.input_data
+    lines = [
+        f"date={eto_result.date} tmean={data.tmean:.1f}C rain={data.precipitation:.1f}mm "
+        f"rh={data.humidity:.0f}% eto={eto_result.eto:.2f}mm/d"
+    ]
+    if anomaly is not None:
+        normals = []
+        if anomaly.eto_anomaly is not None:
+            normals.append(f"eto_vs_normal={anomaly.eto_anomaly:+.2f}")
+            if anomaly.eto_percentile is not None:
+                normals.append(f"eto_pct={anomaly.eto_percentile:.0f}")
+        if anomaly.precipitation_anomaly is not None:
+            normals.append(f"rain_vs_normal={anomaly.precipitation_anomaly:+.1f}")
+            if anomaly.precipitation_percentile is not None:
+                normals.append(f"rain_pct={anomaly.precipitation_percentile:.0f}")
+        if normals:
+            lines.append(" ".join(normals))
+    lines.append("Irrigation risk from rain vs ETo.")
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class PromptVariant:
+    """A system instruction plus a prompt builder; compare them with benchmarks/prompts.py."""
+    name: str
+    system_instruction: str
+    build: Callable[[EToResult, ClimateAnomaly | None], str]
+
+
+PROMPT_VARIANTS: dict[str, PromptVariant] = {
+    "verbose": PromptVariant("verbose", SYSTEM_INSTRUCTION, _build_prompt),
+    "compact": PromptVariant("compact", COMPACT_SYSTEM_INSTRUCTION, _build_compact_prompt),
+}
+
+
+def get_prompt_variant(name: str | None = None) -> PromptVariant:
+    name = name or PROMPT_VARIANT
+    try:
+        return PROMPT_VARIANTS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown prompt variant '{name}'. Available: {', '.join(sorted(PROMPT_VARIANTS))}"
+        ) from None
+
+
+# A misconfigured NWA_HYDRO_PROMPT_VARIANT stops the process at startup instead of
+# turning every request into an "API error" fallback.
+get_prompt_variant()
+
+
+@dataclass(frozen=True)
+class GenerationUsage:
+    """Token counts and latency of one Gemini request."""
+    variant: str
+    input_tokens: int
+    output_tokens: int
+    seconds: float
+
+
+def _record_usage(variant: str, metadata, seconds: float) -> GenerationUsage:
+    """Count a request's tokens (from the response's usage_metadata) and latency."""
+    usage = GenerationUsage(
+        variant,
+        int(getattr(metadata, "prompt_token_count", 0) or 0),
+        int(getattr(metadata, "candidates_token_count", 0) or 0),
+        seconds,
+    )
+    LLM_TOKENS.inc(usage.input_tokens, kind="input", variant=variant)
+    LLM_TOKENS.inc(usage.output_tokens, kind="output", variant=variant)
+    LLM_LATENCY.observe(seconds, variant=variant)
+    logger.info(
+        "Gemini (%s prompt): %d input + %d output tokens in %.0f ms",
+        variant, usage.input_tokens, usage.output_tokens, seconds * 1000,
+    )
+    return usage
 
 
 def _get_fallback_insight(eto_value: float, reason: str) -> AgronomistInsight:
@@ -79,25 +223,29 @@ def _get_fallback_insight(eto_value: float, reason: str) -> AgronomistInsight:
         advice=advice,
         risk_level=risk,
         eto_value=eto_value,
+        fallback=True,
     )
 
 
-async def _generate_with_timeout(
-    model: genai.GenerativeModel,
-    prompt: str,
-    safety_settings: dict,
-    generation_config: dict,
-) -> str:
-    response = await asyncio.wait_for(
-        model.generate_content_async(
-            prompt,
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-        ),
-        timeout=GENERATION_TIMEOUT_SECONDS,
-    )
+def _model_and_safety_settings(
+    variant: PromptVariant,
+) -> tuple["genai.GenerativeModel", dict]:
+    genai = _gemini()
+    from google.generativeai.types import HarmBlockThreshold, HarmCategory
 
-    # Check for blocked response BEFORE accessing .text
+    model = genai.GenerativeModel(MODEL_NAME, system_instruction=variant.system_instruction)
+    # Safety settings to prevent false positives in agronomic advice
+    safety_settings = {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+    return model, safety_settings
+
+
+def _candidate_text(response, require_parts: bool = True) -> str:
+    """Text of the first candidate of a response or stream chunk; raises if blocked."""
     if response.prompt_feedback:
         logger.debug("Gemini prompt feedback: %s", response.prompt_feedback)
     if not response.candidates:
@@ -110,78 +258,209 @@ async def _generate_with_timeout(
         raise ValueError("Response blocked by safety filter")
 
     if not candidate.content or not candidate.content.parts:
-        raise ValueError("Empty content returned")
-
+        if require_parts:
+            raise ValueError("Empty content returned")
+        return ""  # A stream's closing chunk may only carry the finish reason.
     return candidate.content.parts[0].text
 
 
-async def generate_agronomist_insight(eto_result: EToResult) -> AgronomistInsight:
-    """
-    Generate an agronomist insight using Google Gemini, with safe fallbacks for local/dev runs.
-    """
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        return AgronomistInsight(
-            summary="API key missing",
-            advice="Set GOOGLE_API_KEY to enable Gemini-powered insights.",
-            risk_level="Unknown",
-            eto_value=eto_result.eto,
-        )
-
-    model = genai.GenerativeModel(
-        "gemini-2.5-flash-lite",
-        system_instruction=(
-            "You are an expert agronomist assistant for NWA. "
-            "Analyze the provided water metrics scientifically and return only JSON "
-            "matching the schema: summary (string), advice (string), risk_level "
-            "as Low, Medium, or High."
+async def _generate_with_timeout(
+    model: "genai.GenerativeModel",
+    prompt: str,
+    safety_settings: dict,
+    generation_config: dict,
+) -> tuple[str, object]:
+    """The response text and its usage_metadata."""
+    response = await asyncio.wait_for(
+        model.generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
         ),
+        timeout=GENERATION_TIMEOUT_SECONDS,
     )
-    prompt = _build_prompt(eto_result)
+    # Check for blocked response BEFORE accessing .text
+    return _candidate_text(response), getattr(response, "usage_metadata", None)
 
-    # Safety settings to prevent false positives in agronomic advice
-    safety_settings = {
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-    }
 
-    generation_config = {
-        "temperature": 0.2,
-        "max_output_tokens": 256,
-        "response_mime_type": "application/json",
-        "response_schema": RESPONSE_SCHEMA,
-    }
+def _missing_key_insight(eto_value: float) -> AgronomistInsight:
+    return AgronomistInsight(
+        summary="API key missing",
+        advice="Set GOOGLE_API_KEY to enable Gemini-powered insights.",
+        risk_level="Unknown",
+        eto_value=eto_value,
+        fallback=True,
+    )
+
 
+def _timeout_insight(eto_value: float) -> AgronomistInsight:
+    TIMEOUTS.inc(stage="gemini_call")
+    logger.warning("Gemini insight generation timed out")
+    return AgronomistInsight(
+        summary="Insight generation timed out.",
+        advice="Try again or reduce request load.",
+        risk_level=DEFAULT_RISK,
+        eto_value=eto_value,
+        fallback=True,
+    )
+
+
+def _insight_from_text(text: str, eto_value: float) -> AgronomistInsight:
+    """Validate the model's JSON answer; free text is kept as advice."""
     try:
-        text = await _generate_with_timeout(
-            model, prompt, safety_settings, generation_config
-        )
+        parsed = json.loads(text)
+        summary = parsed.get("summary", "").strip() or "Analysis generated."
+        advice = parsed.get("advice", "").strip() or text
+        risk_level = parsed.get("risk_level", DEFAULT_RISK)
+    except json.JSONDecodeError:
+        summary = "Analysis generated."
+        advice = text
+        risk_level = _parse_risk(text)
+    return AgronomistInsight(
+        summary=summary,
+        advice=advice,
+        risk_level=risk_level,
+        eto_value=eto_value,
+    )
+
+
+def _partial_fields(text: str) -> dict[str, str]:
+    """summary/advice decoded from an incomplete JSON response, as far as it goes."""
+    fields = {}
+    for match in _STREAMED_FIELD.finditer(text):
+        raw = _PARTIAL_ESCAPE.sub("", match.group(2))
         try:
-            parsed = json.loads(text)
-            summary = parsed.get("summary", "").strip() or "Analysis generated."
-            advice = parsed.get("advice", "").strip() or text
-            risk_level = parsed.get("risk_level", DEFAULT_RISK)
+            fields[match.group(1)] = json.loads(f'"{raw}"')
         except json.JSONDecodeError:
-            summary = "Analysis generated."
-            advice = text
-            risk_level = _parse_risk(text)
+            continue
+    return fields
+
+
+async def request_gemini(
+    eto_result: EToResult,
+    anomaly: ClimateAnomaly | None = None,
+    variant: PromptVariant | None = None,
+) -> tuple[str, GenerationUsage]:
+    """
+    One Gemini request with a prompt variant (NWA_HYDRO_PROMPT_VARIANT by default):
+    the raw JSON text and its usage. No fast path or fallbacks; raises on failure.
+    """
+    variant = variant or get_prompt_variant()
+    model, safety_settings = _model_and_safety_settings(variant)
+    started = time.perf_counter()
+    with track_stage("gemini_call"):
+        text, metadata = await _generate_with_timeout(
+            model, variant.build(eto_result, anomaly), safety_settings, GENERATION_CONFIG
+        )
+    return text, _record_usage(variant.name, metadata, time.perf_counter() - started)
+
+
+async def generate_agronomist_insight(
+    eto_result: EToResult, anomaly: ClimateAnomaly | None = None
+) -> AgronomistInsight:
+    """
+    Generate an agronomist insight using Google Gemini, with safe fallbacks for local/dev runs.
+    The climatology anomaly is looked up from the local baseline when not supplied.
+    Clear-cut days are answered by the rule-based fast path (see rules.py) without Gemini.
+    """
+    if anomaly is None:
+        anomaly = lookup_anomaly(eto_result)
+    insight = fast_path_insight(eto_result, anomaly)
+    if insight is not None:
+        return insight  # Clear-cut days need no API key.
+    if not os.getenv("GOOGLE_API_KEY"):
+        return _missing_key_insight(eto_result.eto)
+
+    variant = get_prompt_variant()  # Configuration errors propagate; they are not API errors.
+    try:
+        text, _ = await request_gemini(eto_result, anomaly, variant)
     except asyncio.TimeoutError:
-        logger.warning("Gemini insight generation timed out")
-        summary = "Insight generation timed out."
-        advice = "Try again or reduce request load."
-        risk_level = DEFAULT_RISK
+        return _timeout_insight(eto_result.eto)
     except Exception as exc:  # noqa: BLE001
         logger.error("Gemini insight generation failed: %s", exc)
+        FALLBACKS.inc(source="rule_based_insight")
         return _get_fallback_insight(eto_result.eto, "API error")
 
-    return AgronomistInsight(
-        summary=summary,
-        advice=advice,
-        risk_level=risk_level,
-        eto_value=eto_result.eto,
-    )
+    return _insight_from_text(text, eto_result.eto)
+
+
+@dataclass(frozen=True)
+class InsightUpdate:
+    """Streamed summary/advice so far; `insight` is set on the last update only."""
+    summary: str
+    advice: str
+    insight: AgronomistInsight | None = None
+
+
+def _final_update(insight: AgronomistInsight) -> InsightUpdate:
+    return InsightUpdate(insight.summary, insight.advice, insight)
+
+
+async def stream_agronomist_insight(
+    eto_result: EToResult, anomaly: ClimateAnomaly | None = None
+) -> AsyncIterator[InsightUpdate]:
+    """
+    Like generate_agronomist_insight, but yields the summary and advice while Gemini
+    is still writing them. The complete JSON is validated once the stream ends and
+    arrives as the last update, with the same fallbacks as the non-streaming call.
+    """
+    if anomaly is None:
+        anomaly = lookup_anomaly(eto_result)
+    insight = fast_path_insight(eto_result, anomaly)
+    if insight is not None:
+        yield _final_update(insight)
+        return
+    if not os.getenv("GOOGLE_API_KEY"):
+        yield _final_update(_missing_key_insight(eto_result.eto))
+        return
+
+    started = time.perf_counter()
+    deadline = time.monotonic() + GENERATION_TIMEOUT_SECONDS
+    text, metadata = "", None
+    variant = get_prompt_variant()
+    try:
+        model, safety_settings = _model_and_safety_settings(variant)
+        prompt = variant.build(eto_result, anomaly)
+        response = await asyncio.wait_for(
+            model.generate_content_async(
+                prompt,
+                generation_config=GENERATION_CONFIG,
+                safety_settings=safety_settings,
+                stream=True,
+            ),
+            timeout=GENERATION_TIMEOUT_SECONDS,
+        )
+        chunks = aiter(response)
+        while True:
+            # The deadline covers the whole stream, not each chunk.
+            remaining = max(deadline - time.monotonic(), 0.0)
+            try:
+                chunk = await asyncio.wait_for(anext(chunks), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            # Usage arrives with the last chunk; earlier ones may carry partial counts.
+            metadata = getattr(chunk, "usage_metadata", None) or metadata
+            piece = _candidate_text(chunk, require_parts=False)
+            if not piece:
+                continue
+            if not text:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="gemini_first_token")
+            text += piece
+            fields = _partial_fields(text)
+            yield InsightUpdate(fields.get("summary", ""), fields.get("advice", ""))
+        if not text:
+            raise ValueError("Empty content returned")
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage="gemini_call")
+        _record_usage(variant.name, metadata, seconds)
+        insight = _insight_from_text(text, eto_result.eto)
+    except asyncio.TimeoutError:
+        insight = _timeout_insight(eto_result.eto)
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Gemini insight streaming failed: %s", exc)
+        FALLBACKS.inc(source="rule_based_insight")
+        insight = _get_fallback_insight(eto_result.eto, "API error")
+    yield _final_update(insight)
 
 
 # ==========================================
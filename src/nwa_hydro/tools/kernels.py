@@ -0,0 +1,186 @@
+"""
+Low-level ETo kernels with interchangeable backends.
+
+- "numba":  compiled ufuncs (detected at import, imported and compiled on first use).
+- "numpy":  vectorized NumPy expressions.
+- "python": pure-Python loop over the scalar math; the reference implementation.
+
+All backends evaluate the same scalar formulas, so results agree to the last few ULPs.
+Override the auto-detected backend with NWA_HYDRO_KERNEL_BACKEND.
+"""
+import functools
+import importlib.util
+import logging
+import math
+import os
+
+import numpy as np
+
+# Optional accelerator; NumPy is always available. Importing numba costs ~0.2 s,
+# so only its presence is checked here.
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+logger = logging.getLogger(__name__)
+
+GSC = 0.0820  # MJ m-2 min-1, FAO-56 solar constant
+MM_PER_MJ = 0.408  # mm/day of evaporation per MJ m-2 day-1 (1 / latent heat of vaporization)
+KERNEL_BACKENDS = ("numba", "numpy", "python")
+# Above this many elements the compiled kernels fan out across CPU cores.
+PARALLEL_THRESHOLD = 1_000_000
+# Auto-selected numba only pays off (JIT compile on first call) for batches this large.
+NUMBA_MIN_SIZE = 10_000
+
+
+def _extraterrestrial_radiation(lat_rad: float, day_of_year: int) -> float:
+    """
+    Compute daily extraterrestrial radiation (Ra) in MJ m-2 day-1.
+    Implements FAO-56 equations (Allen et al., 1998).
+    """
+    dr = 1.0 + 0.033 * math.cos((2 * math.pi / 365) * day_of_year)
+    solar_declination = 0.409 * math.sin((2 * math.pi / 365) * day_of_year - 1.39)
+    tan_term = -math.tan(lat_rad) * math.tan(solar_declination)
+    # Clamp to avoid domain errors at extreme latitudes.
+    tan_term = min(1.0, max(-1.0, tan_term))
+    sunset_hour_angle = math.acos(tan_term)
+    ra = (
+        (24 * 60) / math.pi
+    ) * GSC * dr * (
+        sunset_hour_angle * math.sin(lat_rad) * math.sin(solar_declination)
+        + math.cos(lat_rad) * math.cos(solar_declination) * math.sin(sunset_hour_angle)
+    )
+    return ra
+
+
+def _hargreaves_from_ra(tmin: float, tmax: float, tmean: float, ra: float) -> float:
+    """ETo = 0.0023 * (Tmean + 17.8) * sqrt(Tmax - Tmin) * 0.408 * Ra (FAO-56 eq. 52)"""
+    return 0.0023 * (tmean + 17.8) * math.sqrt(max(tmax - tmin, 0.0)) * MM_PER_MJ * ra
+
+
+def _hargreaves(tmin: float, tmax: float, tmean: float, lat: float, day_of_year: float) -> float:
+    ra = _extraterrestrial_radiation(math.radians(lat), day_of_year)
+    return _hargreaves_from_ra(tmin, tmax, tmean, ra)
+
+
+# --- NUMPY BACKEND ---
+
+
+def _extraterrestrial_radiation_numpy(lat_rad: np.ndarray, doy: np.ndarray) -> np.ndarray:
+    dr = 1.0 + 0.033 * np.cos((2 * math.pi / 365) * doy)
+    solar_declination = 0.409 * np.sin((2 * math.pi / 365) * doy - 1.39)
+    tan_term = np.clip(-np.tan(lat_rad) * np.tan(solar_declination), -1.0, 1.0)
+    sunset_hour_angle = np.arccos(tan_term)
+    return ((24 * 60) / math.pi) * GSC * dr * (
+        sunset_hour_angle * np.sin(lat_rad) * np.sin(solar_declination)
+        + np.cos(lat_rad) * np.cos(solar_declination) * np.sin(sunset_hour_angle)
+    )
+
+
+def _hargreaves_numpy(tmin, tmax, tmean, lat, doy) -> np.ndarray:
+    ra = _extraterrestrial_radiation_numpy(np.radians(lat), doy)
+    return 0.0023 * (tmean + 17.8) * np.sqrt(np.maximum(tmax - tmin, 0.0)) * MM_PER_MJ * ra
+
+
+# --- PURE-PYTHON BACKEND ---
+
+
+def _extraterrestrial_radiation_python(lat_rad, doy) -> np.ndarray:
+    lat_b, doy_b = np.broadcast_arrays(np.asarray(lat_rad, float), np.asarray(doy, float))
+    pairs = zip(lat_b.flat, doy_b.flat, strict=True)
+    values = [_extraterrestrial_radiation(la, d) for la, d in pairs]
+    return np.array(values, dtype=np.float64).reshape(lat_b.shape)
+
+
+def _hargreaves_python(tmin, tmax, tmean, lat, doy) -> np.ndarray:
+    columns = np.broadcast_arrays(*(np.asarray(c, float) for c in (tmin, tmax, tmean, lat, doy)))
+    values = [_hargreaves(*row) for row in zip(*(c.flat for c in columns), strict=True)]
+    return np.array(values, dtype=np.float64).reshape(columns[0].shape)
+
+
+# --- NUMBA BACKEND ---
+
+
+def _build_numba_kernels() -> dict[str, object]:
+    """Compile the scalar formulas into serial and parallel float64 ufuncs."""
+    import numba
+
+    ra_jit = numba.njit(cache=True)(_extraterrestrial_radiation)
+    hargreaves_from_ra_jit = numba.njit(cache=True)(_hargreaves_from_ra)
+
+    def hargreaves(tmin, tmax, tmean, lat, day_of_year):
+        ra = ra_jit(math.radians(lat), day_of_year)
+        return hargreaves_from_ra_jit(tmin, tmax, tmean, ra)
+
+    ra_signature = ["float64(float64, float64)"]
+    hargreaves_signature = ["float64(float64, float64, float64, float64, float64)"]
+    return {
+        "ra": numba.vectorize(ra_signature, cache=True)(_extraterrestrial_radiation),
+        "ra_parallel": numba.vectorize(ra_signature, target="parallel")(
+            _extraterrestrial_radiation
+        ),
+        "hargreaves": numba.vectorize(hargreaves_signature)(hargreaves),
+        "hargreaves_parallel": numba.vectorize(hargreaves_signature, target="parallel")(
+            hargreaves
+        ),
+    }
+
+
+@functools.cache
+def _numba_kernels() -> dict[str, object]:
+    """Compile lazily so importing this module never pays JIT cost."""
+    return _build_numba_kernels()
+
+
+def available_backends() -> list[str]:
+    return [b for b in KERNEL_BACKENDS if b != "numba" or NUMBA_AVAILABLE]
+
+
+def _default_backend() -> str:
+    requested = os.getenv("NWA_HYDRO_KERNEL_BACKEND", "").strip().lower()
+    if requested in available_backends():
+        return requested
+    if requested:
+        logger.warning("Kernel backend '%s' unavailable; auto-detecting", requested)
+    return "numba" if NUMBA_AVAILABLE else "numpy"
+
+
+DEFAULT_BACKEND = _default_backend()
+
+
+def _resolve(backend: str | None, *arrays) -> str:
+    if backend is None:
+        backend = DEFAULT_BACKEND
+        # Small requests (single-record tool calls) never wait on a JIT compile.
+        if backend == "numba" and max(np.size(a) for a in arrays) < NUMBA_MIN_SIZE:
+            backend = "numpy"
+    if backend not in available_backends():
+        available = ", ".join(available_backends())
+        raise ValueError(f"Kernel backend '{backend}' unavailable. Available: {available}")
+    return backend
+
+
+def _numba_kernel(name: str, *arrays) -> np.ndarray:
+    size = max(np.size(a) for a in arrays)
+    variant = f"{name}_parallel" if size >= PARALLEL_THRESHOLD else name
+    return _numba_kernels()[variant](*(np.asarray(a, dtype=np.float64) for a in arrays))
+
+
+def extraterrestrial_radiation(lat_rad, doy, backend: str | None = None) -> np.ndarray:
+    """Vectorized Ra (MJ m-2 day-1) for arrays of latitude (radians) and day of year."""
+    backend = _resolve(backend, lat_rad, doy)
+    if backend == "numba":
+        return _numba_kernel("ra", lat_rad, doy)
+    if backend == "python":
+        return _extraterrestrial_radiation_python(lat_rad, doy)
+    return _extraterrestrial_radiation_numpy(np.asarray(lat_rad, float), np.asarray(doy, float))
+
+
+def hargreaves(tmin, tmax, tmean, lat, doy, backend: str | None = None) -> np.ndarray:
+    """Vectorized Hargreaves ETo (mm/day); lat in degrees. Inputs broadcast like ufuncs."""
+    backend = _resolve(backend, tmin, tmax, tmean, lat, doy)
+    if backend == "numba":
+        return _numba_kernel("hargreaves", tmin, tmax, tmean, lat, doy)
+    if backend == "python":
+        return _hargreaves_python(tmin, tmax, tmean, lat, doy)
+    return _hargreaves_numpy(
+        *(np.asarray(c, dtype=np.float64) for c in (tmin, tmax, tmean, lat, doy))
+    )
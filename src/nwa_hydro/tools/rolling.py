@@ -0,0 +1,268 @@
+"""
+Incrementally maintained rolling water-balance aggregates per site.
+
+Instead of rebuilding each window from raw daily records, every site keeps a
+ring buffer of its last 90 days of ETo and precipitation plus running window
+sums. Appending a day adds the new value and subtracts the one leaving each
+window, so an update is O(1) per site. A day can be applied to thousands of
+sites at once with one vectorized call. Sums are recomputed from the ring each
+time it wraps, so float rounding does not build up over years of updates.
+
+State is persisted as a .npz next to the climate store. `nwa-hydro ingest`
+advances it with the days it just stored:
+
+    state = RollingAggregates.load(ROLLING_PATH)
+    update_from_store(state, store)
+    state.save(ROLLING_PATH)
+"""
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Sequence
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from ..schemas import ClimateData, RollingWaterBalance
+from .science import ClimateArrays, compute_eto_array
+from .store import ClimateStore, site_coords
+
+logger = logging.getLogger(__name__)
+
+ROLLING_PATH = Path(os.getenv("NWA_HYDRO_ROLLING", "data/store/rolling.npz"))
+DEFAULT_WINDOWS = (7, 30, 90)
+# Ordinal stored for sites that have not received a day yet.
+NO_DATE = 0
+
+
+class RollingAggregates:
+    """Per-site ring buffers and running sums; one row per site."""
+
+    _ARRAYS = (
+        "coords", "last", "count", "eto_ring", "precipitation_ring", "eto_sums",
+        "precipitation_sums", "deficit", "balance",
+    )
+
+    def __init__(self, windows: Sequence[int] = DEFAULT_WINDOWS, method: str = "hargreaves"):
+        if not windows or min(windows) < 1:
+            raise ValueError("Rolling windows must be positive day counts")
+        self.windows = tuple(sorted(set(windows)))
+        self.method = method
+        self.capacity = self.windows[-1]
+        self._index: dict[tuple[float, float], int] = {}
+        self._size = 0
+        self._allocate(0)
+
+    def _allocate(self, rows: int) -> None:
+        self.coords = np.zeros((rows, 2))
+        self.last = np.full(rows, NO_DATE, dtype=np.int64)
+        self.count = np.zeros(rows, dtype=np.int64)
+        self.eto_ring = np.zeros((rows, self.capacity))
+        self.precipitation_ring = np.zeros((rows, self.capacity))
+        self.eto_sums = np.zeros((rows, len(self.windows)))
+        self.precipitation_sums = np.zeros((rows, len(self.windows)))
+        self.deficit = np.zeros(rows)
+        self.balance = np.zeros(rows)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int) -> None:
+        rows = self.last.shape[0]
+        if needed <= rows:
+            return
+        rows = max(needed, 2 * rows, 16)
+        for name in self._ARRAYS:
+            current = getattr(self, name)
+            grown = np.zeros((rows, *current.shape[1:]), dtype=current.dtype)
+            grown[: self._size] = current[: self._size]
+            setattr(self, name, grown)
+
+    def site_rows(self, coords: Sequence[tuple[float, float]]) -> np.ndarray:
+        """Row of each site, adding the ones not tracked yet."""
+        rows = np.empty(len(coords), dtype=np.int64)
+        for position, (lat, lon) in enumerate(coords):
+            key = site_coords(lat, lon)
+            row = self._index.get(key)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._index[key] = self._size
+                self.coords[row] = key
+                self._size += 1
+            rows[position] = row
+        return rows
+
+    def last_date(self, lat: float, lon: float) -> str | None:
+        row = self._index.get(site_coords(lat, lon))
+        if row is None or self.last[row] == NO_DATE:
+            return None
+        return date.fromordinal(int(self.last[row])).isoformat()
+
+    def append_day(
+        self,
+        day: str,
+        coords: Sequence[tuple[float, float]],
+        eto: np.ndarray,
+        precipitation: np.ndarray,
+    ) -> int:
+        """
+        Apply one day to many sites. Sites that already include the day are skipped,
+        so replays are harmless; a site missing the previous day raises ValueError.
+        Returns the number of sites updated.
+        """
+        eto = np.asarray(eto, dtype=np.float64)
+        precipitation = np.asarray(precipitation, dtype=np.float64)
+        if not (np.all(np.isfinite(eto)) and np.all(np.isfinite(precipitation))):
+            raise ValueError(f"ETo and precipitation for {day} must be finite")
+        ordinal = date.fromisoformat(day).toordinal()
+        rows = self.site_rows(coords)
+        last = self.last[rows]
+        gaps = (last != NO_DATE) & (last < ordinal - 1)
+        if np.any(gaps):
+            lat, lon = self.coords[rows[gaps][0]]
+            raise ValueError(
+                f"Site ({lat}, {lon}) has no data between "
+                f"{date.fromordinal(int(last[gaps][0])).isoformat()} and {day}"
+            )
+        fresh = last < ordinal
+        rows, eto, precipitation = rows[fresh], eto[fresh], precipitation[fresh]
+
+        count = self.count[rows]
+        slot = count % self.capacity
+        for k, window in enumerate(self.windows):
+            # The value leaving the window is read before the ring slot is overwritten.
+            leaving = (slot - window) % self.capacity
+            full = count >= window
+            self.eto_sums[rows, k] += eto - np.where(full, self.eto_ring[rows, leaving], 0.0)
+            self.precipitation_sums[rows, k] += precipitation - np.where(
+                full, self.precipitation_ring[rows, leaving], 0.0
+            )
+        self.eto_ring[rows, slot] = eto
+        self.precipitation_ring[rows, slot] = precipitation
+        self.deficit[rows] = np.maximum(self.deficit[rows] + eto - precipitation, 0.0)
+        self.balance[rows] += precipitation - eto
+        self.count[rows] = count + 1
+        self.last[rows] = ordinal
+
+        wrapped = rows[(count + 1) % self.capacity == 0]
+        if wrapped.size:
+            self._resum(wrapped)
+        return int(rows.size)
+
+    def _resum(self, rows: np.ndarray) -> None:
+        """Exact window sums for sites whose ring just wrapped (newest value in the last slot)."""
+        for k, window in enumerate(self.windows):
+            self.eto_sums[rows, k] = self.eto_ring[rows, -window:].sum(axis=1)
+            self.precipitation_sums[rows, k] = self.precipitation_ring[rows, -window:].sum(axis=1)
+
+    def append(self, lat: float, lon: float, day: str, eto: float, precipitation: float) -> bool:
+        """Apply one day to one site; False when the site already includes it."""
+        return bool(self.append_day(day, [(lat, lon)], np.array([eto]), np.array([precipitation])))
+
+    def get(self, lat: float, lon: float) -> RollingWaterBalance | None:
+        row = self._index.get(site_coords(lat, lon))
+        if row is None or self.last[row] == NO_DATE:
+            return None
+        count = int(self.count[row])
+        return RollingWaterBalance(
+            lat=lat,
+            lon=lon,
+            date=date.fromordinal(int(self.last[row])).isoformat(),
+            days=count,
+            method=self.method,
+            eto_sum={w: float(self.eto_sums[row, k]) for k, w in enumerate(self.windows)},
+            precipitation_sum={
+                w: float(self.precipitation_sums[row, k]) for k, w in enumerate(self.windows)
+            },
+            deficit={
+                w: float(self.eto_sums[row, k] - self.precipitation_sums[row, k])
+                for k, w in enumerate(self.windows)
+            },
+            complete_windows=[w for w in self.windows if count >= w],
+            cumulative_deficit=float(self.deficit[row]),
+            cumulative_balance=float(self.balance[row]),
+        )
+
+    def save(self, path: str | Path) -> Path:
+        """Atomic write: a reader never sees a half-written state."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            np.savez(
+                handle,
+                windows=np.array(self.windows),
+                method=self.method,
+                **{name: getattr(self, name)[: self._size] for name in self._ARRAYS},
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RollingAggregates":
+        with np.load(path) as data:
+            state = cls(data["windows"].tolist(), str(data["method"]))
+            state._size = int(data["last"].shape[0])
+            for name in cls._ARRAYS:
+                setattr(state, name, data[name].copy())
+        state._index = {(lat, lon): row for row, (lat, lon) in enumerate(state.coords.tolist())}
+        return state
+
+
+def update_from_store(state: RollingAggregates, store: ClimateStore) -> int:
+    """
+    Append every stored day after each site's last aggregated day, up to its
+    watermark. New sites start from their first stored day. Returns days applied.
+    """
+    records: list[ClimateData] = []
+    for name, lat, lon in store.sites():
+        watermark = store.watermark(lat, lon)
+        last = state.last_date(lat, lon)
+        start = (date.fromisoformat(last) + timedelta(days=1)).isoformat() if last else ""
+        if watermark is None or start > watermark:
+            continue
+        site_records = store.get_range(lat, lon, start, watermark)
+        first = start or (site_records[0].date if site_records else watermark)
+        expected = (date.fromisoformat(watermark) - date.fromisoformat(first)).days + 1
+        if len(site_records) != expected or (site_records and site_records[0].date != first):
+            logger.warning("Skipping rolling update for %s: stored days %s..%s have gaps",
+                           name, first, watermark)
+            continue
+        records.extend(site_records)
+    if not records:
+        return 0
+    eto, _ = compute_eto_array(ClimateArrays.from_records(records), state.method)
+    by_day: dict[str, list[int]] = {}
+    for position, record in enumerate(records):
+        by_day.setdefault(record.date, []).append(position)
+    precipitation = np.array([record.precipitation for record in records])
+    applied = 0
+    for day in sorted(by_day):
+        positions = by_day[day]
+        applied += state.append_day(
+            day,
+            [(records[p].lat, records[p].lon) for p in positions],
+            eto[positions],
+            precipitation[positions],
+        )
+    return applied
+
+
+_ROLLING: tuple[Path, float, RollingAggregates] | None = None
+_ROLLING_LOCK = threading.Lock()
+
+
+def get_rolling(path: Path | None = None) -> RollingAggregates | None:
+    """Persisted state, reloaded when an ingestion rewrites it; None before the first one."""
+    global _ROLLING
+    path = path or ROLLING_PATH
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    with _ROLLING_LOCK:
+        if _ROLLING is None or _ROLLING[:2] != (path, mtime):
+            _ROLLING = (path, mtime, RollingAggregates.load(path))
+        return _ROLLING[2]
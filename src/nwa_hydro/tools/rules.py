@@ -0,0 +1,150 @@
+"""
+Deterministic irrigation-risk rules that answer routine days without Gemini.
+
+Most days are clear-cut. The net demand (ETo minus rain) is far from a risk
+threshold, and the site's past week and the day-of-year climatology agree with
+it. For those days a templated answer says what Gemini would say, at once and
+at no cost.
+
+assess_risk() scores a day from its water balance and its anomaly and reports
+a confidence. The water balance is the daily net demand plus the site's 7-day
+deficit when `nwa-hydro ingest` tracks the site. The anomaly is ETo against the
+normal for the time of year. Only days below NWA_HYDRO_FAST_PATH_CONFIDENCE
+go to Gemini. INSIGHT_ROUTES counts both routes, and metrics.llm_bypass_rate()
+reports the share answered here.
+"""
+import os
+from dataclasses import dataclass
+from datetime import date
+
+from ..metrics import INSIGHT_ROUTES
+from ..schemas import AgronomistInsight, ClimateAnomaly, EToResult, RollingWaterBalance
+from .rolling import get_rolling
+
+FAST_PATH_ENABLED = os.getenv("NWA_HYDRO_FAST_PATH", "1") != "0"
+FAST_PATH_CONFIDENCE = float(os.getenv("NWA_HYDRO_FAST_PATH_CONFIDENCE", "0.8"))
+# A rolling balance older than this no longer describes the analysed day.
+MAX_BALANCE_AGE_DAYS = 1
+
+
+@dataclass(frozen=True)
+class RiskRules:
+    """
+    Thresholds of the rule model; the defaults match the Gemini fallback's ETo bands.
+    Demand is FAO-56 ETo in mm/day: Nicaraguan sites range from about 3.5 mm/day
+    (highlands, cool season) to 6 mm/day (dry corridor, April), so routine days
+    fall clearly into one band and days near 5 mm/day go to Gemini.
+    """
+    low_demand: float = 3.0  # mm/day of net demand below which risk is Low
+    high_demand: float = 5.0  # mm/day at or above which risk is High
+    margin: float = 0.75  # mm/day from the nearest threshold for full confidence
+    dry_week: float = 25.0  # 7-day deficit in mm that contradicts a Low answer
+    extreme_percentile: float = 90.0  # ETo percentile (or 100 minus it) that is unusual
+    conflict_penalty: float = 0.5  # confidence factor per contradicting signal
+
+
+DEFAULT_RULES = RiskRules()
+
+ADVICE = {
+    "Low": "Demand is covered. Keep the standard irrigation schedule and check soil "
+           "moisture before watering.",
+    "Medium": "Moderate demand. Irrigate every 2-3 days, replacing about {replace:.0f} mm "
+              "per event.",
+    "High": "High demand. Irrigate daily with about {replace:.0f} mm, early in the morning "
+            "or in the evening to limit losses.",
+}
+# Days of net demand each irrigation event should replace.
+REPLACE_DAYS = {"Low": 0, "Medium": 2.5, "High": 1}
+
+
+@dataclass(frozen=True)
+class RiskAssessment:
+    risk_level: str
+    confidence: float  # 0-1; 1 means every signal agrees and demand is far from a threshold
+    net_demand: float  # ETo minus precipitation, mm/day, floored at 0
+    conflicts: tuple[str, ...] = ()
+
+
+def assess_risk(
+    eto_result: EToResult,
+    anomaly: ClimateAnomaly | None = None,
+    balance: RollingWaterBalance | None = None,
+    rules: RiskRules = DEFAULT_RULES,
+) -> RiskAssessment:
+    """Risk level and confidence from the day's water balance, past week and climatology."""
+    net = max(eto_result.eto - eto_result.input_data.precipitation, 0.0)
+    if net < rules.low_demand:
+        risk, distance = "Low", rules.low_demand - net
+    elif net < rules.high_demand:
+        risk, distance = "Medium", min(net - rules.low_demand, rules.high_demand - net)
+    else:
+        risk, distance = "High", net - rules.high_demand
+
+    conflicts = []
+    percentile = anomaly.eto_percentile if anomaly is not None else None
+    if percentile is not None:
+        if risk == "Low" and percentile >= rules.extreme_percentile:
+            conflicts.append("ETo is unusually high for the season")
+        if risk == "High" and percentile <= 100.0 - rules.extreme_percentile:
+            conflicts.append("ETo is unusually low for the season")
+    week = balance.deficit.get(7) if balance is not None else None
+    if week is not None:
+        if risk == "Low" and week >= rules.dry_week:
+            conflicts.append(f"the last 7 days left a {week:.0f} mm deficit")
+        if risk == "High" and week <= 0.0:
+            conflicts.append("rain covered the last 7 days")
+
+    confidence = min(distance / rules.margin, 1.0) * rules.conflict_penalty ** len(conflicts)
+    return RiskAssessment(risk, round(confidence, 3), net, tuple(conflicts))
+
+
+def rule_based_insight(eto_result: EToResult, assessment: RiskAssessment,
+                       anomaly: ClimateAnomaly | None = None,
+                       balance: RollingWaterBalance | None = None) -> AgronomistInsight:
+    """Templated insight for a confident assessment."""
+    rain = eto_result.input_data.precipitation
+    summary = (
+        f"ETo of {eto_result.eto:.1f} mm/day against {rain:.1f} mm of rain leaves a net "
+        f"demand of {assessment.net_demand:.1f} mm/day."
+    )
+    if anomaly is not None and anomaly.eto_anomaly is not None:
+        direction = "above" if anomaly.eto_anomaly >= 0 else "below"
+        summary += (
+            f" Demand is {abs(anomaly.eto_anomaly):.1f} mm/day {direction} normal for the season."
+        )
+    if balance is not None and 7 in balance.deficit:
+        summary += f" The last 7 days show a {balance.deficit[7]:.0f} mm water deficit."
+    replace = assessment.net_demand * REPLACE_DAYS[assessment.risk_level]
+    return AgronomistInsight(
+        summary=summary,
+        advice=ADVICE[assessment.risk_level].format(replace=replace),
+        risk_level=assessment.risk_level,
+        eto_value=eto_result.eto,
+    )
+
+
+def site_balance(eto_result: EToResult) -> RollingWaterBalance | None:
+    """The site's rolling balance when it is tracked and current for the analysed day."""
+    data = eto_result.input_data
+    state = get_rolling() if data.lon is not None else None
+    balance = state.get(data.lat, data.lon) if state is not None else None
+    if balance is None:
+        return None
+    age = (date.fromisoformat(eto_result.date) - date.fromisoformat(balance.date)).days
+    return balance if 0 <= age <= MAX_BALANCE_AGE_DAYS else None
+
+
+def fast_path_insight(
+    eto_result: EToResult,
+    anomaly: ClimateAnomaly | None = None,
+    rules: RiskRules = DEFAULT_RULES,
+) -> AgronomistInsight | None:
+    """A rule-based insight when the rules are confident; None routes the day to Gemini."""
+    if FAST_PATH_ENABLED:
+        balance = site_balance(eto_result)
+        assessment = assess_risk(eto_result, anomaly, balance, rules)
+        if assessment.confidence >= FAST_PATH_CONFIDENCE:
+            INSIGHT_ROUTES.inc(route="rules")
+            return rule_based_insight(eto_result, assessment, anomaly, balance)
+    INSIGHT_ROUTES.inc(route="llm")
+    return None
@@ -1,35 +1,25 @@
 import math
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, fields
 from datetime import datetime
 
-from ..schemas import ClimateData, EToResult
-
-GSC = 0.0820  # MJ m-2 min-1, FAO-56 solar constant
+import numpy as np
 
+from ..metrics import track_stage
+from ..schemas import ClimateData, EToResult
+from . import kernels
+from .kernels import GSC, MM_PER_MJ, _extraterrestrial_radiation  # noqa: F401 (re-exported)
 
-def _extraterrestrial_radiation(lat_rad: float, day_of_year: int) -> float:
-    """
-    Compute daily extraterrestrial radiation (Ra) in MJ m-2 day-1.
-    Implements FAO-56 equations (Allen et al., 1998).
-    """
-    dr = 1.0 + 0.033 * math.cos((2 * math.pi / 365) * day_of_year)
-    solar_declination = 0.409 * math.sin((2 * math.pi / 365) * day_of_year - 1.39)
-    tan_term = -math.tan(lat_rad) * math.tan(solar_declination)
-    # Clamp to avoid domain errors at extreme latitudes.
-    tan_term = min(1.0, max(-1.0, tan_term))
-    sunset_hour_angle = math.acos(tan_term)
-    ra = (
-        (24 * 60) / math.pi
-    ) * GSC * dr * (
-        sunset_hour_angle * math.sin(lat_rad) * math.sin(solar_declination)
-        + math.cos(lat_rad) * math.cos(solar_declination) * math.sin(sunset_hour_angle)
-    )
-    return ra
+SIGMA = 4.903e-9  # MJ K-4 m-2 day-1, Stefan-Boltzmann constant
+ALBEDO = 0.23  # FAO-56 hypothetical grass reference crop
+PRIESTLEY_TAYLOR_ALPHA = 1.26
 
 
 def calculate_hargreaves_eto(climate_data: ClimateData) -> EToResult:
     """
     Calculate reference evapotranspiration (ETo) using FAO-56 Hargreaves (native math).
-    ETo = 0.0023 * (Tmean + 17.8) * sqrt(Tmax - Tmin) * Ra
+    ETo = 0.0023 * (Tmean + 17.8) * sqrt(Tmax - Tmin) * 0.408 * Ra
+    Ra is converted from MJ m-2 day-1 to its mm/day evaporation equivalent.
     """
     if climate_data.tmax < climate_data.tmin:
         raise ValueError("tmax must be greater than or equal to tmin")
@@ -40,7 +30,7 @@ def calculate_hargreaves_eto(climate_data: ClimateData) -> EToResult:
     lat_rad = math.radians(climate_data.lat)
     ra = _extraterrestrial_radiation(lat_rad, doy)
     delta_temp = max(climate_data.tmax - climate_data.tmin, 0.0)
-    eto = 0.0023 * (climate_data.tmean + 17.8) * math.sqrt(delta_temp) * ra
+    eto = 0.0023 * (climate_data.tmean + 17.8) * math.sqrt(delta_temp) * MM_PER_MJ * ra
 
     return EToResult(
         date=climate_data.date,
@@ -48,3 +38,214 @@ def calculate_hargreaves_eto(climate_data: ClimateData) -> EToResult:
         method="Hargreaves (Native)",
         input_data=climate_data,
     )
+
+
+# --- VECTORIZED METHOD REGISTRY ---
+
+
+@dataclass(frozen=True)
+class ClimateArrays:
+    """
+    Column-oriented view of a batch of ClimateData records.
+    Optional inputs that were not fetched are stored as NaN.
+    """
+    tmin: np.ndarray
+    tmax: np.ndarray
+    tmean: np.ndarray
+    lat: np.ndarray
+    doy: np.ndarray
+    humidity: np.ndarray
+    wind_speed: np.ndarray
+    solar_radiation: np.ndarray
+    elevation: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.tmin.shape[0])
+
+    def columns(self) -> tuple[np.ndarray, ...]:
+        """Arrays in field order, e.g. for shipping to a worker process."""
+        return tuple(getattr(self, field.name) for field in fields(self))
+
+    @classmethod
+    def from_records(cls, records: Sequence[ClimateData]) -> "ClimateArrays":
+        def column(name: str) -> np.ndarray:
+            values = [getattr(record, name) for record in records]
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+        dates = np.array([record.date for record in records], dtype="datetime64[D]")
+        doy = (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+        humidity = column("humidity")
+        # The schema defaults humidity to 0.0 when the source did not provide it.
+        humidity[humidity <= 0.0] = np.nan
+        return cls(
+            tmin=column("tmin"),
+            tmax=column("tmax"),
+            tmean=column("tmean"),
+            lat=column("lat"),
+            doy=doy.astype(np.float64),
+            humidity=humidity,
+            wind_speed=column("wind_speed"),
+            solar_radiation=column("solar_radiation"),
+            elevation=np.nan_to_num(column("elevation"), nan=0.0),
+        )
+
+
+EToKernel = Callable[[ClimateArrays], np.ndarray]
+
+
+@dataclass(frozen=True)
+class EToMethod:
+    """A registered ETo method: a vectorized kernel plus the optional inputs it needs."""
+    key: str
+    label: str
+    kernel: EToKernel
+    requires: tuple[str, ...] = ()
+
+    def missing_inputs(self, arrays: ClimateArrays) -> list[str]:
+        return [name for name in self.requires if np.isnan(getattr(arrays, name)).any()]
+
+
+ETO_METHODS: dict[str, EToMethod] = {}
+# Preference order used by method="auto": most physically complete first.
+AUTO_METHOD_ORDER = ("penman_monteith", "priestley_taylor", "hargreaves")
+
+
+def register_eto_method(
+    key: str, label: str, requires: tuple[str, ...] = ()
+) -> Callable[[EToKernel], EToKernel]:
+    """Decorator registering a vectorized kernel under a method key."""
+    def decorator(kernel: EToKernel) -> EToKernel:
+        ETO_METHODS[key] = EToMethod(key=key, label=label, kernel=kernel, requires=requires)
+        return kernel
+
+    return decorator
+
+
+def get_eto_method(key: str) -> EToMethod:
+    try:
+        return ETO_METHODS[key]
+    except KeyError as exc:
+        available = ", ".join(sorted(ETO_METHODS))
+        raise ValueError(f"Unknown ETo method '{key}'. Available: {available}, auto") from exc
+
+
+def _saturation_vapour_pressure(temp: np.ndarray) -> np.ndarray:
+    """FAO-56 eq. 11, kPa."""
+    return 0.6108 * np.exp(17.27 * temp / (temp + 237.3))
+
+
+def _net_radiation(arrays: ClimateArrays, ra: np.ndarray, ea: np.ndarray) -> np.ndarray:
+    """Net radiation Rn (FAO-56 eqs. 37-40), MJ m-2 day-1."""
+    rs = arrays.solar_radiation
+    rso = (0.75 + 2e-5 * arrays.elevation) * ra
+    relative_shortwave = np.clip(np.divide(rs, rso, out=np.ones_like(rs), where=rso > 0), 0.0, 1.0)
+    rns = (1.0 - ALBEDO) * rs
+    rnl = (
+        SIGMA
+        * ((arrays.tmax + 273.16) ** 4 + (arrays.tmin + 273.16) ** 4)
+        / 2.0
+        * (0.34 - 0.14 * np.sqrt(ea))
+        * (1.35 * relative_shortwave - 0.35)
+    )
+    return rns - rnl
+
+
+def _psychrometrics(arrays: ClimateArrays) -> tuple[np.ndarray, np.ndarray]:
+    """Return (slope of vapour pressure curve, psychrometric constant), kPa °C-1."""
+    pressure = 101.3 * ((293.0 - 0.0065 * arrays.elevation) / 293.0) ** 5.26
+    gamma = 0.000665 * pressure
+    delta = 4098.0 * _saturation_vapour_pressure(arrays.tmean) / (arrays.tmean + 237.3) ** 2
+    return delta, gamma
+
+
+def _actual_vapour_pressure(arrays: ClimateArrays, es: np.ndarray) -> np.ndarray:
+    """ea from mean relative humidity (eq. 19), or from Tmin when humidity is missing (eq. 48)."""
+    from_tmin = _saturation_vapour_pressure(arrays.tmin)
+    return np.where(np.isnan(arrays.humidity), from_tmin, arrays.humidity / 100.0 * es)
+
+
+@register_eto_method("hargreaves", "Hargreaves (Native)")
+def _hargreaves_kernel(arrays: ClimateArrays) -> np.ndarray:
+    return kernels.hargreaves(arrays.tmin, arrays.tmax, arrays.tmean, arrays.lat, arrays.doy)
+
+
+@register_eto_method(
+    "penman_monteith",
+    "FAO-56 Penman-Monteith",
+    requires=("humidity", "wind_speed", "solar_radiation"),
+)
+def _penman_monteith_kernel(arrays: ClimateArrays) -> np.ndarray:
+    ra = kernels.extraterrestrial_radiation(np.radians(arrays.lat), arrays.doy)
+    es = (_saturation_vapour_pressure(arrays.tmax) + _saturation_vapour_pressure(arrays.tmin)) / 2
+    ea = _actual_vapour_pressure(arrays, es)
+    delta, gamma = _psychrometrics(arrays)
+    rn = _net_radiation(arrays, ra, ea)  # Soil heat flux G ~ 0 at daily steps.
+    u2 = arrays.wind_speed
+    numerator = MM_PER_MJ * delta * rn + gamma * (900.0 / (arrays.tmean + 273.0)) * u2 * (es - ea)
+    return np.maximum(numerator / (delta + gamma * (1.0 + 0.34 * u2)), 0.0)
+
+
+@register_eto_method("priestley_taylor", "Priestley-Taylor", requires=("solar_radiation",))
+def _priestley_taylor_kernel(arrays: ClimateArrays) -> np.ndarray:
+    ra = kernels.extraterrestrial_radiation(np.radians(arrays.lat), arrays.doy)
+    es = (_saturation_vapour_pressure(arrays.tmax) + _saturation_vapour_pressure(arrays.tmin)) / 2
+    ea = _actual_vapour_pressure(arrays, es)
+    delta, gamma = _psychrometrics(arrays)
+    rn = _net_radiation(arrays, ra, ea)
+    return np.maximum(PRIESTLEY_TAYLOR_ALPHA * delta / (delta + gamma) * MM_PER_MJ * rn, 0.0)
+
+
+def resolve_eto_method(arrays: ClimateArrays, method: str = "hargreaves") -> EToMethod:
+    """
+    Resolve a method key for a batch. 'auto' picks the most complete method
+    whose inputs are present for every record.
+    """
+    if method == "auto":
+        for key in AUTO_METHOD_ORDER:
+            candidate = ETO_METHODS.get(key)
+            if candidate and not candidate.missing_inputs(arrays):
+                return candidate
+        return get_eto_method("hargreaves")
+
+    selected = get_eto_method(method)
+    missing = selected.missing_inputs(arrays)
+    if missing:
+        raise ValueError(
+            f"{selected.label} requires inputs that were not fetched: {', '.join(missing)}"
+        )
+    return selected
+
+
+def compute_eto_array(
+    arrays: ClimateArrays, method: str = "hargreaves"
+) -> tuple[np.ndarray, EToMethod]:
+    """Run a registered kernel over a column batch; returns (eto mm/day, method)."""
+    if np.any(arrays.tmax < arrays.tmin):
+        raise ValueError("tmax must be greater than or equal to tmin")
+    selected = resolve_eto_method(arrays, method)
+    with track_stage("eto_compute"):
+        return selected.kernel(arrays), selected
+
+
+def eto_from_columns(*columns: np.ndarray, method: str = "hargreaves") -> np.ndarray:
+    """Array-only entrypoint (picklable) for the batch executor; see ClimateArrays.columns."""
+    values, _ = compute_eto_array(ClimateArrays(*columns), method)
+    return values
+
+
+def calculate_eto_series(
+    records: Sequence[ClimateData], method: str = "hargreaves"
+) -> list[EToResult]:
+    """Calculate ETo for many records with a single vectorized kernel call."""
+    if not records:
+        return []
+    values, selected = compute_eto_array(ClimateArrays.from_records(records), method)
+    return [
+        EToResult(date=record.date, eto=float(value), method=selected.label, input_data=record)
+        for record, value in zip(records, values, strict=True)
+    ]
+
+
+def calculate_eto(climate_data: ClimateData, method: str = "hargreaves") -> EToResult:
+    """Calculate ETo for one record with the selected method ('auto' for best available)."""
+    return calculate_eto_series([climate_data], method)[0]
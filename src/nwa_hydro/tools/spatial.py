@@ -0,0 +1,201 @@
+"""
+Spatial index over known sites for nearest-neighbour and radius queries.
+
+A map click rarely lands on a site the climate store already holds, even when
+an ingested site is a few hundred metres away. At that distance Open-Meteo's
+~10 km reanalysis cells give the same series. Points are bucketed on a regular
+lat/lon grid (geohash-style cells). A query checks rings of cells around the
+query point, stops once the next ring cannot hold anything closer, and
+measures great-circle distances only for the candidates it found. For
+thousands of sites a query takes well under a millisecond.
+
+get_site_index() indexes the store's ingested sites (kind "archive") and the
+local CSV station (kind "station") when NWA_HYDRO_LOCAL_STATION gives its
+location. fusion.py reuses a site's series within NWA_HYDRO_NEAREST_KM.
+Longitudes are not wrapped at ±180°, which is irrelevant for Central America.
+"""
+import math
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from ..snapshots import parse_sites
+from .store import ClimateStore
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+# 0.1° cells (about 11 km): a tolerance of a few km touches at most 3x3 cells.
+DEFAULT_BUCKET_DEGREES = 0.1
+NEAREST_SITE_KM = float(os.getenv("NWA_HYDRO_NEAREST_KM", "2.0"))
+# 'Label:lat,lon' of the station behind data/samples/local_station.csv, when known.
+LOCAL_STATION = os.getenv("NWA_HYDRO_LOCAL_STATION", "")
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; broadcasts over arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64))
+                              for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+@dataclass(frozen=True)
+class Neighbor:
+    lat: float
+    lon: float
+    label: str
+    kind: str
+    distance_km: float
+
+
+class SpatialIndex:
+    """Points bucketed in square lat/lon cells; not thread-safe while adding."""
+
+    def __init__(self, bucket_degrees: float = DEFAULT_BUCKET_DEGREES) -> None:
+        if bucket_degrees <= 0:
+            raise ValueError("Bucket size must be positive")
+        self.bucket_degrees = bucket_degrees
+        self._points: list[tuple[float, float, str, str]] = []
+        self._buckets: dict[tuple[int, int], list[int]] = {}
+        self._coords: np.ndarray | None = None
+        self._extent: tuple[int, int, int, int] | None = None  # min/max row, min/max col
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _key(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.bucket_degrees), math.floor(lon / self.bucket_degrees)
+
+    def add(self, lat: float, lon: float, label: str = "", kind: str = "site") -> None:
+        row, col = self._key(lat, lon)
+        self._buckets.setdefault((row, col), []).append(len(self._points))
+        if self._extent is None:
+            self._extent = (row, row, col, col)
+        else:
+            low_row, high_row, low_col, high_col = self._extent
+            self._extent = (min(low_row, row), max(high_row, row),
+                            min(low_col, col), max(high_col, col))
+        self._points.append((float(lat), float(lon), label, kind))
+        self._coords = None
+
+    def _ring_floor_km(self, lat: float, ring: int) -> float:
+        """Lower bound on the distance to any point in cells `ring` steps away."""
+        if ring <= 1:
+            return 0.0
+        # Longitude degrees shrink towards the poles: use the widest latitude reached.
+        widest = min(abs(lat) + (ring + 1) * self.bucket_degrees, 89.9)
+        return (ring - 1) * self.bucket_degrees * KM_PER_DEGREE * math.cos(math.radians(widest))
+
+    def _candidates(self, lat: float, lon: float, ring: int) -> list[int]:
+        row, col = self._key(lat, lon)
+        if ring == 0:
+            return list(self._buckets.get((row, col), ()))
+        found = []
+        for r in range(row - ring, row + ring + 1):
+            step = 1 if abs(r - row) == ring else 2 * ring
+            for c in range(col - ring, col + ring + 1, step):
+                found.extend(self._buckets.get((r, c), ()))
+        return found
+
+    def _neighbors(
+        self, lat: float, lon: float, indices: list[int], radius_km: float, kind: str | None
+    ) -> list[Neighbor]:
+        if self._coords is None:
+            self._coords = np.array([(p[0], p[1]) for p in self._points]).reshape(-1, 2)
+        if kind is not None:
+            indices = [i for i in indices if self._points[i][3] == kind]
+        if not indices:
+            return []
+        coords = self._coords[indices]
+        distances = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+        return sorted(
+            (
+                Neighbor(*self._points[i], distance_km=float(d))
+                for i, d in zip(indices, distances, strict=True)
+                if d <= radius_km
+            ),
+            key=lambda neighbor: neighbor.distance_km,
+        )
+
+    def _rings(self, lat: float, lon: float):
+        """
+        Yield (ring, floor km, candidate indices) from the query cell outward. Once a
+        ring has more cells than there are buckets, yield every point with ring None.
+        """
+        row, col = self._key(lat, lon)
+        low_row, high_row, low_col, high_col = self._extent
+        last = max(row - low_row, high_row - row, col - low_col, high_col - col, 0)
+        for ring in range(last + 1):
+            if 8 * ring > len(self._buckets):
+                yield None, self._ring_floor_km(lat, ring), list(range(len(self._points)))
+                return
+            yield ring, self._ring_floor_km(lat, ring), self._candidates(lat, lon, ring)
+
+    def within(
+        self, lat: float, lon: float, radius_km: float, kind: str | None = None
+    ) -> list[Neighbor]:
+        """Points within radius_km, closest first."""
+        if not self._points:
+            return []
+        indices: list[int] = []
+        for ring, floor, candidates in self._rings(lat, lon):
+            if floor > radius_km:
+                break
+            if ring is None:
+                indices = candidates
+                break
+            indices.extend(candidates)
+        return self._neighbors(lat, lon, indices, radius_km, kind)
+
+    def nearest(
+        self, lat: float, lon: float, max_km: float = math.inf, kind: str | None = None
+    ) -> Neighbor | None:
+        """Closest point (optionally of one kind) within max_km, if any."""
+        if not self._points:
+            return None
+        best: Neighbor | None = None
+        for ring, floor, candidates in self._rings(lat, lon):
+            if floor > max_km or (best is not None and floor > best.distance_km):
+                break
+            found = self._neighbors(lat, lon, candidates, max_km, kind)
+            if found and (best is None or found[0].distance_km < best.distance_km):
+                best = found[0]
+            if ring is None:
+                break
+        return best
+
+
+def build_site_index(store: ClimateStore | None) -> SpatialIndex:
+    index = SpatialIndex()
+    if store is not None:
+        for name, lat, lon in store.sites():
+            index.add(lat, lon, name, "archive")
+    for name, (lat, lon) in parse_sites(LOCAL_STATION).items():
+        index.add(lat, lon, name, "station")
+    return index
+
+
+_INDEX: tuple[tuple, SpatialIndex] | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def _store_version(store: ClimateStore | None) -> tuple:
+    if store is None:
+        return (None,)
+    # In WAL mode commits touch the -wal file before the database file.
+    paths = (store.path, Path(f"{store.path}-wal"))
+    return store.path, *(path.stat().st_mtime_ns if path.exists() else 0 for path in paths)
+
+
+def get_site_index(store: ClimateStore | None) -> SpatialIndex:
+    """Index of the store's sites, rebuilt after an ingestion writes. Blocking."""
+    global _INDEX
+    version = (*_store_version(store), LOCAL_STATION)
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX[0] != version:
+            _INDEX = (version, build_site_index(store))
+        return _INDEX[1]
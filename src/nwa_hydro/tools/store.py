@@ -0,0 +1,147 @@
+"""
+Local climate store: daily records per site, filled ahead of time by `nwa-hydro ingest`.
+
+fusion.py reads it before calling Open-Meteo, so sites covered by the scheduled
+ingestion are answered locally. Records are keyed by coordinates rounded to four
+decimals (about 11 m) and the date. A per-site watermark stores the last day of
+contiguous history, which is where the next ingestion run picks up.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from ..schemas import ClimateData
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = Path(os.getenv("NWA_HYDRO_STORE", "data/store/climate.db"))
+COORD_DECIMALS = 4
+SOURCE_LABEL = "Archive"
+
+# (lat, lon, date, tmin, tmax, tmean, precipitation, humidity, wind_speed,
+#  solar_radiation, elevation)
+DailyRow = tuple[float, float, str, float, float, float, float, float,
+                 float | None, float | None, float]
+
+_COLUMNS = (
+    "lat, lon, date, tmin, tmax, tmean, precipitation, humidity, wind_speed, "
+    "solar_radiation, elevation"
+)
+
+
+def site_coords(lat: float, lon: float) -> tuple[float, float]:
+    return round(lat, COORD_DECIMALS), round(lon, COORD_DECIMALS)
+
+
+class ClimateStore:
+    """SQLite (WAL) table of daily records; safe to read while an ingestion writes."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS daily ("
+                "lat REAL NOT NULL, lon REAL NOT NULL, date TEXT NOT NULL, "
+                "tmin REAL NOT NULL, tmax REAL NOT NULL, tmean REAL NOT NULL, "
+                "precipitation REAL NOT NULL, humidity REAL NOT NULL, wind_speed REAL, "
+                "solar_radiation REAL, elevation REAL NOT NULL, "
+                "PRIMARY KEY (lat, lon, date)) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "lat REAL NOT NULL, lon REAL NOT NULL, site TEXT NOT NULL, "
+                "last_date TEXT NOT NULL, PRIMARY KEY (lat, lon))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are bound to their thread; asyncio.to_thread uses a pool.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def write(
+        self, rows: Iterable[DailyRow], watermarks: dict[tuple[str, float, float], str]
+    ) -> int:
+        """
+        Upsert daily rows and advance watermarks in one transaction, so an interrupted
+        ingestion never records a watermark for data it did not store.
+        """
+        rows = [(*site_coords(row[0], row[1]), *row[2:]) for row in rows]
+        with self._connection() as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO daily ({_COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows
+            )
+            connection.executemany(
+                "INSERT INTO watermarks (lat, lon, site, last_date) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (lat, lon) DO UPDATE SET site = excluded.site, "
+                "last_date = max(last_date, excluded.last_date)",
+                [
+                    (*site_coords(lat, lon), site, last_date)
+                    for (site, lat, lon), last_date in watermarks.items()
+                ],
+            )
+        return len(rows)
+
+    def watermark(self, lat: float, lon: float) -> str | None:
+        row = self._connection().execute(
+            "SELECT last_date FROM watermarks WHERE lat = ? AND lon = ?", site_coords(lat, lon)
+        ).fetchone()
+        return row[0] if row else None
+
+    def watermarks(self) -> dict[tuple[float, float], str]:
+        rows = self._connection().execute("SELECT lat, lon, last_date FROM watermarks")
+        return {(lat, lon): last_date for lat, lon, last_date in rows}
+
+    def sites(self) -> list[tuple[str, float, float]]:
+        """(name, lat, lon) of every site with ingested history."""
+        return self._connection().execute("SELECT site, lat, lon FROM watermarks").fetchall()
+
+    def get_range(
+        self, lat: float, lon: float, start_date: str, end_date: str
+    ) -> list[ClimateData]:
+        """Stored days in [start_date, end_date], in date order (may have gaps)."""
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM daily WHERE lat = ? AND lon = ? AND date BETWEEN ? AND ? "
+            "ORDER BY date",
+            (*site_coords(lat, lon), start_date, end_date),
+        ).fetchall()
+        return [
+            ClimateData(
+                lat=lat, lon=lon, date=date, tmin=tmin, tmax=tmax, tmean=tmean,
+                precipitation=precipitation, humidity=humidity, wind_speed=wind_speed,
+                solar_radiation=solar_radiation, elevation=elevation, source=SOURCE_LABEL,
+            )
+            for (_, _, date, tmin, tmax, tmean, precipitation, humidity, wind_speed,
+                 solar_radiation, elevation) in rows
+        ]
+
+    def get(self, lat: float, lon: float, date: str) -> ClimateData | None:
+        records = self.get_range(lat, lon, date, date)
+        return records[0] if records else None
+
+
+_STORE: ClimateStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> ClimateStore | None:
+    """Process-wide store at NWA_HYDRO_STORE; None until an ingestion has created it."""
+    global _STORE
+    if _STORE is not None and _STORE.path == STORE_PATH:
+        return _STORE
+    if not STORE_PATH.exists():
+        return None
+    with _STORE_LOCK:
+        if _STORE is None or _STORE.path != STORE_PATH:
+            _STORE = ClimateStore(STORE_PATH)
+            logger.info("Reading archived climate data from %s", STORE_PATH)
+    return _STORE
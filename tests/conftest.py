@@ -0,0 +1,20 @@
+import pytest
+
+from nwa_hydro.health import MONITOR
+
+
+@pytest.fixture(autouse=True)
+def _reset_health_monitor():
+    """Outcomes observed by one test must not make fusion skip upstreams in the next."""
+    MONITOR.reset()
+    yield
+    MONITOR.reset()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_climate_store(tmp_path, monkeypatch):
+    """A store left behind by a local `nwa-hydro ingest` must not answer fusion in tests."""
+    monkeypatch.setattr("nwa_hydro.tools.store.STORE_PATH", tmp_path / "store" / "climate.db")
+    monkeypatch.setattr("nwa_hydro.tools.rolling.ROLLING_PATH", tmp_path / "store" / "rolling.npz")
+    monkeypatch.setattr("nwa_hydro.tools.hourly.HOURLY_PATH", tmp_path / "store" / "hourly")
+    monkeypatch.setattr("nwa_hydro.jobs.JOBS_PATH", tmp_path / "jobs")
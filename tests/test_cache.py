@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from nwa_hydro.cache import (
+    DiskCache,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    cache_key,
+    get_or_compute,
+)
+from nwa_hydro.schemas import ClimateData
+
+
+class DictRedis:
+    """Minimal client with redis-py's get/set/delete/eval signatures."""
+
+    def __init__(self):
+        self.items = {}
+
+    def get(self, key):
+        value, expires_at = self.items.get(key, (None, None))
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key, value, px=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        value = value.encode() if isinstance(value, str) else value
+        self.items[key] = (value, None if px is None else time.time() + px / 1000)
+        return True
+
+    def delete(self, key):
+        self.items.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        """Stands in for RedisCache's compare-and-delete unlock script only."""
+        if self.get(key) == token.encode():
+            self.delete(key)
+            return 1
+        return 0
+
+
+@pytest.fixture(params=["memory", "disk", "sqlite", "redis"])
+def backend(request, tmp_path):
+    return {
+        "memory": lambda: MemoryCache(),
+        "disk": lambda: DiskCache(tmp_path / "cache"),
+        "sqlite": lambda: SQLiteCache(tmp_path / "cache.db"),
+        "redis": lambda: RedisCache(DictRedis()),
+    }[request.param]()
+
+
+def test_backends_roundtrip_expire_and_lock(backend):
+    """Every backend stores bytes, honours TTL and hands a key lock to one holder."""
+    backend.set("a", b"payload")
+    backend.set("b", b"stale", ttl=0.01)
+    time.sleep(0.02)
+
+    assert backend.get("a") == b"payload"
+    assert backend.get("b") is None
+    assert backend.try_lock("a")
+    assert not backend.try_lock("a")
+    backend.unlock("a")
+    assert backend.try_lock("a")
+
+
+def test_redis_unlock_leaves_a_lock_taken_after_expiry():
+    client = DictRedis()
+    first, second = RedisCache(client), RedisCache(client)
+    assert first.try_lock("k", ttl=0.01)
+    time.sleep(0.02)
+    assert second.try_lock("k")
+
+    first.unlock("k")
+
+    assert not first.try_lock("k")
+    second.unlock("k")
+    assert first.try_lock("k")
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_sqlite_compute_once(tmp_path):
+    """Separate backend instances (one per worker) single-flight the same key."""
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return ClimateData(
+            date="2023-01-01", tmin=18.0, tmax=28.0, tmean=23.0, lat=12.9, source="API"
+        )
+
+    workers = [SQLiteCache(tmp_path / "shared.db") for _ in range(4)]
+    key = cache_key("climate", 12.9256, -85.9189, "2023-01-01")
+    results = await asyncio.gather(
+        *(get_or_compute(key, fetch, ClimateData, cache=cache) for cache in workers)
+    )
+
+    assert calls == 1
+    assert {result.tmean for result in results} == {23.0}
@@ -0,0 +1,100 @@
+import httpx
+import numpy as np
+import pytest
+
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools import climatology as climatology_module
+from nwa_hydro.tools.climatology import (
+    Climatology,
+    build_climatology,
+    build_climatology_from_archive,
+    get_climatology,
+    lookup_anomaly,
+)
+from nwa_hydro.tools.grid import GridSpec
+from nwa_hydro.tools.intelligence import _build_prompt
+from nwa_hydro.tools.science import calculate_hargreaves_eto
+
+
+def _synthetic_climatology() -> Climatology:
+    spec = GridSpec(12.0, -86.0, 13.0, -85.0, resolution=0.5)
+    dates = np.arange("2001-01-01", "2011-01-01", dtype="datetime64[D]")
+    cells = spec.shape[0] * spec.shape[1]
+    # Every cell sees ETo cycling uniformly through 1..10 mm/day; rain is constant 2 mm.
+    eto = np.tile(np.arange(dates.size) % 10 + 1.0, (cells, 1))
+    precipitation = np.full((cells, dates.size), 2.0)
+    return build_climatology(spec, dates, eto, precipitation, method="Hargreaves (Native)")
+
+
+def test_climatology_lookup_roundtrip(tmp_path):
+    """Saved baselines should reload and give anomalies and percentile ranks."""
+    climatology = Climatology.load(_synthetic_climatology().save(tmp_path / "clim.npz"))
+
+    anomaly = climatology.lookup(12.3, -85.7, "2023-03-15", eto=9.5, precipitation=0.0)
+
+    assert anomaly.day_of_year == 74
+    assert anomaly.eto_normal == pytest.approx(5.5, abs=0.2)
+    assert anomaly.eto_anomaly == pytest.approx(4.0, abs=0.2)
+    assert anomaly.eto_percentile > 90
+    assert anomaly.precipitation_anomaly == pytest.approx(-2.0)
+    assert climatology.lookup(20.0, -85.7, "2023-03-15") is None
+    # ETo from another method is not comparable with a Hargreaves baseline.
+    assert climatology.lookup(12.3, -85.7, "2023-03-15", eto=9.5,
+                              method="FAO-56 Penman-Monteith") is None
+
+
+def test_baseline_is_picked_up_once_built_and_matches_the_method(tmp_path, monkeypatch):
+    path = tmp_path / "clim.npz"
+    monkeypatch.setattr(climatology_module, "CLIMATOLOGY_PATH", path)
+    climate = ClimateData(date="2023-03-15", tmin=18.5, tmax=28.2, tmean=23.4,
+                          lat=12.3, lon=-85.7, source="CSV")
+    eto_result = calculate_hargreaves_eto(climate)
+    assert get_climatology() is None and lookup_anomaly(eto_result) is None
+
+    _synthetic_climatology().save(path)
+
+    assert lookup_anomaly(eto_result).eto_normal == pytest.approx(5.5, abs=0.2)
+    other_method = eto_result.model_copy(update={"method": "Priestley-Taylor"})
+    assert lookup_anomaly(other_method) is None
+
+
+@pytest.mark.asyncio
+async def test_penman_monteith_baseline_fetches_its_inputs(httpx_mock):
+    spec = GridSpec(12.0, -86.0, 12.5, -85.5, resolution=0.5)
+    dates = [f"2001-01-{day:02d}" for day in range(1, 11)]
+    requested = []
+
+    def _archive(request: httpx.Request) -> httpx.Response:
+        requested.extend(request.url.params.get_list("daily"))
+        daily = {"time": dates, "temperature_2m_min": [18.0] * 10,
+                 "temperature_2m_max": [30.0] * 10, "temperature_2m_mean": [24.0] * 10,
+                 "precipitation_sum": [0.0] * 10, "relative_humidity_2m_mean": [70.0] * 10,
+                 "wind_speed_10m_mean": [3.0] * 10, "shortwave_radiation_sum": [None] + [20.0] * 9}
+        return httpx.Response(200, json={"elevation": 300.0, "daily": daily})
+
+    httpx_mock.add_callback(_archive)
+
+    baseline = await build_climatology_from_archive(
+        spec, "2001-01-01", "2001-01-10", "penman_monteith", window=0
+    )
+
+    assert {"relative_humidity_2m_mean", "wind_speed_10m_mean",
+            "shortwave_radiation_sum"} <= set(requested)
+    assert baseline.method == "FAO-56 Penman-Monteith"
+    assert np.isnan(baseline.eto_mean[0, 0, 0])  # The day without radiation is left out.
+    assert 2.0 < baseline.eto_mean[0, 0, 1] < 6.0
+    with pytest.raises(ValueError):
+        await build_climatology_from_archive(spec, "2001-01-01", "2001-01-10", "auto")
+
+
+def test_prompt_includes_climatology_context():
+    """_build_prompt should surface the anomaly when one is available."""
+    eto_result = calculate_hargreaves_eto(
+        ClimateData(date="2023-03-15", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.3, source="CSV")
+    )
+    anomaly = _synthetic_climatology().lookup(12.3, -85.7, "2023-03-15", eto=eto_result.eto)
+
+    prompt = _build_prompt(eto_result, anomaly)
+
+    assert "ETo vs. normal" in prompt
+    assert "ETo vs. normal" not in _build_prompt(eto_result)
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from pydantic import TypeAdapter
+
+from nwa_hydro.cache import MemoryCache, cache_key, get_or_compute
+from nwa_hydro.codec import decode_arrays, decode_columns, decode_series, encode_series
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools.science import ClimateArrays
+
+
+def _year(lat: float = 12.9256, lon: float = -85.9189) -> list[ClimateData]:
+    start = date(2023, 1, 1)
+    return [
+        ClimateData(
+            date=(start + timedelta(days=i)).isoformat(), lat=lat, lon=lon, source="API (Range)",
+            tmin=18.0 + (i % 7) / 10, tmax=29.5 + (i % 5) / 10, tmean=23.7,
+            precipitation=round((i % 13) * 1.7, 1), humidity=80.0,
+            wind_speed=None if i % 30 == 0 else 1.23, solar_radiation=18.42,
+            elevation=1033.0,
+        )
+        for i in range(365)
+    ]
+
+
+def test_year_round_trips_at_source_precision_in_a_few_kb():
+    records = _year()
+    blob = encode_series(records)
+
+    assert len(blob) < 8_000
+    assert len(blob) * 20 < len(TypeAdapter(list[ClimateData]).dump_json(records))
+    assert decode_series(blob) == records
+
+    arrays = decode_arrays(blob)
+    expected = ClimateArrays.from_records(records)
+    for name in ("tmin", "tmax", "doy", "humidity", "wind_speed", "solar_radiation"):
+        np.testing.assert_allclose(getattr(arrays, name), getattr(expected, name))
+
+
+def test_out_of_range_columns_fall_back_to_float32_and_raw_decode_is_zero_copy():
+    records = _year()[:3]
+    records[1] = records[1].model_copy(update={"precipitation": 4321.5})
+
+    blob = encode_series(records, compress=False)
+    metadata, columns = decode_columns(blob, dequantize=False)
+
+    assert metadata["decimals"]["precipitation"] is None  # 43215 steps overflow int16
+    assert columns["precipitation"].dtype == np.float32
+    assert columns["tmin"].dtype == np.int16 and metadata["decimals"]["tmin"] == 1
+    assert np.shares_memory(columns["tmin"], np.frombuffer(blob, dtype=np.uint8))
+    assert decode_series(blob)[1].precipitation == pytest.approx(4321.5)
+
+
+def test_mixed_sites_and_unordered_dates_are_rejected():
+    records = _year()[:2]
+    with pytest.raises(ValueError):
+        encode_series([records[0], _year(lat=11.0)[1]])
+    with pytest.raises(ValueError):
+        encode_series(records[::-1])
+
+
+@pytest.mark.asyncio
+async def test_cache_stores_series_with_the_codec():
+    cache = MemoryCache()
+    key = cache_key("climate_series", 12.9256, -85.9189, "2023-01-01", "2023-12-31")
+
+    async def fetch():
+        return _year()
+
+    first = await get_or_compute(
+        key, fetch, list[ClimateData], cache=cache, encode=encode_series, decode=decode_series
+    )
+    cached = await get_or_compute(
+        key, fetch, list[ClimateData], cache=cache, encode=encode_series, decode=decode_series
+    )
+
+    assert cache.get(key).startswith(b"NWCS")
+    assert cached == first
@@ -0,0 +1,37 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from nwa_hydro.executor import BatchExecutor, ExecutorSaturatedError
+from nwa_hydro.tools import kernels
+
+
+@pytest.mark.asyncio
+async def test_batch_executor_matches_in_process_result():
+    """Offloaded kernels must return the same values as an in-loop call."""
+    executor = BatchExecutor(max_workers=1, inline_threshold=0)
+    tmin = np.linspace(15.0, 22.0, 2_000)
+    try:
+        result = await executor.run(kernels.hargreaves, tmin, tmin + 9.0, tmin + 4.5, 12.9, 45.0)
+    finally:
+        executor.shutdown()
+
+    expected = kernels.hargreaves(tmin, tmin + 9.0, tmin + 4.5, 12.9, 45.0)
+    np.testing.assert_allclose(result, expected, rtol=1e-13)
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_executor_applies_backpressure():
+    """A full queue should make later callers fail once their wait timeout expires."""
+    executor = BatchExecutor(max_workers=1, max_pending=1, inline_threshold=0)
+    data = np.ones(10)
+    try:
+        first = asyncio.create_task(executor.run(np.sqrt, data))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(np.sqrt, data, wait_timeout=0.01)
+        assert (await first).tolist() == [1.0] * 10
+    finally:
+        executor.shutdown()
@@ -0,0 +1,136 @@
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.server import download_export, export_climate_eto
+from nwa_hydro.tools import export
+from nwa_hydro.tools.export import EXPORT_COLUMNS, export_sites
+
+
+def _fake_range(fetched):
+    async def fake_range(lat, lon, start_date, end_date):
+        fetched.append((lat, lon))
+        if lat > 50:
+            return []
+        return [
+            ClimateData(date=f"2024-01-{day:02d}", tmin=18.0, tmax=30.0 + day, tmean=24.0,
+                        lat=lat, lon=lon, precipitation=1.5, source="API (Range)")
+            for day in range(1, 11)
+        ]
+    return fake_range
+
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_site_by_site(tmp_path, monkeypatch):
+    fetched, written = [], []
+    monkeypatch.setattr(export, "fetch_climate_range", _fake_range(fetched))
+    original = export._CsvSink.write
+
+    def write(self, batch):
+        written.append(len(batch["date"]))
+        original(self, batch)
+
+    monkeypatch.setattr(export._CsvSink, "write", write)
+    sites = {f"Site {i}": (12.0 + i / 100, -86.0) for i in range(5)} | {"Nowhere": (60.0, 10.0)}
+
+    summary = await export_sites(sites, "2024-01-01", "2024-01-10", tmp_path / "out.csv",
+                                 concurrency=2)
+
+    assert (summary.rows, summary.sites, summary.skipped) == (50, 5, ["Nowhere"])
+    assert written == [10] * 5
+    assert len(fetched) == 6
+    with open(summary.path, newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert tuple(rows[0]) == EXPORT_COLUMNS
+    assert [row["site"] for row in rows[::10]] == [f"Site {i}" for i in range(5)]
+    assert (rows[0]["date"], rows[0]["lon"], rows[0]["method"]) == (
+        "2024-01-01", "-86.0", "Hargreaves (Native)"
+    )
+    assert float(rows[-1]["eto"]) > float(rows[0]["eto"]) > 0
+
+    with pytest.raises(ValueError):
+        await export_sites(sites, "2024-01-01", "2024-01-10", tmp_path / "out.xlsx", "xlsx")
+    with pytest.raises(ValueError, match="already exists"):
+        await export_sites(sites, "2024-01-01", "2024-01-10", tmp_path / "out.csv")
+    assert len(open(summary.path).readlines()) == 51  # The first export was not truncated.
+
+
+@pytest.mark.asyncio
+async def test_only_generated_exports_are_pruned_after_the_retention_period(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export, "fetch_climate_range", _fake_range([]))
+    monkeypatch.setattr(export, "EXPORT_PATH", tmp_path)
+    generated = tmp_path / "generated"
+    generated.mkdir()
+    stale = generated / "export-0123456789ab.csv"
+    # Client-named raster exports (a zarr store is a directory) are never touched.
+    kept = [tmp_path / "export-day1.nc", generated / "export-notes.csv"]
+    zarr = generated / "export-abcdefabcdef.parquet"
+    zarr.mkdir()
+    for path in (stale, *kept):
+        path.write_text("x")
+    for path in (stale, zarr, *kept):
+        os.utime(path, (time.time() - 2 * 86400,) * 2)
+
+    summary = await export_sites({"Matagalpa": (12.9, -85.9)}, "2024-01-01", "2024-01-10")
+
+    assert not stale.exists()
+    assert zarr.is_dir() and all(path.exists() for path in kept)
+    assert os.path.dirname(summary.path) == str(generated)
+    with pytest.raises(ValueError, match="site-days"):
+        await export_sites({f"S{i}": (12.0, -86.0) for i in range(60)},
+                           "2023-01-01", "2023-12-31")
+
+
+@pytest.mark.asyncio
+async def test_columnar_exports_through_the_mcp_tool(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_PATH", tmp_path)
+    fetched = []
+    fake_range = _fake_range(fetched)
+
+    async def without_humidity_at_leon(lat, lon, start_date, end_date):
+        records = await fake_range(lat, lon, start_date, end_date)
+        if lat < 12.5:  # Leon: fully present; Matagalpa first with an all-null column.
+            return [record.model_copy(update={"humidity": 60.0}) for record in records]
+        return records
+
+    monkeypatch.setattr(export, "fetch_climate_range", without_humidity_at_leon)
+    sites = "Matagalpa:12.9256,-85.9189;Leon:12.4379,-86.8780"
+    bad = json.loads(await export_climate_eto("Matagalpa:north", "2024-01-01", "2024-01-10"))
+    assert "error" in bad
+
+    summary = json.loads(await export_climate_eto(sites, "2024-01-01", "2024-01-10"))
+    assert summary["path"] == str(tmp_path / "generated" / summary["name"])
+    assert summary["url"] == f"/exports/{summary['name']}"
+    response = await download_export(SimpleNamespace(path_params={"name": summary["name"]}))
+    assert (response.status_code, response.path) == (200, Path(summary["path"]))
+    for name in ("missing", "../generated/" + summary["name"]):
+        response = await download_export(SimpleNamespace(path_params={"name": name}))
+        assert response.status_code == 404
+
+    try:
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        missing = json.loads(await export_climate_eto(
+            sites, "2024-01-01", "2024-01-10", "parquet"
+        ))
+        assert "pyarrow" in missing["detail"]
+        return
+
+    summary = json.loads(await export_climate_eto(sites, "2024-01-01", "2024-01-10", "parquet"))
+    parquet = pyarrow.parquet.ParquetFile(summary["path"])
+    assert (parquet.metadata.num_rows, parquet.num_row_groups) == (20, 2)
+    assert parquet.schema_arrow.field("humidity").type == pyarrow.float64()
+
+    summary = json.loads(await export_climate_eto(sites, "2024-01-01", "2024-01-10", "arrow"))
+    with pyarrow.ipc.open_file(summary["path"]) as reader:
+        assert reader.num_record_batches == 2
+        assert reader.read_all().column_names == list(EXPORT_COLUMNS)
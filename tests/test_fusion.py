@@ -0,0 +1,114 @@
+import asyncio
+from datetime import date, timedelta
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from nwa_hydro.health import MONITOR
+from nwa_hydro.metrics import FETCH_REQUESTS
+from nwa_hydro.tools.fusion import (
+    FetchRequest,
+    fetch_climate_data,
+    fetch_climate_range,
+    plan_fetches,
+)
+
+
+def test_plan_merges_overlapping_ranges_variables_and_locations():
+    requests = [
+        FetchRequest(12.9, -85.9, "2023-01-01", "2023-01-07"),
+        FetchRequest(12.9, -85.9, "2023-01-07", "2023-01-07", daily=("wind_speed_10m_max",)),
+        FetchRequest(12.9, -85.9, "2023-01-03", "2023-01-03", hourly=("temperature_2m",)),
+        FetchRequest(11.9, -86.3, "2023-01-01", "2023-01-07"),
+        FetchRequest(11.9, -86.3, "2023-06-01", "2023-06-01"),  # Too far apart to merge.
+    ]
+
+    calls = plan_fetches(requests, max_gap_days=7)
+
+    assert len(calls) == 2
+    week = next(call for call in calls if call.start_date == "2023-01-01")
+    assert week.coords == [(12.9, -85.9), (11.9, -86.3)]
+    assert week.end_date == "2023-01-07"
+    assert "wind_speed_10m_max" in week.daily and week.hourly == ("temperature_2m",)
+    assert sorted(week.members) == [(0, 0), (1, 0), (2, 0), (3, 1)]
+
+
+def _archive(request: httpx.Request) -> httpx.Response:
+    params = parse_qs(request.url.query.decode())
+    lats = [float(lat) for lat in params["latitude"][0].split(",")]
+    start = date.fromisoformat(params["start_date"][0])
+    end = date.fromisoformat(params["end_date"][0])
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    locations = [
+        {
+            "elevation": 100.0 * index,
+            "daily": {
+                "time": days,
+                "temperature_2m_min": [lat] * len(days),
+                "temperature_2m_max": [lat + 10] * len(days),
+                "temperature_2m_mean": [lat + 5] * len(days),
+                "precipitation_sum": [float(day[-2:]) for day in days],
+            },
+        }
+        for index, lat in enumerate(lats)
+    ]
+    return httpx.Response(200, json=locations if len(locations) > 1 else locations[0])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_upstream_call(httpx_mock):
+    """A dashboard-style burst (range + days at several sites) becomes one Open-Meteo call."""
+    httpx_mock.add_callback(_archive)
+    sent = FETCH_REQUESTS.value(kind="sent")
+
+    history, *days = await asyncio.gather(
+        fetch_climate_range(12.0, -86.0, "2023-01-01", "2023-01-07"),
+        fetch_climate_data(12.0, -86.0, "2023-01-07"),
+        fetch_climate_data(13.0, -85.0, "2023-01-01"),
+        fetch_climate_data(11.0, -84.0, "2023-01-05"),
+    )
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert FETCH_REQUESTS.value(kind="sent") == sent + 1
+    assert [record.date for record in history] == [f"2023-01-0{d}" for d in range(1, 8)]
+    assert [(day.date, day.tmin, day.precipitation) for day in days] == [
+        ("2023-01-07", 12.0, 7.0),
+        ("2023-01-01", 13.0, 1.0),
+        ("2023-01-05", 11.0, 5.0),
+    ]
+    assert {day.source for day in days} == {"API"}
+
+
+@pytest.mark.asyncio
+async def test_only_outages_mark_open_meteo_down(httpx_mock):
+    """A rejected request (4xx) falls back on its own; 429 and 5xx trip the outage state."""
+    httpx_mock.add_response(status_code=400)
+    await fetch_climate_data(12.0, -85.0, "2023-01-01")
+    assert not MONITOR.is_down("open_meteo")
+
+    httpx_mock.add_response(status_code=429)
+    await fetch_climate_data(12.0, -85.0, "2023-01-02")
+    assert MONITOR.is_down("open_meteo")
+
+
+@pytest.mark.asyncio
+async def test_rejected_merged_call_is_retried_per_request(httpx_mock):
+    """A 4xx caused by one request must not fail the others merged into the same call."""
+    def _reject_bad_site(request: httpx.Request) -> httpx.Response:
+        latitude = request.url.params["latitude"]
+        if "," in latitude or float(latitude) == 12.0:
+            return httpx.Response(400, json={"reason": "bad request"})
+        return _archive(request)
+
+    httpx_mock.add_callback(_reject_bad_site, is_reusable=True)
+
+    bad, good = await asyncio.gather(
+        fetch_climate_data(12.0, -85.0, "2023-01-02"),
+        fetch_climate_data(13.0, -85.0, "2023-01-02"),
+    )
+
+    assert len(httpx_mock.get_requests()) == 3
+    assert (bad.source, good.source) == ("CSV", "API")
+    assert good.tmin == 13.0
+    assert not MONITOR.is_down("open_meteo")
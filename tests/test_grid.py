@@ -0,0 +1,125 @@
+import httpx
+import numpy as np
+import pytest
+
+from nwa_hydro.health import MONITOR
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools.grid import (
+    ClimateGrid,
+    GridSpec,
+    compute_eto_raster,
+    export_eto_raster,
+    fetch_climate_grid,
+    load_eto_raster,
+    resolve_export_path,
+)
+from nwa_hydro.tools.science import calculate_hargreaves_eto
+
+LOCATION = {
+    "elevation": 500.0,
+    "daily": {
+        "temperature_2m_min": [18.0],
+        "temperature_2m_max": [29.0],
+        "temperature_2m_mean": [23.0],
+        "precipitation_sum": [1.5],
+        "relative_humidity_2m_mean": [70.0],
+        "wind_speed_10m_mean": [3.0],
+        "shortwave_radiation_sum": [20.0],
+    },
+}
+
+
+def _uniform_grid(spec: GridSpec) -> ClimateGrid:
+    shape = spec.shape
+    return ClimateGrid(
+        spec=spec,
+        date="2023-01-01",
+        fields={
+            "tmin": np.full(shape, 18.5),
+            "tmax": np.full(shape, 28.2),
+            "tmean": np.full(shape, 23.4),
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_eto_raster_matches_point_calculation(tmp_path):
+    """Each raster cell should equal the point ETo at the cell centre; npy tiles round-trip."""
+    spec = GridSpec(11.0, -87.0, 13.0, -85.0, resolution=0.5)
+    grid = _uniform_grid(spec)
+    grid.fields["tmin"][0, 0] = np.nan  # A cell with missing data stays empty.
+
+    raster = await compute_eto_raster(grid)
+
+    assert raster.values.shape == (4, 4)
+    assert raster.values.dtype == np.float32
+    assert np.isnan(raster.values[0, 0])
+    point = calculate_hargreaves_eto(
+        ClimateData(
+            date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=spec.lats[2], source="CSV"
+        )
+    )
+    assert raster.values[2, 1] == pytest.approx(point.eto, rel=1e-6)
+
+    export_eto_raster(raster, tmp_path / "tiles", fmt="npy", tile_size=3)
+    restored = load_eto_raster(tmp_path / "tiles")
+    np.testing.assert_array_equal(restored.values, raster.values)
+
+
+@pytest.mark.asyncio
+async def test_fetch_climate_grid_uses_bulk_requests(httpx_mock):
+    """All cells of a small grid should come back from one multi-coordinate request."""
+    spec = GridSpec(12.0, -86.0, 13.0, -85.0, resolution=0.5)
+    httpx_mock.add_response(json=[LOCATION] * 4)
+
+    grid = await fetch_climate_grid(spec, "2023-01-01")
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert grid.fields["tmax"].shape == (2, 2)
+    assert grid.fields["elevation"][1, 1] == 500.0
+    assert grid.fields["wind_speed"][0, 0] == pytest.approx(3.0 * 0.748, rel=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_failed_grid_chunk_leaves_its_cells_empty(httpx_mock):
+    """One failed multi-coordinate request must not abort the raster."""
+    spec = GridSpec(12.0, -86.0, 13.0, -83.5, resolution=0.125)  # 8 x 20 = 160 cells
+
+    def _archive(request: httpx.Request) -> httpx.Response:
+        count = len(request.url.params["latitude"].split(","))
+        if count < 100:
+            return httpx.Response(500)
+        return httpx.Response(200, json=[LOCATION] * count)
+
+    httpx_mock.add_callback(_archive, is_reusable=True)
+
+    raster = await compute_eto_raster(await fetch_climate_grid(spec, "2023-01-01"))
+
+    cells = raster.values.ravel()
+    assert np.isfinite(cells[:100]).all()
+    assert np.isnan(cells[100:]).all()
+
+
+def test_export_names_stay_inside_the_export_directory(tmp_path):
+    assert resolve_export_path("rasters/day1", tmp_path) == tmp_path / "rasters" / "day1"
+    for name in ("../outside", "/etc/passwd", "", "."):
+        with pytest.raises(ValueError):
+            resolve_export_path(name, tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_interactive_rasters_are_capped_and_skipped_during_outages(httpx_mock, tmp_path):
+    spec = GridSpec(10.7, -87.7, 15.1, -82.7, resolution=0.05)  # 88 x 100 cells
+    with pytest.raises(ValueError, match="submit_analysis_job"):
+        spec.check_interactive()
+    GridSpec.from_bbox(spec.bbox, 0.25).check_interactive()  # The national map: 360 cells.
+
+    MONITOR.record("open_meteo", False, "ConnectTimeout")
+    with pytest.raises(ValueError, match="unavailable"):
+        await fetch_climate_grid(GridSpec(12.0, -86.0, 13.0, -85.0, 0.5), "2023-01-01")
+    assert httpx_mock.get_requests() == []
+
+    raster = await compute_eto_raster(_uniform_grid(GridSpec(12.0, -86.0, 13.0, -85.0, 0.5)))
+    export_eto_raster(raster, tmp_path / "day1", fmt="npy")
+    with pytest.raises(ValueError, match="already exists"):
+        export_eto_raster(raster, tmp_path / "day1", fmt="zarr")
@@ -0,0 +1,37 @@
+import pytest
+
+from nwa_hydro.health import MONITOR, HealthMonitor
+from nwa_hydro.tools.fusion import fetch_climate_data
+
+
+@pytest.mark.asyncio
+async def test_probes_populate_cached_status():
+    """Scheduled probes should be cached, and failures mapped to degraded modes."""
+
+    async def ok():
+        return "fine"
+
+    async def broken():
+        raise ConnectionError("unreachable")
+
+    monitor = HealthMonitor(probes={"open_meteo": broken, "local_archive": ok})
+    await monitor.run_probes()
+    status = monitor.status()
+
+    assert status["status"] == "degraded"
+    assert status["tools_ready"] is True
+    assert status["degraded_modes"] == ["offline_archive_only"]
+    assert status["checks"]["open_meteo"]["detail"] == "ConnectionError: unreachable"
+    assert monitor.is_down("open_meteo")
+    assert not monitor.is_down("local_archive")
+
+
+@pytest.mark.asyncio
+async def test_fusion_skips_known_down_api(httpx_mock):
+    """While Open-Meteo is marked down, fetches go straight to the CSV archive."""
+    MONITOR.record("open_meteo", False, "ConnectTimeout")
+
+    data = await fetch_climate_data(12.0, -85.0, "2023-01-01")
+
+    assert data.source == "CSV"
+    assert httpx_mock.get_requests() == []
@@ -0,0 +1,84 @@
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs
+
+import httpx
+import numpy as np
+import pytest
+
+from nwa_hydro.tools.hourly import HourlySeries, ingest_hourly, series_path
+
+
+def _hours(start: str, days: int) -> list[str]:
+    first = datetime.fromisoformat(start)
+    return [(first + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(24 * days)]
+
+
+def _temperature(stamp: str) -> float:
+    return 20.0 + int(stamp[11:13]) / 2 + int(stamp[8:10]) / 10
+
+
+def test_year_of_hours_is_compact_and_aggregates_to_days(tmp_path):
+    times = _hours("2023-01-01T00:00", 365)
+    temps = [_temperature(t) for t in times]
+    rain = [0.5 if t.endswith("T06:00") else 0.0 for t in times]
+    series = HourlySeries(12.9256, -85.9189)
+    # Overlapping monthly chunks, as a resumed ingestion would send them.
+    for offset in range(0, len(times), 24 * 30):
+        chunk = slice(max(offset - 24, 0), offset + 24 * 30)
+        series.extend(times[chunk], {"temperature_2m": temps[chunk], "precipitation": rain[chunk]})
+
+    assert len(series) == 8760
+    assert series.nbytes < 200_000
+
+    series = HourlySeries.load(series.save(tmp_path / "site.npz"))
+    days = series.daily()
+    assert len(days) == 365 and days.complete.all()
+    assert str(days.dates[40]) == "2023-02-10"
+    feb10 = np.array([_temperature(t) for t in times[40 * 24:41 * 24]])
+    assert days.tmin[40] == pytest.approx(feb10.min(), abs=1e-4)
+    assert days.tmax[40] == pytest.approx(feb10.max(), abs=1e-4)
+    assert days.tmean[40] == pytest.approx(feb10.mean(), abs=1e-4)
+    assert days.precipitation[40] == pytest.approx(0.5)
+
+    dates, hot = series.hours_above("temperature_2m", 31.0)
+    assert hot[0] == 2 and hot[40] == 3  # 22:00-23:00 on Jan 1; Feb 10 runs 0.9 warmer
+
+
+@pytest.mark.asyncio
+async def test_ingest_hourly_streams_chunks_and_tops_up(httpx_mock, tmp_path):
+    published_until = ["2023-01-05T12:00"]
+
+    def _archive(request: httpx.Request) -> httpx.Response:
+        params = parse_qs(request.url.query.decode())
+        assert params["hourly"][0] == "temperature_2m"
+        start = date.fromisoformat(params["start_date"][0])
+        end = date.fromisoformat(params["end_date"][0])
+        times = _hours(f"{start}T00:00", (end - start).days + 1)
+        # At first the archive has not published Jan 5 afternoon yet.
+        temps = [None if t >= published_until[0] else _temperature(t) for t in times]
+        return httpx.Response(200, json={"hourly": {"time": times, "temperature_2m": temps}})
+
+    httpx_mock.add_callback(_archive, is_reusable=True)
+    sites = [(12.9256, -85.9189)]
+
+    appended = await ingest_hourly(
+        sites, date(2023, 1, 5), date(2023, 1, 1), tmp_path, chunk_days=2
+    )
+
+    assert appended == 4 * 24 + 12
+    assert len(httpx_mock.get_requests()) == 3
+    series = HourlySeries.load(series_path(*sites[0], tmp_path))
+    assert series.last_date == "2023-01-05"
+    assert np.isnan(series.column("precipitation")).all()
+
+    httpx_mock.reset()
+    published_until[0] = "2023-01-07T00:00"
+    httpx_mock.add_callback(_archive, is_reusable=True)
+    appended = await ingest_hourly(sites, date(2023, 1, 6), directory=tmp_path)
+
+    (request,) = httpx_mock.get_requests()
+    assert parse_qs(request.url.query.decode())["start_date"] == ["2023-01-05"]
+    assert appended == 12 + 24  # Jan 5 afternoon is filled in, then Jan 6.
+    series = HourlySeries.load(series_path(*sites[0], tmp_path))
+    assert len(series) == 6 * 24
+    assert np.diff(series.minutes()).max() == 60
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+# Heavy libraries that must load on first use, not when an MCP client spawns the server.
+LAZY_MODULES = ("google.generativeai", "pandas", "numba")
+# Generous for CI runners; a local cold start is well under half of this.
+IMPORT_BUDGET_MS = float(os.getenv("NWA_HYDRO_IMPORT_BUDGET_MS", "1500"))
+
+
+def _import_times(module: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times.setdefault(parts[2].strip(), int(parts[1]))
+    return times
+
+
+def test_server_import_stays_lazy_and_within_budget():
+    """Importing the server must not pull in Gemini, pandas or numba."""
+    times = _import_times("nwa_hydro.server")
+
+    assert not [name for name in LAZY_MODULES if name in times]
+    assert times["nwa_hydro.server"] / 1000 < IMPORT_BUDGET_MS
@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+
+from nwa_hydro.jobs import JobQueue, JobQueueFullError, get_job_queue
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.server import get_job_results, get_job_status, submit_analysis_job
+
+
+async def _wait(queue: JobQueue, job_id: str) -> None:
+    for _ in range(200):
+        if queue.get(job_id).status in ("done", "failed"):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_interactive_jobs_run_first_and_results_survive_a_restart(tmp_path):
+    order = []
+
+    async def count(params, progress):
+        order.append(params["name"])
+        progress(0.5)
+        return [{"name": params["name"], "i": i} for i in range(params["rows"])]
+
+    queue = JobQueue(tmp_path, workers=1, handlers={"count": count})
+    first = queue.submit("count", {"name": "batch 1", "rows": 250})
+    second = queue.submit("count", {"name": "batch 2", "rows": 1})
+    queue.submit("count", {"name": "interactive", "rows": 1}, priority="interactive")
+    queue.start()
+    await _wait(queue, second.id)
+    await queue.stop()
+
+    assert order == ["interactive", "batch 1", "batch 2"]
+
+    restarted = JobQueue(tmp_path, handlers={"count": count})
+    page = restarted.results(first.id, offset=200, limit=100)
+    assert (page.total, len(page.rows), page.next_offset) == (250, 50, None)
+    assert page.rows[0] == {"name": "batch 1", "i": 200}
+    assert restarted.results(first.id, limit=100).next_offset == 100
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_are_requeued_and_failures_reported(tmp_path):
+    async def flaky(params, progress):
+        if params.get("fail"):
+            raise ValueError("no data")
+        return [{"ok": True}]
+
+    queue = JobQueue(tmp_path, handlers={"flaky": flaky}, max_queued=2)
+    pending = queue.submit("flaky", {})
+    broken = queue.submit("flaky", {"fail": True})
+    with pytest.raises(JobQueueFullError):
+        queue.submit("flaky", {})
+    with pytest.raises(ValueError):
+        queue.submit("unknown", {})
+
+    # The process stops before any worker ran; a new one picks the jobs up.
+    restarted = JobQueue(tmp_path, handlers={"flaky": flaky})
+    restarted.start()
+    await _wait(restarted, pending.id)
+    await _wait(restarted, broken.id)
+    await restarted.stop()
+
+    assert restarted.get(pending.id).status == "done"
+    assert restarted.get(broken.id).error == "ValueError: no data"
+    assert restarted.results(broken.id).rows == []
+
+
+@pytest.mark.asyncio
+async def test_site_history_job_through_the_mcp_tools(monkeypatch):
+    async def fake_range(lat, lon, start_date, end_date):
+        return [
+            ClimateData(date=start_date, tmin=18.0, tmax=30.0, tmean=24.0, lat=lat, lon=lon,
+                        source="API (Range)"),
+        ]
+
+    monkeypatch.setattr("nwa_hydro.jobs.fetch_climate_range", fake_range)
+    params = {"lat": 12.9, "lon": -85.9, "start_date": "2020-01-01", "end_date": "2021-12-31"}
+
+    job = json.loads(await submit_analysis_job("site_history", json.dumps(params), "interactive"))
+    for _ in range(200):
+        status = json.loads(await get_job_status(job["id"]))
+        if status["status"] == "done":
+            break
+        await asyncio.sleep(0.01)
+    await get_job_queue().stop()
+
+    page = json.loads(await get_job_results(job["id"]))
+    assert status["progress"] == 1.0
+    assert [row["date"] for row in page["rows"]] == ["2020-01-01", "2021-01-01"]
+    assert page["rows"][0]["eto"] > 0
+    assert "error" in json.loads(await submit_analysis_job("site_history", "[]"))
+    assert "error" in json.loads(await get_job_status("missing"))
+
+
+def test_oversized_or_malformed_jobs_are_rejected_on_submit(tmp_path, monkeypatch):
+    monkeypatch.setattr("nwa_hydro.jobs.MAX_SITE_HISTORY_DAYS", 366)
+    monkeypatch.setattr("nwa_hydro.jobs.MAX_REGION_CELL_DAYS", 1000)
+    queue = JobQueue(tmp_path)
+    site = {"lat": 12.9, "lon": -85.9, "start_date": "2020-01-01"}
+    region = {"min_lat": 12.0, "min_lon": -86.0, "max_lat": 13.0, "max_lon": -85.0,
+              "resolution": 0.25, "start_date": "2020-01-01"}
+
+    queue.submit("site_history", site | {"end_date": "2020-12-31"})
+    with pytest.raises(ValueError, match="367 days"):
+        queue.submit("site_history", site | {"end_date": "2021-01-01"})
+    queue.submit("region_eto", region | {"end_date": "2020-02-19"})  # 16 cells × 50 days
+    with pytest.raises(ValueError, match="1,008 cell-days"):
+        queue.submit("region_eto", region | {"end_date": "2020-03-03"})
+    with pytest.raises(ValueError, match="Invalid params"):
+        queue.submit("site_history", {"start_date": "2020-01-01", "end_date": "2020-01-02"})
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_queues_sharing_a_directory_run_each_job_once(tmp_path):
+    runs = []
+    release = asyncio.Event()
+
+    async def slow(params, progress):
+        runs.append(params["name"])
+        await release.wait()
+        return [{"name": params["name"]}]
+
+    # Two processes on one NWA_HYDRO_JOBS directory, e.g. the MCP server and the app.
+    first = JobQueue(tmp_path, workers=2, handlers={"slow": slow}, poll_seconds=0.01)
+    second = JobQueue(tmp_path, workers=2, handlers={"slow": slow}, poll_seconds=0.01)
+    job = first.submit("slow", {"name": "a"})
+    first.start()
+    second.start()
+    for _ in range(200):
+        if second.get(job.id).status == "running":
+            break
+        await asyncio.sleep(0.01)
+    # A restarted process must leave a job alone while its runner holds the lock.
+    restarted = JobQueue(tmp_path, handlers={"slow": slow}, poll_seconds=0.01)
+    restarted.start()
+    await asyncio.sleep(0.1)
+    release.set()
+    await _wait(second, job.id)
+    for queue in (first, second, restarted):
+        await queue.stop()
+
+    assert runs == ["a"]
+    assert second.results(job.id).rows == [{"name": "a"}]
+
+
+@pytest.mark.asyncio
+async def test_orphaned_running_jobs_are_rerun_and_finished_jobs_pruned(tmp_path):
+    async def count(params, progress):
+        return [{"i": i} for i in range(params["rows"])]
+
+    queue = JobQueue(tmp_path, handlers={"count": count})
+    orphan = queue.submit("count", {"rows": 2})
+    # Its process died mid-run: the file says running but nobody holds the lock.
+    queue._save(orphan.model_copy(update={"status": "running", "started_at": 1.0}))
+
+    restarted = JobQueue(tmp_path, handlers={"count": count})
+    restarted.start()
+    await _wait(restarted, orphan.id)
+    await restarted.stop()
+    assert restarted.get(orphan.id).rows == 2
+    assert restarted.get("../" + orphan.id) is None
+
+    assert restarted.prune(max_age=3600) == 0
+    assert restarted.prune(max_age=0) == 1
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError, match="Unknown job"):
+        restarted.results(orphan.id)
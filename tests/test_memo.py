@@ -0,0 +1,41 @@
+from nwa_hydro.memo import ChainResult, RequestMemo
+from nwa_hydro.metrics import CACHE_HITS
+from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools.science import calculate_hargreaves_eto
+
+
+def _chain(date: str) -> ChainResult:
+    climate = ClimateData(date=date, tmin=18.5, tmax=28.2, tmean=23.4, lat=12.9, source="API")
+    return ChainResult(climate=climate, eto=calculate_hargreaves_eto(climate))
+
+
+def test_memo_is_scoped_to_session_and_inputs():
+    """Later handlers of a chain get the same native objects; other sessions and inputs do not."""
+    memo = RequestMemo()
+    chain = _chain("2023-01-02")
+    memo.put("tab-1", 12.92561, -85.9189, "2023-01-02", chain)
+    hits = CACHE_HITS.value(cache="request")
+
+    assert memo.get("tab-1", 12.9256, -85.9189, "2023-01-02") is chain
+    assert CACHE_HITS.value(cache="request") == hits + 1
+    assert memo.get("tab-2", 12.9256, -85.9189, "2023-01-02") is None
+    assert memo.get("tab-1", 12.9256, -85.9189, "2023-01-03") is None
+    assert memo.get(None, 12.9256, -85.9189, "2023-01-02") is None
+
+    # A new analysis in the same session replaces the previous chain.
+    memo.put("tab-1", 12.9256, -85.9189, "2023-01-03", _chain("2023-01-03"))
+    assert memo.get("tab-1", 12.9256, -85.9189, "2023-01-02") is None
+    memo.drop("tab-1")
+    assert len(memo) == 0
+
+
+def test_memo_expires_and_evicts_least_recent_sessions():
+    memo = RequestMemo(ttl=-1.0)
+    memo.put("tab-1", 12.9, -85.9, "2023-01-02", _chain("2023-01-02"))
+    assert memo.get("tab-1", 12.9, -85.9, "2023-01-02") is None
+
+    memo = RequestMemo(max_sessions=2)
+    for session in ("tab-1", "tab-2", "tab-3"):
+        memo.put(session, 12.9, -85.9, "2023-01-02", _chain("2023-01-02"))
+    assert memo.get("tab-1", 12.9, -85.9, "2023-01-02") is None
+    assert memo.get("tab-3", 12.9, -85.9, "2023-01-02") is not None
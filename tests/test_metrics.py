@@ -0,0 +1,43 @@
+import pytest
+
+from nwa_hydro.metrics import FALLBACKS, REGISTRY, Histogram, render_prometheus
+from nwa_hydro.server import get_server_metrics
+from nwa_hydro.tools.fusion import fetch_climate_data
+
+
+def test_histogram_quantiles_and_exposition():
+    """Bucketed observations should yield sane quantiles and Prometheus text."""
+    registry = []
+    histogram = Histogram(
+        "test_latency_seconds", "Test histogram.", labelnames=("stage",), registry=registry
+    )
+    for _ in range(90):
+        histogram.observe(0.002, stage="fast")
+    for _ in range(10):
+        histogram.observe(3.0, stage="fast")
+
+    stats = histogram.snapshot()["fast"]
+    lines = histogram.render()
+
+    assert stats["count"] == 100
+    assert 1.0 <= stats["p50_ms"] <= 2.5
+    assert stats["p99_ms"] > 2500
+    assert 'test_latency_seconds_bucket{stage="fast",le="+Inf"} 100' in lines
+    assert 'test_latency_seconds_count{stage="fast"} 100' in lines
+    assert registry == [histogram] and histogram not in REGISTRY
+    assert "test_latency_seconds" not in render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_fallback_activation_is_counted(httpx_mock):
+    """A CSV fallback should bump the counter and record both stage timings."""
+    httpx_mock.add_response(status_code=500)
+    before = FALLBACKS.value(source="csv")
+
+    await fetch_climate_data(12.0, -85.0, "2023-01-01")
+
+    assert FALLBACKS.value(source="csv") == before + 1
+    stages = get_server_metrics()["nwa_stage_duration_seconds"]
+    assert stages["api_fetch"]["count"] >= 1
+    assert stages["csv_fallback"]["count"] >= 1
+    assert 'nwa_fallback_activations_total{source="csv"}' in render_prometheus()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from nwa_hydro.tools.rolling import RollingAggregates, update_from_store
+from nwa_hydro.tools.store import ClimateStore
+
+
+def _days(count: int) -> list[str]:
+    dates = np.arange(np.datetime64("2023-01-01"), np.datetime64("2023-01-01") + count)
+    return [str(day) for day in dates]
+
+
+def test_incremental_sums_match_full_recomputation(tmp_path):
+    """Running sums over 200 appended days equal a from-scratch rebuild, before and after reload."""
+    rng = np.random.default_rng(7)
+    eto = rng.uniform(2.0, 7.0, 200)
+    rain = rng.exponential(3.0, 200) * (rng.random(200) < 0.4)
+    state = RollingAggregates()
+    for index, day in enumerate(_days(200)):
+        if index == 120:
+            state = RollingAggregates.load(state.save(tmp_path / "rolling.npz"))
+        assert state.append(12.9256, -85.9189, day, eto[index], rain[index])
+
+    balance = state.get(12.9256, -85.9189)
+    assert balance.date == "2023-07-19"
+    for window in (7, 30, 90):
+        assert balance.eto_sum[window] == pytest.approx(eto[-window:].sum())
+        assert balance.deficit[window] == pytest.approx((eto - rain)[-window:].sum())
+    deficit = 0.0
+    for daily in eto - rain:
+        deficit = max(deficit + daily, 0.0)
+    assert balance.cumulative_deficit == pytest.approx(deficit)
+    assert balance.cumulative_balance == pytest.approx((rain - eto).sum())
+
+
+def test_append_day_updates_many_sites_and_rejects_gaps():
+    state = RollingAggregates(windows=(2, 3))
+    coords = [(12.0 + 0.1 * i, -86.0) for i in range(1000)]
+    for day, value in zip(_days(4), (1.0, 2.0, 3.0, 4.0), strict=True):
+        assert state.append_day(day, coords, np.full(1000, value), np.zeros(1000)) == 1000
+
+    assert state.append_day("2023-01-04", coords, np.ones(1000), np.zeros(1000)) == 0
+    balance = state.get(12.5, -86.0)
+    assert (balance.eto_sum, balance.complete_windows) == ({2: 7.0, 3: 9.0}, [2, 3])
+    with pytest.raises(ValueError, match="no data between"):
+        state.append(*coords[0], "2023-01-06", 1.0, 0.0)
+
+
+def test_update_from_store_appends_only_new_days(tmp_path):
+    store = ClimateStore(tmp_path / "climate.db")
+    site = ("Matagalpa", 12.9256, -85.9189)
+
+    def ingest_days(days: list[str]) -> None:
+        rows = [(site[1], site[2], day, 18.0, 30.0, 24.0, 1.0, 70.0, None, None, 700.0)
+                for day in days]
+        store.write(rows, {site: days[-1]})
+
+    state = RollingAggregates()
+    ingest_days(_days(10))
+    assert update_from_store(state, store) == 10
+    ingest_days(_days(11)[10:])
+    assert update_from_store(state, store) == 1
+    assert update_from_store(state, store) == 0
+
+    balance = state.get(12.9256, -85.9189)
+    assert (balance.days, balance.date) == (11, "2023-01-11")
+    assert balance.precipitation_sum[7] == pytest.approx(7.0)
@@ -0,0 +1,101 @@
+import pytest
+
+from nwa_hydro.metrics import INSIGHT_ROUTES, llm_bypass_rate
+from nwa_hydro.schemas import ClimateAnomaly, ClimateData, EToResult
+from nwa_hydro.tools import intelligence, rolling
+from nwa_hydro.tools.intelligence import generate_agronomist_insight
+from nwa_hydro.tools.rolling import RollingAggregates
+from nwa_hydro.tools.rules import assess_risk, fast_path_insight
+from nwa_hydro.tools.science import calculate_hargreaves_eto
+
+LAT, LON = 12.9256, -85.9189
+
+
+def _eto(eto: float, rain: float = 0.0, day: str = "2024-03-10") -> EToResult:
+    climate = ClimateData(date=day, tmin=20.0, tmax=32.0, tmean=26.0, lat=LAT, lon=LON,
+                          precipitation=rain, source="API")
+    return EToResult(date=day, eto=eto, method="Hargreaves (Native)", input_data=climate)
+
+
+def _anomaly(percentile: float) -> ClimateAnomaly:
+    return ClimateAnomaly(day_of_year=70, eto_normal=4.0, eto_anomaly=1.0,
+                          eto_percentile=percentile, precipitation_normal=1.0)
+
+
+def test_confidence_drops_near_thresholds_and_on_conflicting_signals():
+    high = assess_risk(_eto(6.5))
+    assert (high.risk_level, high.confidence) == ("High", 1.0)
+
+    near_boundary = assess_risk(_eto(4.9))
+    assert near_boundary.risk_level == "Medium"
+    assert near_boundary.confidence == pytest.approx(0.1 / 0.75, abs=1e-3)
+
+    rained = assess_risk(_eto(6.5, rain=5.0))
+    assert (rained.risk_level, rained.net_demand, rained.confidence) == ("Low", 1.5, 1.0)
+
+    unusual = assess_risk(_eto(1.5), _anomaly(percentile=96.0))
+    assert unusual.confidence == 0.5
+    assert unusual.conflicts == ("ETo is unusually high for the season",)
+
+    state = RollingAggregates()
+    for day in range(1, 11):
+        state.append(LAT, LON, f"2024-03-{day:02d}", 5.0, 0.0)
+    dry_week = assess_risk(_eto(1.5), balance=state.get(LAT, LON))
+    assert dry_week.conflicts == ("the last 7 days left a 35 mm deficit",)
+
+
+@pytest.mark.asyncio
+async def test_clear_days_skip_gemini_and_ambiguous_days_reach_it(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    calls = []
+
+    async def no_gemini(*args):
+        calls.append(1)
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(intelligence, "_model_and_safety_settings", lambda variant: (None, {}))
+    monkeypatch.setattr(intelligence, "_generate_with_timeout", no_gemini)
+    state = RollingAggregates()
+    for day in range(1, 11):
+        state.append(LAT, LON, f"2024-03-{day:02d}", 6.0, 0.5)
+    state.save(rolling.ROLLING_PATH)
+    before = {route: INSIGHT_ROUTES.value(route=route) for route in ("rules", "llm")}
+
+    clear = await generate_agronomist_insight(_eto(7.0), _anomaly(percentile=80.0))
+    ambiguous = await generate_agronomist_insight(_eto(4.9))
+
+    assert clear.risk_level == "High"
+    assert "38 mm water deficit" in clear.summary and "about 7 mm" in clear.advice
+    assert calls == [1]
+    assert ambiguous.summary == "Automated analysis (API error)."
+    assert INSIGHT_ROUTES.value(route="rules") - before["rules"] == 1
+    assert INSIGHT_ROUTES.value(route="llm") - before["llm"] == 1
+    assert 0.0 < llm_bypass_rate() < 1.0
+
+
+@pytest.mark.parametrize(
+    ("tmin", "tmax", "day", "risk", "route"),
+    [
+        # Matagalpa highlands: ~3.7 mm/day in January, ~4.6 around April and July.
+        (18.5, 28.2, "2024-01-15", "Medium", "rules"),
+        (18.5, 28.2, "2024-04-15", "Medium", "llm"),
+        (18.5, 28.2, "2024-07-15", "Medium", "llm"),
+        # Dry corridor at the end of the dry season: ~5.7 mm/day.
+        (22.0, 34.0, "2024-04-15", "High", "rules"),
+    ],
+)
+def test_thresholds_route_typical_nicaraguan_days_from_the_real_calculator(
+    tmin, tmax, day, risk, route
+):
+    """RiskRules bands apply to FAO-56 ETo in mm/day, as calculate_hargreaves_eto returns it."""
+    climate = ClimateData(date=day, tmin=tmin, tmax=tmax, tmean=(tmin + tmax) / 2, lat=12.9,
+                          source="CSV")
+    eto_result = calculate_hargreaves_eto(climate)
+    before = INSIGHT_ROUTES.value(route=route)
+
+    insight = fast_path_insight(eto_result)
+
+    assert 3.0 < eto_result.eto < 6.0
+    assert assess_risk(eto_result).risk_level == risk
+    assert (insight is None) == (route == "llm")
+    assert INSIGHT_ROUTES.value(route=route) - before == 1
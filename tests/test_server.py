@@ -1,21 +1,36 @@
+import json
+import threading
+
 import pytest
 
+from nwa_hydro import server
+from nwa_hydro.health import MONITOR
 from nwa_hydro.schemas import AgronomistInsight, ClimateData
 from nwa_hydro.server import (
     calculate_eto,
+    calculate_eto_batch,
     get_agronomist_advice,
     get_climate_data,
     get_server_health,
+    get_water_balance,
 )
+from nwa_hydro.tools import rolling
+from nwa_hydro.tools.rolling import RollingAggregates
 
 
 @pytest.mark.asyncio
 async def test_get_server_health():
-    """Smoke test for the health check tool."""
+    """Health reports cached probe results and the degraded modes they imply."""
+    assert (await get_server_health())["status"] == "starting"
+
+    MONITOR.record("open_meteo", True)
+    MONITOR.record("local_archive", True)
+    MONITOR.record("gemini", False, "GOOGLE_API_KEY not set")
     result = await get_server_health()
 
-    assert result["status"] == "ok"
+    assert result["status"] == "degraded"
     assert result["tools_ready"] is True
+    assert result["degraded_modes"] == ["rule_based_insights"]
     assert result["uptime_seconds"] >= 0
 
 
@@ -52,3 +67,50 @@ async def test_tool_roundtrip_with_mocks(monkeypatch):
     advice = AgronomistInsight.model_validate_json(advice_json)
     assert advice.summary == "All good"
     assert advice.risk_level == "Low"
+
+
+@pytest.mark.asyncio
+async def test_calculate_eto_batch_matches_single_site_tool(monkeypatch):
+    """Batch tool must agree with the interactive single-record tool."""
+    threads = []
+
+    def record_thread(original):
+        def on_thread(*args):
+            threads.append(threading.current_thread())
+            return original(*args)
+        return on_thread
+
+    for name in ("_parse_eto_batch", "_dump_eto_batch"):
+        monkeypatch.setattr(server, name, record_thread(getattr(server, name)))
+    climate = ClimateData(
+        date="2023-01-01",
+        tmin=18.5,
+        tmax=28.2,
+        tmean=23.4,
+        lat=12.0,
+        source="CSV",
+    )
+    series_json = json.dumps([climate.model_dump()] * 3)
+
+    results = json.loads(await calculate_eto_batch(series_json))
+    single = json.loads(calculate_eto(climate.model_dump_json()))
+
+    assert len(results) == 3
+    assert results[0]["eto"] == pytest.approx(single["eto"], rel=1e-12)
+    assert results[0]["method"] == single["method"]
+    # Parsing and serialization of large batches stay off the event loop.
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    assert await calculate_eto_batch("[]") == "[]"
+
+
+@pytest.mark.asyncio
+async def test_get_water_balance_reads_persisted_rolling_state():
+    assert "error" in json.loads(await get_water_balance(12.9256, -85.9189))
+
+    state = RollingAggregates()
+    state.append(12.9256, -85.9189, "2023-01-01", 4.5, 1.0)
+    state.save(rolling.ROLLING_PATH)
+
+    balance = json.loads(await get_water_balance(12.9256, -85.9189))
+    assert balance["date"] == "2023-01-01"
+    assert balance["deficit"]["7"] == pytest.approx(3.5)
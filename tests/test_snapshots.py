@@ -0,0 +1,62 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from nwa_hydro.cache import MemoryCache
+from nwa_hydro.snapshots import (
+    Snapshot,
+    SnapshotRefresher,
+    latest_available_date,
+    parse_sites,
+)
+
+
+@pytest.mark.asyncio
+async def test_refresher_serves_fresh_snapshots_and_flags_stale_ones():
+    """Fresh snapshots are reused; readers see the age once they go stale."""
+    calls = []
+
+    async def compute(lat, lon, date, site):
+        calls.append(site)
+        return {"eto": 4.2}
+
+    cache = MemoryCache()
+    refresher = SnapshotRefresher(
+        {"Matagalpa": (12.9256, -85.9189)}, compute, interval=60, cache=cache,
+        today=lambda: "2024-03-01",
+    )
+    await refresher.refresh_all()
+    await refresher.refresh_all()
+    snapshot = refresher.get(12.9256, -85.9189, "2024-03-01")
+
+    assert calls == ["Matagalpa"]
+    assert snapshot.payload == {"eto": 4.2}
+    assert refresher.get(12.9256, -85.9189, "2024-03-02") is None
+    assert refresher.status(snapshot).startswith("⚡")
+
+    old = Snapshot(**{**snapshot.model_dump(), "computed_at": time.time() - 3600})
+    assert refresher.is_stale(old)
+    assert "stale" in refresher.status(old)
+
+
+def test_parse_hot_sites():
+    assert parse_sites("Jinotega:13.09,-86.0; León:12.43,-86.88") == {
+        "Jinotega": (13.09, -86.0),
+        "León": (12.43, -86.88),
+    }
+    with pytest.raises(ValueError):
+        parse_sites("Nowhere:abc")
+
+
+@pytest.mark.asyncio
+async def test_default_snapshot_day_is_the_dashboard_default_day():
+    """Snapshots are built for the latest archived day, which the date box also defaults to."""
+    async def compute(lat, lon, day, site):
+        return {"day": day}
+
+    refresher = SnapshotRefresher({"Matagalpa": (12.9, -85.9)}, compute, cache=MemoryCache())
+    await refresher.refresh("Matagalpa")
+
+    assert latest_available_date() == (date.today() - timedelta(days=1)).isoformat()
+    assert refresher.get(12.9, -85.9, latest_available_date()) is not None
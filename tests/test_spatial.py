@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from nwa_hydro.tools import spatial
+from nwa_hydro.tools import store as store_module
+from nwa_hydro.tools.fusion import fetch_climate_data, fetch_climate_range
+from nwa_hydro.tools.spatial import SpatialIndex, haversine_km
+from nwa_hydro.tools.store import ClimateStore
+
+
+def test_queries_match_brute_force():
+    """Query speed is measured by benchmarks/spatial.py; here only the answers count."""
+    rng = np.random.default_rng(7)
+    lats, lons = rng.uniform(10.7, 15.0, 5000), rng.uniform(-87.7, -83.1, 5000)
+    index = SpatialIndex()
+    for i, (lat, lon) in enumerate(zip(lats, lons, strict=True)):
+        index.add(lat, lon, f"site {i}", "station" if i % 10 == 0 else "archive")
+
+    queries = rng.uniform((10.7, -87.7), (15.0, -83.1), (50, 2))
+    for lat, lon in queries:
+        distances = haversine_km(lat, lon, lats, lons)
+        assert index.nearest(lat, lon).distance_km == pytest.approx(distances.min())
+        assert len(index.within(lat, lon, 8.0)) == int((distances <= 8.0).sum())
+        stations = distances[::10]
+        assert index.nearest(lat, lon, kind="station").distance_km == pytest.approx(
+            stations.min()
+        )
+    assert SpatialIndex().nearest(12.0, -86.0) is None
+    assert index.nearest(60.0, 100.0, max_km=50.0) is None
+
+
+@pytest.mark.asyncio
+async def test_fusion_reuses_nearby_archive_and_station_series(httpx_mock, monkeypatch):
+    store = ClimateStore(store_module.STORE_PATH)
+    store.write(
+        [(12.9256, -85.9189, "2023-01-01", 19.0, 29.0, 24.0, 2.0, 70.0, 1.8, 18.5, 700.0)],
+        {("Matagalpa", 12.9256, -85.9189): "2023-01-01"},
+    )
+    monkeypatch.setattr(spatial, "LOCAL_STATION", "Station:11.99,-86.31")
+
+    nearby = await fetch_climate_data(12.93, -85.92, "2023-01-01")  # about 0.7 km away
+    history = await fetch_climate_range(12.93, -85.92, "2023-01-01", "2023-01-01")
+    station = await fetch_climate_data(12.0, -86.3, "2023-01-01")  # about 1.5 km away
+
+    assert (nearby.source, nearby.lat, nearby.tmax) == ("Archive", 12.93, 29.0)
+    assert history[0].lon == -85.92
+    assert (station.source, station.tmax) == ("CSV", 28.2)
+    assert httpx_mock.get_requests() == []
+
+    monkeypatch.setattr(spatial, "NEAREST_SITE_KM", 0.5)
+    httpx_mock.add_response(status_code=500)
+    assert (await fetch_climate_data(12.93, -85.92, "2023-01-01")).source == "CSV"
+    assert len(httpx_mock.get_requests()) == 1
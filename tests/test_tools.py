@@ -1,9 +1,24 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
 
+from nwa_hydro.health import MONITOR
+from nwa_hydro.metrics import LLM_LATENCY, LLM_TOKENS, STAGE_SECONDS
 from nwa_hydro.schemas import ClimateData
+from nwa_hydro.tools import fusion, intelligence, kernels, rules
 from nwa_hydro.tools.fusion import fetch_climate_data
-from nwa_hydro.tools.intelligence import generate_agronomist_insight
-from nwa_hydro.tools.science import calculate_hargreaves_eto
+from nwa_hydro.tools.intelligence import generate_agronomist_insight, stream_agronomist_insight
+from nwa_hydro.tools.science import (
+    calculate_eto,
+    calculate_eto_series,
+    calculate_hargreaves_eto,
+)
 
 
 @pytest.mark.asyncio
@@ -19,6 +34,41 @@ async def test_fetch_climate_data_csv_fallback(httpx_mock):
     assert result.tmean == pytest.approx(23.4)
 
 
+@pytest.mark.asyncio
+async def test_csv_fallback_storm_does_not_block_event_loop(httpx_mock, monkeypatch):
+    """Other coroutines keep running while many requests fall back to a slow archive read."""
+    MONITOR.record("open_meteo", False, "ConnectTimeout")  # Outage: straight to the archive.
+    load = fusion._load_from_csv
+    threads: list[threading.Thread] = []
+    ticked = threading.Event()
+
+    def slow_load(*args):
+        threads.append(threading.current_thread())
+        # Returns only once the heartbeat ran meanwhile; on the loop thread this would hang.
+        assert ticked.wait(timeout=5)
+        return load(*args)
+
+    monkeypatch.setattr(fusion, "_load_from_csv", slow_load)
+    done = asyncio.Event()
+
+    async def heartbeat() -> None:
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            ticked.set()
+
+    ticker = asyncio.create_task(heartbeat())
+    results = await asyncio.gather(
+        *(fetch_climate_data(12.0, -85.0, "2023-01-02") for _ in range(40))
+    )
+    done.set()
+    await ticker
+
+    assert {result.source for result in results} == {"CSV"}
+    assert httpx_mock.get_requests() == []
+    assert len(threads) == 40
+    assert threading.main_thread() not in threads
+
+
 def test_calculate_hargreaves_eto_sanity():
     """Science layer should return a reasonable ETo value without crashing."""
     climate = ClimateData(
@@ -33,15 +83,59 @@ def test_calculate_hargreaves_eto_sanity():
     result = calculate_hargreaves_eto(climate)
 
     assert result.method == "Hargreaves (Native)"
-    # FAO-56 Hargreaves with these inputs should be ~8-9 mm/day.
-    assert result.eto == pytest.approx(8.9, rel=0.15)
+    # FAO-56 Hargreaves (eq. 52, Ra as mm/day equivalent) gives ~3.6 mm/day here.
+    assert result.eto == pytest.approx(3.6, rel=0.15)
 
 
 @pytest.mark.asyncio
 async def test_generate_agronomist_insight_missing_key(monkeypatch):
-    """Gemini tool should respond gracefully when API key is absent."""
+    """Without an API key, clear-cut days still get the rule answer; the rest a stand-in."""
     monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
 
+    clear = calculate_hargreaves_eto(ClimateData(
+        date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.0, source="CSV"
+    ))  # ~3.6 mm/day: clearly Medium.
+    ambiguous = calculate_hargreaves_eto(ClimateData(
+        date="2024-04-15", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.9, source="CSV"
+    ))  # ~4.6 mm/day: close to the High threshold, so it would go to Gemini.
+
+    answered = await generate_agronomist_insight(clear)
+    insight = await generate_agronomist_insight(ambiguous)
+    streamed = [update async for update in stream_agronomist_insight(clear)]
+
+    assert (answered.risk_level, answered.fallback) == ("Medium", False)
+    assert streamed[-1].insight == answered
+    assert insight.summary.lower().startswith("api key missing")
+    assert insight.risk_level == "Unknown"
+    assert insight.fallback  # Stand-in answers are flagged so they are never cached.
+    assert insight.eto_value == pytest.approx(ambiguous.eto)
+
+
+def test_penman_monteith_matches_fao56_example():
+    """FAO-56 Example 18 (Uccle, 6 July) should give ~3.9 mm/day."""
+    climate = ClimateData(
+        date="2023-07-06",
+        tmin=12.3,
+        tmax=21.5,
+        tmean=16.9,
+        lat=50.8,
+        elevation=100.0,
+        humidity=70.56,
+        wind_speed=2.078,
+        solar_radiation=22.07,
+        source="CSV",
+    )
+
+    result = calculate_eto(climate, method="auto")
+
+    assert result.method == "FAO-56 Penman-Monteith"
+    assert result.eto == pytest.approx(3.9, abs=0.05)
+    # 'auto' may fall back to Hargreaves; both must report mm/day on the same scale.
+    assert calculate_eto(climate, method="hargreaves").eto == pytest.approx(result.eto, rel=0.1)
+
+
+def test_eto_method_selection():
+    """Vectorized Hargreaves must match the scalar path; missing inputs are rejected."""
     climate = ClimateData(
         date="2023-01-01",
         tmin=18.5,
@@ -50,10 +144,160 @@ async def test_generate_agronomist_insight_missing_key(monkeypatch):
         lat=12.0,
         source="CSV",
     )
+
+    series = calculate_eto_series([climate, climate], method="auto")
+
+    assert [r.method for r in series] == ["Hargreaves (Native)"] * 2
+    assert series[0].eto == pytest.approx(calculate_hargreaves_eto(climate).eto, rel=1e-12)
+    with pytest.raises(ValueError, match="solar_radiation"):
+        calculate_eto(climate, method="priestley_taylor")
+    with pytest.raises(ValueError, match="Unknown ETo method"):
+        calculate_eto(climate, method="thornthwaite")
+
+
+def test_kernel_backends_agree_with_pure_python():
+    """Every available kernel backend must reproduce the pure-Python reference."""
+    rng = np.random.default_rng(7)
+    tmin = rng.uniform(10.0, 25.0, 500)
+    tmax = tmin + rng.uniform(0.0, 15.0, 500)
+    lat = rng.uniform(-60.0, 60.0, 500)
+    doy = rng.integers(1, 366, 500).astype(float)
+    reference = kernels.hargreaves(tmin, tmax, (tmin + tmax) / 2, lat, doy, backend="python")
+
+    for backend in kernels.available_backends():
+        result = kernels.hargreaves(tmin, tmax, (tmin + tmax) / 2, lat, doy, backend=backend)
+        np.testing.assert_allclose(result, reference, rtol=1e-13, atol=0.0)
+
+
+class _Part:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Chunk:
+    """Minimal stand-in for a google.generativeai streamed response chunk."""
+    prompt_feedback = None
+
+    def __init__(self, text):
+        content = SimpleNamespace(parts=[_Part(text)] if text else [])
+        self.candidates = [
+            SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"), content=content)
+        ]
+
+
+class _StreamingModel:
+    pieces: list[str] = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        assert stream
+
+        async def chunks():
+            for piece in self.pieces:
+                await asyncio.sleep(0)
+                if isinstance(piece, Exception):
+                    raise piece
+                yield _Chunk(piece)
+
+        return chunks()
+
+
+@pytest.mark.asyncio
+async def test_streamed_insight_yields_partial_text_then_validated_json(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(rules, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(intelligence, "_gemini", lambda: SimpleNamespace(
+        GenerativeModel=_StreamingModel
+    ))
+    monkeypatch.setattr(_StreamingModel, "pieces", [
+        '{"summary": "Dry and ', 'hot \\u00e9', 'poque.", "advice": "Irrigate ',
+        'daily.", "risk_level": "High"}', "",  # The closing chunk carries no text.
+    ])
+    climate = ClimateData(date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.0,
+                          source="CSV")
+    eto_result = calculate_hargreaves_eto(climate)
+
+    updates = [update async for update in stream_agronomist_insight(eto_result)]
+
+    assert [(u.summary, u.advice) for u in updates[:-1]] == [
+        ("Dry and ", ""), ("Dry and hot é", ""), ("Dry and hot époque.", "Irrigate "),
+        ("Dry and hot époque.", "Irrigate daily."),
+    ]
+    assert all(update.insight is None for update in updates[:-1])
+    assert updates[-1].insight.risk_level == "High"
+    assert updates[-1].insight.advice == "Irrigate daily."
+    assert STAGE_SECONDS.snapshot()["gemini_first_token"]["count"] == 1
+
+    # A broken stream still ends with a usable insight.
+    monkeypatch.setattr(_StreamingModel, "pieces", ['{"summary": "Dry', ConnectionError()])
+    updates = [update async for update in stream_agronomist_insight(eto_result)]
+    assert updates[-1].insight.summary == "Automated analysis (API error)."
+
+
+@pytest.mark.asyncio
+async def test_prompt_variants_and_token_accounting(monkeypatch):
+    prompts = []
+
+    class CountingModel:
+        def __init__(self, model_name, system_instruction):
+            self.system_instruction = system_instruction
+
+        async def generate_content_async(self, prompt, **kwargs):
+            prompts.append((self.system_instruction, prompt))
+            response = _Chunk('{"summary": "Dry.", "advice": "Irrigate.", "risk_level": "High"}')
+            response.usage_metadata = SimpleNamespace(
+                prompt_token_count=len(prompt) // 4, candidates_token_count=21
+            )
+            return response
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(rules, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(intelligence, "_gemini", lambda: SimpleNamespace(
+        GenerativeModel=CountingModel
+    ))
+    climate = ClimateData(date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.0,
+                          precipitation=1.2, humidity=71.0, source="CSV")
     eto_result = calculate_hargreaves_eto(climate)
+    before = LLM_TOKENS.value(kind="input", variant="compact")
 
+    monkeypatch.setattr(intelligence, "PROMPT_VARIANT", "compact")
     insight = await generate_agronomist_insight(eto_result)
+    text, usage = await intelligence.request_gemini(
+        eto_result, variant=intelligence.get_prompt_variant("verbose")
+    )
 
-    assert insight.summary.lower().startswith("api key missing")
-    assert insight.risk_level == "Unknown"
-    assert insight.eto_value == pytest.approx(eto_result.eto)
+    (compact_system, compact), (verbose_system, verbose) = prompts
+    assert insight.risk_level == "High" and '"risk_level": "High"' in text
+    assert len(compact_system + compact) < len(verbose_system + verbose) / 2
+    for figure in ("2023-01-01", "23.4", "1.2", f"{eto_result.eto:.2f}"):
+        assert figure in compact
+    assert LLM_TOKENS.value(kind="input", variant="compact") - before == len(compact) // 4
+    assert (usage.variant, usage.output_tokens) == ("verbose", 21)
+    assert LLM_LATENCY.snapshot()["verbose"]["count"] >= 1
+    with pytest.raises(ValueError, match="Unknown prompt variant"):
+        intelligence.get_prompt_variant("terse")
+
+
+@pytest.mark.asyncio
+async def test_invalid_prompt_variant_fails_loudly(monkeypatch):
+    """A bad NWA_HYDRO_PROMPT_VARIANT stops startup instead of becoming an API-error fallback."""
+    result = subprocess.run(
+        [sys.executable, "-c", "import nwa_hydro.tools.intelligence"],
+        capture_output=True, text=True,
+        env=os.environ | {"NWA_HYDRO_PROMPT_VARIANT": "terse"},
+    )
+    assert result.returncode != 0
+    assert "Unknown prompt variant 'terse'" in result.stderr
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(rules, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(intelligence, "PROMPT_VARIANT", "terse")
+    climate = ClimateData(date="2023-01-01", tmin=18.5, tmax=28.2, tmean=23.4, lat=12.0,
+                          source="CSV")
+    eto_result = calculate_hargreaves_eto(climate)
+    with pytest.raises(ValueError, match="Unknown prompt variant"):
+        await generate_agronomist_insight(eto_result)
+    with pytest.raises(ValueError, match="Unknown prompt variant"):
+        [update async for update in stream_agronomist_insight(eto_result)]